@@ -8,6 +8,7 @@
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from main import *
+from po_catalog import parse_po
 
 try:
     os.chdir("Prefab History")
@@ -30,7 +31,7 @@ try:
     if os.path.exists('pot'):
         shutil.rmtree('pot')
 
-    pagedata = json.loads(site.pages["Data:DST Updates.tabx"].text())
+    pagedata = json.loads(fetch_texts(["Data:DST Updates.tabx"])["Data:DST Updates.tabx"])
     for i, field in enumerate(pagedata['schema']['fields']):
         if field['name'] == 'id':
             id_idx = i
@@ -96,19 +97,11 @@ try:
 
     print(pots)
 
-    header = 'msgid ""\nmsgstr ""\n'
     for ver, path in tqdm(pots):
         try:
-            with open(path, 'r+', encoding='utf-8') as pot:
-                line1 = pot.readline()
-                line2 = pot.readline()
-                if line1 + line2 != header:
-                    pot.seek(0)
-                    content = pot.read()
-                    pot.seek(0)
-                    pot.write(header + content)
-            po = polib.pofile(path)
-            for entry in po:
+            with open(path, 'r', encoding='utf-8') as pot:
+                entries = [entry for entry in parse_po(pot) if entry.msgctxt]
+            for entry in entries:
                 msgctxt = entry.msgctxt.split(".")
                 if msgctxt[1] == 'NAMES' and msgctxt[2].lower() not in data:
                     data[msgctxt[2].lower()] = ver
@@ -149,7 +142,7 @@ try:
         },
         'data': data,
     }, indent=4, ensure_ascii=False)
-    site.pages[f"Data:DST Updates.tabx"].save(pagedata)
+    save_pages({"Data:DST Updates.tabx": pagedata})
 
 finally:
     os.chdir("..")
\ No newline at end of file
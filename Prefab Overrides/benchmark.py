@@ -0,0 +1,300 @@
+"""
+解释执行（interpreter.py）与编译执行（compiler.py）两个后端的性能测试
+python benchmark.py tuning [--repeat 3]      执行 scripts/tuning.lua
+python benchmark.py prefabs [--repeat 3]     执行 scripts/prefabs/ 下的所有文件
+python benchmark.py locals [--repeat 3]      执行合成的多层嵌套函数，读写各层局部变量和外层函数的局部变量
+python benchmark.py calls [--repeat 3]       执行合成的递归和小函数调用，函数中途 return 和循环中 break
+python benchmark.py tables [--repeat 3]      执行合成的建表代码，table.insert 追加、# 取长度、table.remove 删除
+每个后端分别测试首次执行（编译后端包含编译时间）和同一棵语法树的再次执行，并检查两个后端的结果一致
+python benchmark.py modes [--workers 4]      顺序扫描和并行扫描所有 prefab 文件，检查两者得到的 SCANNED_PREFABS 一致
+"""
+
+import argparse
+import gc
+import os
+import time
+import zipfile
+from contextlib import redirect_stdout
+
+from constants import SCRIPTS_PATH
+from lua_ast import parse, parse_member
+from lua_globals import SCANNED_PREFABS
+from lua_types import LuaTable
+from interpreter import ConstantsInterpreter, PrefabInterpreter, Interpreter
+from compiler import COMPILED_INTERPRETERS
+import scan_prefabs
+
+
+def snapshot(value):
+    # 表转为 dict 以便比较，函数只比较类型
+    if isinstance(value, LuaTable):
+        return {k: snapshot(v) for k, v in value.items()}
+    if callable(value):
+        return "<function>"
+    return value
+
+
+def execute(Interp, tree, base):
+    i = Interp()
+    i.scope.variables.update(base.variables)
+    try:
+        i.visit(tree)
+    except Exception:
+        pass
+    return i
+
+
+def timeit(fn, repeat):
+    """每次重新解析语法树，返回 (首次执行最短用时, 再次执行最短用时, 结果)"""
+    first = again = None
+    for _ in range(repeat):
+        trees = fn.parse()
+        # 实际扫描时每次只有一棵语法树，这里预先解析的所有语法树不参与垃圾回收，以免拖慢计时
+        gc.collect()
+        gc.freeze()
+        start = time.perf_counter()
+        result = fn(trees)
+        elapsed = time.perf_counter() - start
+        first = elapsed if first is None else min(first, elapsed)
+        start = time.perf_counter()
+        fn(trees)
+        elapsed = time.perf_counter() - start
+        again = elapsed if again is None else min(again, elapsed)
+        gc.unfreeze()
+    return first, again, result
+
+
+def compare(name, Interp, bench, repeat):
+    results = {}
+    for backend, cls in (("interpreter", Interp), ("compiler", COMPILED_INTERPRETERS[Interp])):
+        # 基础模块也用同一个后端预处理
+        base = load_base(backend == "compiler")
+        first, again, results[backend] = timeit(bench(cls, base), repeat)
+        print(f"{name:<10} {backend:<12} first {first * 1000:>10.1f} ms   again {again * 1000:>10.1f} ms")
+    assert results["interpreter"] == results["compiler"], "两个后端的结果不一致"
+
+
+def load_base(compile):
+    with open(os.devnull, "w") as f, redirect_stdout(f):
+        scan_prefabs.COMPILE = compile
+        return scan_prefabs.preload_base_scope()
+
+
+def bench_tuning(args):
+    def bench(cls, base):
+        def run(trees):
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                i = execute(cls, trees[0], base)
+            return snapshot(i.scope.lookup("TUNING"))
+
+        run.parse = lambda: [parse_member(zip_ref, "scripts/tuning.lua")]
+        return run
+
+    with zipfile.ZipFile(SCRIPTS_PATH) as zip_ref:
+        compare("tuning", ConstantsInterpreter, bench, args.repeat)
+
+
+def bench_prefabs(args):
+    def bench(cls, base):
+        def run(trees):
+            overrides = []
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                for tree in trees:
+                    SCANNED_PREFABS.clear()
+                    execute(cls, tree, base)
+                    overrides.append(
+                        sorted((prefab, getattr(inst, "prefab_name_override", False))
+                               for prefab, inst in SCANNED_PREFABS.items())
+                    )
+            return overrides
+
+        run.parse = lambda: [parse_member(zip_ref, name) for name in names]
+        return run
+
+    with zipfile.ZipFile(SCRIPTS_PATH) as zip_ref:
+        names = [name for name in zip_ref.namelist()
+                 if name.startswith("scripts/prefabs/") and name.endswith(".lua")]
+        print(f"{len(names)} prefab 文件")
+        compare("prefabs", PrefabInterpreter, bench, args.repeat)
+
+
+def bench_modes(args):
+    def scan(workers):
+        SCANNED_PREFABS.clear()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as f, redirect_stdout(f):
+            scan_prefabs.get_prefab_name_override(workers=workers)
+        elapsed = time.perf_counter() - start
+        return elapsed, {
+            prefab: getattr(inst, "prefab_name_override", False)
+            for prefab, inst in SCANNED_PREFABS.items()
+        }
+
+    sequential, expected = scan(1)
+    print(f"{'sequential':<22} {sequential:>8.1f} s   {len(expected)} prefab")
+    parallel, result = scan(args.workers)
+    print(f"{f'parallel ({args.workers} 进程)':<22} {parallel:>8.1f} s   {len(result)} prefab")
+    assert result == expected, "顺序扫描与并行扫描的结果不一致"
+
+
+# 类似 prefab 的构造函数：多层块中的循环反复读写局部变量、外层函数的局部变量和全局变量
+LOCALS_SOURCE = """
+local A, B, C = 1, 2, 3
+local function MakeThing(n)
+    local function fn()
+        local inst = { total = 0 }
+        local count = 0
+        for i = 1, n do
+            if i > 0 then
+                local s = i
+                if s > 0 then
+                    count = count + 1
+                    inst.total = inst.total + A + B + C + s + i + count + SCALE
+                end
+            end
+        end
+        return inst
+    end
+    return fn
+end
+SCALE = 2
+result = MakeThing(%d)().total
+"""
+
+
+def bench_locals(args):
+    def bench(cls, base):
+        def run(trees):
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                i = execute(cls, trees[0], base)
+            return i.scope.lookup("result")
+
+        def parse_source():
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                return [parse(LOCALS_SOURCE % args.count)]
+
+        run.parse = parse_source
+        return run
+
+    compare("locals", Interpreter, bench, args.repeat)
+
+
+# 类似 prefab 中的小工具函数：递归、循环中提前 return、break 跳出循环
+CALLS_SOURCE = """
+local function fib(n)
+    if n < 2 then
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+local function find(t, value)
+    for i, v in ipairs(t) do
+        if v == value then
+            return i
+        end
+    end
+    return -1
+end
+local function first_over(t, limit)
+    local found = nil
+    for k, v in pairs(t) do
+        if v > limit then
+            found = k
+            break
+        end
+    end
+    return found
+end
+local list = { 1, 2, 3, 4, 5, 6, 7, 8 }
+local map = { a = 1, b = 2, c = 3, d = 9 }
+local total = 0
+for i = 1, %d do
+    total = total + find(list, 6) + #first_over(map, 5)
+end
+result = total + fib(%d)
+"""
+
+
+def bench_calls(args):
+    def bench(cls, base):
+        def run(trees):
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                i = execute(cls, trees[0], base)
+            return i.scope.lookup("result")
+
+        def parse_source():
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                return [parse(CALLS_SOURCE % (args.count, args.fib))]
+
+        run.parse = parse_source
+        return run
+
+    compare("calls", Interpreter, bench, args.repeat)
+
+
+# 类似 prefab 中收集 assets、prefabs 列表的代码
+TABLES_SOURCE = """
+local list = {}
+for i = 1, %d do
+    table.insert(list, i)
+    list[#list + 1] = i * 2
+end
+local total = #list
+for i = 1, %d do
+    table.remove(list)
+end
+result = total * 10 + #list
+"""
+
+
+def bench_tables(args):
+    def bench(cls, base):
+        def run(trees):
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                i = execute(cls, trees[0], base)
+            return i.scope.lookup("result")
+
+        def parse_source():
+            with open(os.devnull, "w") as f, redirect_stdout(f):
+                return [parse(TABLES_SOURCE % (args.count, args.count))]
+
+        run.parse = parse_source
+        return run
+
+    compare("tables", Interpreter, bench, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tuning_parser = subparsers.add_parser("tuning", help="执行 tuning.lua")
+    tuning_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短用时")
+    tuning_parser.set_defaults(func=bench_tuning)
+
+    prefabs_parser = subparsers.add_parser("prefabs", help="执行所有 prefab 文件")
+    prefabs_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短用时")
+    prefabs_parser.set_defaults(func=bench_prefabs)
+
+    locals_parser = subparsers.add_parser("locals", help="执行合成的多层嵌套函数")
+    locals_parser.add_argument("--count", type=int, default=5000, help="循环次数")
+    locals_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短用时")
+    locals_parser.set_defaults(func=bench_locals)
+
+    calls_parser = subparsers.add_parser("calls", help="执行合成的递归和小函数调用")
+    calls_parser.add_argument("--count", type=int, default=2000, help="循环次数")
+    calls_parser.add_argument("--fib", type=int, default=18, help="递归的 fib 参数")
+    calls_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短用时")
+    calls_parser.set_defaults(func=bench_calls)
+
+    tables_parser = subparsers.add_parser("tables", help="执行合成的建表代码")
+    tables_parser.add_argument("--count", type=int, default=2000, help="循环次数")
+    tables_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短用时")
+    tables_parser.set_defaults(func=bench_tables)
+
+    modes_parser = subparsers.add_parser("modes", help="比较顺序扫描和并行扫描")
+    modes_parser.add_argument("--workers", type=int, default=4, help="并行扫描的进程数")
+    modes_parser.set_defaults(func=bench_modes)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,1100 @@
+"""
+Lua 语法树编译为 Python 闭包的执行后端
+Interpreter.visit 对每个结点都要拼接方法名再 getattr，运算符、字面量和 nil 还要经过 generic_visit 中的一串 isinstance，
+这里每棵语法树只编译一次：结点类型、运算符、常量和字段名都在编译时确定，执行时只调用嵌套的闭包
+执行语义与 interpreter.py 一致，包括它与 Lua 不同的地方（例如 0 和 DummyTable 为假、and 左侧为假时得到 false、
+ipairs 和数值 for 的循环变量写入外层作用域、多值赋值的取值方式等），出错的位置和异常类型也相同，
+只有函数值不同：每次执行函数定义都得到新的 LuaFunction，闭包捕获当次的帧，而不是写回共用的语法树结点
+
+局部变量不按名字逐层查找作用域字典：编译时确定每个名字可能在哪几层帧的哪个位置，执行时按 (深度, 位置) 取值，
+都没有时查模块的全局变量表。解释器中局部变量执行到声明语句才存在，之前读到的是外层的同名变量，
+所以帧中还没有声明的位置为 UNSET，同一函数中声明语句之后的读取直接取值，其余从内到外跳过 UNSET 的位置
+require 的模块只能访问全局变量，不像解释器那样能读到调用处的局部变量
+"""
+
+import math
+import operator
+
+from luaparser import ast
+
+from exceptions import LuaNameError, LuaBreak
+from lua_types import LuaTable, LuaVarArgs, LuaUnpack, LuaFunction
+from lua_globals import Vector3
+from interpreter import (
+    RETURN,
+    BREAK,
+    Interpreter,
+    ConstantsInterpreter,
+    PrefabInterpreter,
+    _dummy_fn,
+)
+
+# Interpreter._is_lua_true 的判断方式是 value in (False, None)，0 和 DummyTable 也算假
+FALSY = (False, None)
+# 参数表中的 ...
+VARARGS = "..."
+# 帧中还没有执行到声明语句的局部变量
+UNSET = object()
+
+REL_OPS = {
+    "RLtOp": operator.lt,
+    "RGtOp": operator.gt,
+    "RLtEqOp": operator.le,
+    "RGtEqOp": operator.ge,
+    "REqOp": operator.eq,
+    "RNotEqOp": operator.ne,
+}
+
+ARI_OPS = {
+    "AddOp": operator.add,
+    "SubOp": operator.sub,
+    "MultOp": operator.mul,
+    "FloatDivOp": operator.truediv,
+    "FloorDivOp": operator.floordiv,
+    "ModOp": operator.mod,
+    "ExpoOp": math.pow,
+}
+
+UNARY_OPS = {
+    "UMinusOp": operator.neg,
+    "UBNotOp": operator.invert,
+    "ULNotOp": operator.not_,
+    "ULengthOp": len,
+}
+
+# generic_visit 原样返回的值类型
+PLAIN_VALUES = (
+    int,
+    float,
+    str,
+    bool,
+    list,
+    type(None),
+    LuaTable,
+    Vector3,
+    type(_dummy_fn),
+)
+
+
+class Frame:
+    """一次函数调用或一次块执行中的局部变量，globals 是定义函数的模块的全局变量表"""
+
+    __slots__ = ("values", "parent", "globals", "interp")
+
+    def __init__(self, values, parent, globals, interp) -> None:
+        self.values = values
+        self.parent = parent
+        self.globals = globals
+        self.interp = interp
+
+
+class BlockScope:
+    """
+    编译时的块作用域，对应执行时的一个帧
+    slots: 块中声明的名字 -> 在帧中的位置，同一个名字重复声明时共用一个位置
+    declared: 编译到当前语句时，前面的语句中已经声明过的名字
+    """
+
+    __slots__ = ("parent", "function", "slots", "declared")
+
+    def __init__(self, parent, function, names) -> None:
+        self.parent = parent
+        self.function = function
+        self.slots = {}
+        for name in names:
+            self.slots.setdefault(name, len(self.slots))
+        self.declared = set()
+
+
+def resolve(scope: BlockScope, name):
+    """名字可能所在的 [(深度, 位置)]，从内到外"""
+    candidates = []
+    depth = 0
+    while scope is not None:
+        slot = scope.slots.get(name)
+        if slot is not None:
+            candidates.append((depth, slot))
+        depth += 1
+        scope = scope.parent
+    return candidates
+
+
+def _up(frame, depth):
+    for _ in range(depth):
+        frame = frame.parent
+    return frame
+
+
+def _local_declarations(stmts):
+    """块中直接声明的局部变量，即 Interpreter 中写入当前作用域的语句"""
+    names = []
+    for stmt in stmts:
+        if isinstance(stmt, ast.LocalAssign):
+            names.extend(target.id for target in stmt.targets)
+        elif isinstance(stmt, ast.LocalFunction):
+            names.append(stmt.name.id)
+        elif isinstance(stmt, ast.Fornum):
+            names.append(stmt.target.id)
+        elif isinstance(stmt, ast.Forin) and _forin_iterator(stmt) == "ipairs":
+            names.extend(_forin_targets(stmt))
+    return names
+
+
+def _forin_iterator(node: ast.Forin):
+    """pairs、ipairs 等迭代函数名，解释器执行时会出错的写法返回 None"""
+    iter_fn = node.iter[0]
+    if (
+        isinstance(iter_fn, ast.Call)
+        and isinstance(iter_fn.func, ast.Name)
+        and iter_fn.args
+    ):
+        return iter_fn.func.id
+    return None
+
+
+def _forin_targets(node: ast.Forin):
+    # 有的会只用一个参数接受对象
+    if len(node.targets) == 2:
+        return [node.targets[0].id, node.targets[1].id]
+    return [node.targets[0].id]
+
+
+class FunctionCode:
+    """
+    编译后的函数定义，同一个定义结点的所有 LuaFunction 共用
+    prefab 文件中大部分函数是从不会被调用的回调，函数体在第一次调用时才编译
+    """
+
+    __slots__ = (
+        "name",
+        "params",
+        "method",
+        "block",
+        "scope",
+        "body",
+        "size",
+        "slots",
+        "varargs",
+        "self_slot",
+        "nself",
+    )
+
+    def __init__(self, name, params, block: ast.Block, scope, method=False):
+        self.name = name
+        self.params = params
+        self.method = method
+        self.block = block
+        # 定义处的块作用域，函数体中引用的外层局部变量从这里开始查找
+        self.scope = scope
+        self.body = None
+        # Interpreter.visit_Method 每执行一次就在参数表前插入一个 self
+        self.nself = 0
+
+    def compile(self):
+        params = ("self",) + self.params if self.method else self.params
+        scope = BlockScope(
+            self.scope, self, params + tuple(_local_declarations(self.block.body))
+        )
+        # 参数和函数体的局部变量在同一个帧中，参数总是已经赋值
+        scope.declared.update(params)
+        self.body = Compiler(self, scope).compile_body(self.block.body)
+        self.size = len(scope.slots)
+        self.slots = tuple(scope.slots[param] for param in self.params)
+        self.varargs = scope.slots.get(VARARGS, -1)
+        self.self_slot = scope.slots.get("self")
+        self.block = self.scope = None
+        return self.body
+
+
+def call_function(interp, fn: LuaFunction, args):
+    """同 Interpreter._execute_call"""
+    code = fn.code
+    body = code.body
+    if body is None:
+        body = code.compile()
+    parent = fn.frame
+    frame = Frame([UNSET] * code.size, parent, parent.globals, interp)
+    values = frame.values
+    slots = code.slots
+    if code.nself:
+        slots = (code.self_slot,) * code.nself + slots
+    count = len(args)
+    varargs = code.varargs
+    for idx, slot in enumerate(slots):
+        if idx < count:
+            if slot == varargs:
+                values[slot] = LuaVarArgs(args[idx:])
+                break
+            values[slot] = args[idx]
+        elif slot == varargs:
+            # 解释器对不足的 ... 参数取 Varargs.id
+            raise AttributeError("'Varargs' object has no attribute 'id'")
+        else:
+            values[slot] = None
+    for stmt in body:
+        status = stmt(frame)
+        if status is RETURN:
+            return interp.return_value
+        if status is BREAK:
+            # 函数中没有被循环接住的 break 仍然以异常的形式传给调用处
+            raise LuaBreak
+    return None
+
+
+def execute(interp, fn, args):
+    """调用不可直接调用的值"""
+    if type(fn) is LuaFunction:
+        return call_function(interp, fn, args)
+    # 解释执行的模块中定义的函数（例如用 interpreter.py 预处理的基础模块）仍由 Interpreter 调用，
+    # 其他值与解释器一样返回 None 或抛出 AttributeError
+    return Interpreter._execute_call(interp, fn, args)
+
+
+def _raiser(exc_type, *exc_args):
+    # 解释器执行到才会出错的结点，编译时不报错，执行时抛出同样的异常
+    def raise_(frame, *args):
+        raise exc_type(*exc_args)
+
+    return raise_
+
+
+class ScopeGlobals:
+    """
+    把解释器的作用域链当作全局变量表
+    Interpreter 调用解释执行的模块中定义的函数时，函数体编译执行，其中的自由变量沿原来的作用域链查找和赋值
+    """
+
+    __slots__ = ("scope",)
+
+    def __init__(self, scope) -> None:
+        self.scope = scope
+
+    def __contains__(self, name):
+        try:
+            self.scope.lookup(name)
+        except LuaNameError:
+            return False
+        return True
+
+    def __getitem__(self, name):
+        return self.scope.lookup(name)
+
+    def __setitem__(self, name, value):
+        self.scope.assign(name, value)
+
+    def get(self, name, default=None):
+        try:
+            return self.scope.lookup(name)
+        except LuaNameError:
+            return default
+
+
+class Compiler:
+    """
+    把一棵语法树编译为闭包，每个闭包接收当前帧，表达式返回值，
+    语句遇到 return 或 break 时返回 RETURN 或 BREAK，同 Interpreter 的各个语句
+    function: 正在编译的函数体所属的 FunctionCode，模块顶层为 None
+    scope: 当前的块作用域，没有声明局部变量的块不创建帧，也没有块作用域
+    """
+
+    # 结点类型 -> 编译方法，省去每个结点拼接方法名
+    _dispatch = {}
+
+    def __init__(self, function=None, scope=None):
+        self.function = function
+        self.scope = scope
+
+    def compile(self, node):
+        cls = type(node)
+        method = self._dispatch.get(cls)
+        if method is None:
+            if not isinstance(node, ast.Node):
+                return self.compile_value(node)
+            method = getattr(
+                type(self), "compile_" + cls.__name__, type(self).generic_compile
+            )
+            self._dispatch[cls] = method
+        return method(self, node)
+
+    def generic_compile(self, node):
+        if isinstance(node, ast.RelOp):
+            return self.compile_binary(node, REL_OPS[node._name], False)
+        elif isinstance(node, ast.AriOp):
+            return self.compile_binary(node, ARI_OPS[node._name], True)
+        elif isinstance(node, ast.UnaryOp):
+            return self.compile_UnaryOp(node)
+        elif isinstance(node, ast.LoOp):
+            return self.compile_LoOp(node)
+        elif isinstance(node, ast.Nil):
+            return self.compile_value(None)
+        elif isinstance(node, ast.TrueExpr):
+            return self.compile_value(True)
+        elif isinstance(node, ast.FalseExpr):
+            return self.compile_value(False)
+        elif isinstance(node, ast.Break):
+            return lambda frame: BREAK
+        return _raiser(Exception, f"No visit_{type(node).__name__} method")
+
+    def compile_value(self, value):
+        if not isinstance(value, PLAIN_VALUES):
+            return _raiser(Exception, f"No visit_{type(value).__name__} method")
+        return lambda frame: value
+
+    def compile_body(self, stmts):
+        return tuple(
+            self.compile(stmt) for stmt in stmts if not isinstance(stmt, ast.SemiColon)
+        )
+
+    def push_scope(self, names):
+        self.scope = BlockScope(self.scope, self.function, names)
+        return self.scope
+
+    def declare(self, names):
+        """names 的声明语句已经编译，之后的语句中这些名字确定已经赋值"""
+        self.scope.declared.update(names)
+
+    # 名字的存取
+    def resolve(self, name):
+        """返回 (可能的位置, 最内层的位置是否确定已经赋值)"""
+        candidates = resolve(self.scope, name)
+        if not candidates:
+            return candidates, False
+        scope = _up(self.scope, candidates[0][0])
+        return candidates, scope.function is self.function and name in scope.declared
+
+    def compile_read(self, name, strict=False):
+        """读取名字，未定义时得到 None，strict 时同 Scope.lookup 抛出 LuaNameError"""
+        candidates, definite = self.resolve(name)
+        if definite:
+            depth, slot = candidates[0]
+            if depth == 0:
+                return lambda frame: frame.values[slot]
+            if depth == 1:
+                return lambda frame: frame.parent.values[slot]
+            return lambda frame: _up(frame, depth).values[slot]
+
+        if strict:
+
+            def global_(frame):
+                globals_ = frame.globals
+                if name in globals_:
+                    return globals_[name]
+                raise LuaNameError(f"name '{name}' is not defined")
+
+        else:
+
+            def global_(frame):
+                return frame.globals.get(name)
+
+        if not candidates:
+            return global_
+        if len(candidates) == 1:
+            depth, slot = candidates[0]
+
+            def read(frame):
+                value = _up(frame, depth).values[slot]
+                return global_(frame) if value is UNSET else value
+
+            return read
+
+        def read(frame):
+            for depth, slot in candidates:
+                value = _up(frame, depth).values[slot]
+                if value is not UNSET:
+                    return value
+            return global_(frame)
+
+        return read
+
+    def compile_write(self, name):
+        """同 Scope.assign：赋给已经声明的最内层局部变量，都没有时赋给全局变量"""
+        candidates, definite = self.resolve(name)
+        if definite:
+            depth, slot = candidates[0]
+            if depth == 0:
+
+                def write(frame, value):
+                    frame.values[slot] = value
+
+            else:
+
+                def write(frame, value):
+                    _up(frame, depth).values[slot] = value
+
+            return write
+
+        def write(frame, value):
+            for depth, slot in candidates:
+                values = _up(frame, depth).values
+                if values[slot] is not UNSET:
+                    values[slot] = value
+                    return
+            frame.globals[name] = value
+
+        return write
+
+    def compile_defined(self, name):
+        candidates, definite = self.resolve(name)
+        if definite:
+            return lambda frame: True
+
+        def defined(frame):
+            for depth, slot in candidates:
+                if _up(frame, depth).values[slot] is not UNSET:
+                    return True
+            return name in frame.globals
+
+        return defined
+
+    def compile_dynamic_read(self):
+        """执行时才知道名字的读取，同 Scope.lookup"""
+        scope = self.scope
+
+        def read(frame, name):
+            for depth, slot in resolve(scope, name):
+                value = _up(frame, depth).values[slot]
+                if value is not UNSET:
+                    return value
+            globals_ = frame.globals
+            if name in globals_:
+                return globals_[name]
+            raise LuaNameError(f"name '{name}' is not defined")
+
+        return read
+
+    def compile_Chunk(self, node: ast.Chunk):
+        body = self.compile(node.body)
+
+        def chunk(frame):
+            status = body(frame)
+            if status is RETURN:
+                return frame.interp.return_value
+            if status is BREAK:
+                raise LuaBreak
+
+        return chunk
+
+    def compile_Block(self, node: ast.Block):
+        names = _local_declarations(node.body)
+        if not names:
+            # 没有局部变量的块不创建帧
+            body = self.compile_body(node.body)
+
+            def block(frame):
+                for stmt in body:
+                    status = stmt(frame)
+                    if status is RETURN or status is BREAK:
+                        return status
+
+            return block
+
+        scope = self.push_scope(names)
+        body = self.compile_body(node.body)
+        self.scope = scope.parent
+        size = len(scope.slots)
+
+        def block(frame):
+            frame = Frame([UNSET] * size, frame, frame.globals, frame.interp)
+            for stmt in body:
+                status = stmt(frame)
+                if status is RETURN or status is BREAK:
+                    return status
+
+        return block
+
+    def compile_SemiColon(self, node):
+        return lambda frame: None
+
+    # 字面量与名字
+    def compile_Number(self, node: ast.Number):
+        return self.compile_value(node.n)
+
+    def compile_String(self, node: ast.String):
+        return self.compile_value(node.s)
+
+    def compile_Name(self, node: ast.Name):
+        return self.compile_read(node.id)
+
+    def compile_Dots(self, node):
+        return self.compile_read(VARARGS, strict=True)
+
+    def compile_Index(self, node: ast.Index):
+        idx = node.idx
+        source = self.compile(node.value)
+        if isinstance(idx, ast.Name) and node.notation == ast.IndexNotation.DOT:
+            key = idx.id
+
+            def index(frame):
+                value = source(frame)
+                if value is None:
+                    return None
+                return value[key]
+
+            return index
+
+        key_ = self.compile(idx)
+
+        def index(frame):
+            # 解释器先求键再求表
+            k = key_(frame)
+            value = source(frame)
+            if value is None:
+                return None
+            return value[k]
+
+        return index
+
+    def compile_Table(self, node: ast.Table):
+        fields = []
+        for field in node.fields:
+            if isinstance(field.value, ast.Varargs):
+                fields.append((3, None, self.compile_read(VARARGS, strict=True)))
+            elif isinstance(field.key, ast.Name):
+                if field.between_brackets:
+                    fields.append(
+                        (1, self.compile(field.key), self.compile(field.value))
+                    )
+                else:
+                    fields.append((0, field.key.id, self.compile(field.value)))
+            else:
+                fields.append((2, self.compile(field.key), self.compile(field.value)))
+        fields = tuple(fields)
+
+        def table(frame):
+            tbl = LuaTable()
+            # 名字作键的字段总是在哈希部分
+            data = tbl._hash
+            for kind, key, value in fields:
+                if kind == 0:
+                    v = value(frame)
+                    if v is None:
+                        data.pop(key, None)
+                    else:
+                        data[key] = v
+                elif kind == 2:
+                    k = key(frame)
+                    v = value(frame)
+                    if v is not None:
+                        # lua语法在value为None时认为该键不存在
+                        tbl[k] = v
+                elif kind == 1:
+                    k = key(frame)
+                    tbl[k] = value(frame)
+                else:
+                    for v in value(frame):
+                        if v is not None:
+                            tbl.insert(v)
+            return tbl
+
+        return table
+
+    # 运算符
+    def compile_binary(self, node, op, catch_zero_division):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        if not catch_zero_division:
+            return lambda frame: op(left(frame), right(frame))
+
+        def binary(frame):
+            try:
+                return op(left(frame), right(frame))
+            except ZeroDivisionError:
+                return float("inf")
+
+        return binary
+
+    def compile_Concat(self, node: ast.Concat):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        return lambda frame: left(frame) + str(right(frame))
+
+    def compile_UnaryOp(self, node):
+        op = UNARY_OPS[node._name]
+        operand = self.compile(node.operand)
+        return lambda frame: op(operand(frame))
+
+    def compile_LoOp(self, node):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        if node._name == "LAndOp":
+            return lambda frame: right(frame) if left(frame) not in FALSY else False
+        elif node._name == "LOrOp":
+
+            def or_(frame):
+                value = left(frame)
+                return right(frame) if value in FALSY else value
+
+            return or_
+        return _raiser(Exception, f"未知的逻辑符号 {node}")
+
+    # 函数定义与调用
+    def compile_function(self, name, args, body: ast.Block, method=False):
+        params = tuple(
+            VARARGS if isinstance(arg, ast.Varargs) else arg.id for arg in args
+        )
+        return FunctionCode(name, params, body, self.scope, method)
+
+    def compile_LocalFunction(self, node: ast.LocalFunction):
+        name = node.name.id
+        code = self.compile_function(name, node.args, node.body)
+        slot = self.scope.slots[name]
+        self.declare((name,))
+
+        def local_function(frame):
+            frame.values[slot] = LuaFunction(code, frame)
+
+        return local_function
+
+    def compile_Function(self, node: ast.Function):
+        code = self.compile_function(
+            getattr(node.name, "id", "function"), node.args, node.body
+        )
+        target = self.compile_target(node.name)
+        return lambda frame: target(frame, LuaFunction(code, frame))
+
+    def compile_Method(self, node: ast.Method):
+        name = node.name.id
+        code = self.compile_function(name, node.args, node.body, method=True)
+        if not isinstance(node.source, ast.Name):
+            return _raiser(
+                AttributeError,
+                f"'{type(node.source).__name__}' object has no attribute 'id'",
+            )
+        source = self.compile_read(node.source.id, strict=True)
+
+        def method(frame):
+            cls = source(frame)
+            cls[name] = LuaFunction(code, frame)
+            code.nself += 1
+
+        return method
+
+    def compile_AnonymousFunction(self, node: ast.AnonymousFunction):
+        code = self.compile_function("anonymous", node.args, node.body)
+        return lambda frame: LuaFunction(code, frame)
+
+    def compile_Call(self, node: ast.Call):
+        func = self.compile(node.func)
+        args = tuple(self.compile(arg) for arg in node.args)
+
+        def call(frame):
+            fn = func(frame)
+            values = []
+            if not getattr(fn, "ignore_args", False):
+                for arg in args:
+                    value = arg(frame)
+                    if isinstance(value, LuaUnpack):
+                        values = tuple(map(frame.interp.revisit, value.args))
+                        break
+                    values.append(value)
+            if type(fn) is LuaFunction:
+                return call_function(frame.interp, fn, values)
+            if callable(fn):
+                if getattr(fn, "need_interp", False):
+                    interp = frame.interp
+                    values.insert(0, interp)
+                    # require 等函数执行的模块使用调用处的全局变量表
+                    saved = interp.frame
+                    interp.frame = frame
+                    try:
+                        return fn(*values)
+                    finally:
+                        interp.frame = saved
+                return fn(*values)
+            return execute(frame.interp, fn, values)
+
+        return call
+
+    def compile_Invoke(self, node: ast.Invoke):
+        source = self.compile(node.source)
+        name = node.func.id
+        args = tuple(self.compile(arg) for arg in node.args)
+        string = self.compile_read("string", strict=True)
+
+        def invoke(frame):
+            obj = source(frame)
+            if not isinstance(obj, (LuaTable, Vector3)):
+                cls = {str: string(frame)}[type(obj)]
+            else:
+                cls = obj
+            fn = cls[name]
+            if getattr(fn, "ignore_args", False):
+                values = ()
+            else:
+                values = (obj, *[arg(frame) for arg in args])
+            if type(fn) is LuaFunction:
+                return call_function(frame.interp, fn, values)
+            if callable(fn):
+                return fn(*values)
+            return execute(frame.interp, fn, values)
+
+        return invoke
+
+    def compile_Return(self, node: ast.Return):
+        values = tuple(self.compile(value) for value in node.values or ())
+        if not values:
+
+            def return_(frame):
+                frame.interp.return_value = None
+                return RETURN
+
+        elif len(values) == 1:
+            value = values[0]
+
+            def return_(frame):
+                # 先求值，返回值中的函数调用也会写 return_value
+                result = value(frame)
+                frame.interp.return_value = result
+                return RETURN
+
+        else:
+
+            def return_(frame):
+                result = tuple(value(frame) for value in values)
+                frame.interp.return_value = result
+                return RETURN
+
+        return return_
+
+    # 赋值
+    def compile_target(self, target):
+        """编译赋值的左值，返回 (帧, 值) -> None，同 Interpreter._assign"""
+        if isinstance(target, ast.Name):
+            return self.compile_write(target.id)
+        if not isinstance(target, ast.Index):
+            return _raiser(
+                Exception, f"unknown assign left value type: {type(target)}"
+            )
+
+        # 同 Interpreter._get_index_list：键从外到内求值，最后是根部的名字或函数调用
+        keys = []
+        node = target
+        while True:
+            if node.notation == ast.IndexNotation.DOT:
+                keys.append((True, node.idx.id))
+            elif node.notation == ast.IndexNotation.SQUARE:
+                keys.append((False, self.compile(node.idx)))
+            else:
+                keys.append(
+                    (
+                        False,
+                        _raiser(
+                            Exception,
+                            "unknown IndexNotation type: " f"{type(node.notation)}",
+                        ),
+                    )
+                )
+            if isinstance(node.value, ast.Index):
+                node = node.value
+                continue
+            if isinstance(node.value, ast.Name):
+                root = (True, node.value.id)
+            elif isinstance(node.value, ast.Call):
+                root = (False, self.compile(node.value))
+            else:
+                root = (
+                    False,
+                    _raiser(
+                        Exception,
+                        "value of Index node neither Name nor Index: "
+                        f"{type(node.value)}",
+                    ),
+                )
+            break
+        keys = tuple(keys)
+
+        if len(keys) == 1 and keys[0][0] and root[0]:
+            # 最常见的 name.key = value
+            key = keys[0][1]
+            root_name = root[1]
+            root_ = self.compile_read(root_name, strict=True)
+
+            def target_(frame, value):
+                if root_name in frame.interp.IGNORE_NAMES:
+                    return
+                try:
+                    v = root_(frame)
+                except LuaNameError:
+                    v = frame.globals[root_name] = LuaTable()
+                v[key] = value
+
+            return target_
+
+        # 函数调用返回的字符串也当作名字，执行时才知道查找哪个名字
+        lookup = self.compile_dynamic_read()
+
+        def target_(frame, value):
+            index_list = [key if const else key(frame) for const, key in keys]
+            v = root[1] if root[0] else root[1](frame)
+            if isinstance(v, str):
+                if v in frame.interp.IGNORE_NAMES:
+                    return
+                try:
+                    v = lookup(frame, v)
+                except LuaNameError:
+                    v = frame.globals[v] = LuaTable()
+            for index in reversed(index_list[1:]):
+                v = v[index]
+            v[index_list[0]] = value
+
+        return target_
+
+    def compile_Assign(self, node: ast.Assign):
+        steps = []
+        for idx, target in enumerate(node.targets):
+            if idx >= len(node.values):
+                steps.append(_raiser(IndexError, "list index out of range"))
+                break
+            steps.append(self.compile_assign_step(target, self.compile(node.values[idx])))
+        if len(steps) == 1:
+            return steps[0]
+        steps = tuple(steps)
+
+        def assign_(frame):
+            for step in steps:
+                step(frame)
+
+        return assign_
+
+    def compile_assign_step(self, target, value):
+        target_ = self.compile_target(target)
+        if not isinstance(target, ast.Name):
+            return lambda frame: target_(frame, value(frame))
+        name = target.id
+        defined = self.compile_defined(name)
+
+        def assign_step(frame):
+            if name in frame.interp.IGNORE_NAMES:
+                # 仅在未定义时给忽略变量赋值
+                if not defined(frame):
+                    target_(frame, None)
+                return
+            target_(frame, value(frame))
+
+        return assign_step
+
+    def compile_LocalAssign(self, node: ast.LocalAssign):
+        names = tuple(target.id for target in node.targets)
+        slots = tuple(self.scope.slots[name] for name in names)
+        values = node.values
+        if values and len(names) > len(values):
+            # unpack 之类的返回多个值的函数调用，同 Interpreter.visit_LocalAssign 按下标取第一个值的结果
+            first = self.compile(values[0])
+            self.declare(names)
+            targets = tuple(zip(names, slots))
+
+            def local_assign(frame):
+                value = first(frame)
+                values = value.args if isinstance(value, LuaUnpack) else value
+                variables = frame.values
+                interp = frame.interp
+                for idx, (name, slot) in enumerate(targets):
+                    if name in interp.IGNORE_NAMES:
+                        if variables[slot] is UNSET:
+                            variables[slot] = None
+                        continue
+                    if values and len(values) > idx:
+                        variables[slot] = interp.revisit(values[idx])
+                    else:
+                        variables[slot] = None
+
+            return local_assign
+
+        # 后面的值可能读到前面刚声明的名字，整条语句编译完才算声明
+        steps = tuple(
+            (name, slot, self.compile(values[idx]) if values else None)
+            for idx, (name, slot) in enumerate(zip(names, slots))
+        )
+        self.declare(names)
+
+        def local_assign(frame):
+            variables = frame.values
+            ignore = frame.interp.IGNORE_NAMES
+            for name, slot, value in steps:
+                if name in ignore:
+                    if variables[slot] is UNSET:
+                        variables[slot] = None
+                    continue
+                variables[slot] = value(frame) if value is not None else None
+
+        return local_assign
+
+    # 控制流
+    def compile_If(self, node):
+        test = self.compile(node.test)
+        body = self.compile(node.body)
+        orelse = self.compile(node.orelse) if node.orelse else None
+
+        def if_(frame):
+            if test(frame) not in FALSY:
+                return body(frame)
+            elif orelse is not None:
+                return orelse(frame)
+
+        return if_
+
+    compile_ElseIf = compile_If
+
+    def compile_Forin(self, node: ast.Forin):
+        iter_fn = node.iter[0]
+        if not isinstance(iter_fn, ast.Call):
+            return _raiser(AssertionError, "iterator not a function")
+        if not isinstance(iter_fn.func, ast.Name):
+            return _raiser(
+                AttributeError,
+                f"'{type(iter_fn.func).__name__}' object has no attribute 'id'",
+            )
+        if not iter_fn.args:
+            return _raiser(IndexError, "list index out of range")
+        iter_arg = self.compile(iter_fn.args[0])
+        targets = _forin_targets(node)
+
+        if iter_fn.func.id == "pairs":
+            # 每次循环一个新的帧，循环变量与循环体的局部变量在同一个帧中
+            scope = self.push_scope(targets + _local_declarations(node.body.body))
+            self.declare(targets)
+            body = self.compile_body(node.body.body)
+            self.scope = scope.parent
+            size = len(scope.slots)
+            k_slot = scope.slots[targets[0]]
+            v_slot = scope.slots[targets[1]] if len(targets) == 2 else None
+
+            def pairs(frame):
+                globals_, interp = frame.globals, frame.interp
+                for k, v in iter(iter_arg(frame)):
+                    child = Frame([UNSET] * size, frame, globals_, interp)
+                    values = child.values
+                    values[k_slot] = k
+                    if v_slot is not None:
+                        values[v_slot] = v
+                    status = None
+                    try:
+                        for stmt in body:
+                            status = stmt(child)
+                            if status is RETURN or status is BREAK:
+                                break
+                    except LuaBreak:
+                        # 循环体中调用的函数里的 break
+                        break
+                    if status is BREAK:
+                        break
+                    if status is RETURN:
+                        return status
+
+            return pairs
+
+        if iter_fn.func.id == "ipairs":
+            # 解释器把循环变量写在当前作用域中，只在循环体中确定已经赋值
+            k_slot = self.scope.slots[targets[0]]
+            v_slot = self.scope.slots[targets[1]] if len(targets) == 2 else None
+            added = set(targets) - self.scope.declared
+            self.declare(added)
+            body = self.compile(node.body)
+            self.scope.declared -= added
+
+            def ipairs(frame):
+                iter_val = iter_arg(frame)
+                variables = frame.values
+                idx = 1
+                while idx in iter_val:
+                    variables[k_slot] = idx
+                    if v_slot is not None:
+                        variables[v_slot] = iter_val[idx]
+                    try:
+                        status = body(frame)
+                    except LuaBreak:
+                        break
+                    if status is BREAK:
+                        break
+                    if status is RETURN:
+                        return status
+                    idx += 1
+
+            return ipairs
+
+        def other(frame):
+            # 其他迭代函数不执行循环体
+            iter_arg(frame)
+
+        return other
+
+    def compile_Fornum(self, node: ast.Fornum):
+        name = node.target.id
+        slot = self.scope.slots[name]
+        start = self.compile(node.start)
+        # 解释器先给循环变量赋初值，再求终值和步长
+        self.declare((name,))
+        stop = self.compile(node.stop)
+        step = self.compile(node.step)
+        body = self.compile(node.body)
+
+        def fornum(frame):
+            var = frame.values
+            var[slot] = start(frame)
+            stop_ = stop(frame)
+            step_ = step(frame)
+            while stop_ >= var[slot]:
+                status = body(frame)
+                if status is RETURN or status is BREAK:
+                    # 数值 for 不处理 break，与 return 一样交给外层
+                    return status
+                var[slot] += step_
+
+        return fornum
+
+
+class CompiledInterpreter(Interpreter):
+    """
+    用编译后的闭包执行语法树，可以替换 Interpreter 使用
+    编译结果保存在语法树结点上，同一棵树再次执行时不重新编译
+    """
+
+    def __init__(self):
+        super().__init__()
+        # 正在调用 require 等 need_interp 函数的帧
+        self.frame = None
+
+    def visit(self, node):
+        if not isinstance(node, ast.Node):
+            return self.revisit(node)
+        code = node.__dict__.get("compiled")
+        if code is None:
+            code = node.compiled = Compiler().compile(node)
+        frame = self.frame
+        if self.scope.parent is not None:
+            # Interpreter._execute_call 调用解释执行的模块中定义的函数
+            globals_ = ScopeGlobals(self.scope)
+        elif frame is not None:
+            globals_ = frame.globals
+        else:
+            globals_ = self.scope.variables
+        self.frame = None
+        try:
+            return code(Frame((), None, globals_, self))
+        finally:
+            self.frame = frame
+
+    def revisit(self, value):
+        # 解释器中对已经求出的值再次 visit，函数值原样返回，其他值同 generic_visit
+        if type(value) is LuaFunction:
+            return value
+        return self.generic_visit(value)
+
+    def _execute_call(self, func_node, args):
+        return execute(self, func_node, args)
+
+
+class CompiledConstantsInterpreter(CompiledInterpreter, ConstantsInterpreter):
+    pass
+
+
+class CompiledPrefabInterpreter(CompiledInterpreter, PrefabInterpreter):
+    pass
+
+
+# 解释器到对应的编译后端
+COMPILED_INTERPRETERS = {
+    Interpreter: CompiledInterpreter,
+    ConstantsInterpreter: CompiledConstantsInterpreter,
+    PrefabInterpreter: CompiledPrefabInterpreter,
+}
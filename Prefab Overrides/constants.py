@@ -1,9 +1,17 @@
 import sys
 import os
-import importlib
+import json
+from pathlib import Path
 
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-DST_ROOT = importlib.import_module("main").dst_path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# 并行扫描的工作进程也会导入此模块，spawn 方式下工作进程中没有已导入的 main.py，
+# 这时直接读取 config.json 中的游戏路径，避免每个工作进程都重新登录维基
+if "main" in sys.modules:
+    DST_ROOT = sys.modules["main"].dst_path
+else:
+    with open(os.path.join(ROOT, "config.json"), "r", encoding="utf-8") as f:
+        DST_ROOT = Path(json.load(f)["dontstarve"]["dst_path"])
 
 
 SCRIPTS_PATH = DST_ROOT / "data" / "databundles" / "scripts.zip"
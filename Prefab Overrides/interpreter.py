@@ -5,11 +5,30 @@ from typing import Optional
 
 from luaparser import ast
 
-from exceptions import LuaNameError, LuaReturn, LuaBreak
+from exceptions import LuaNameError, LuaBreak
 from lua_types import LuaTable, LuaVarArgs, LuaUnpack
 from lua_globals import Vector3
 
 
+class Completion:
+    """
+    语句的非正常结束，由外层的语句逐层返回，不抛出异常
+    return 的返回值保存在 Interpreter.return_value 中
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Completion({self.name})"
+
+
+RETURN = Completion("return")
+BREAK = Completion("break")
+
+
 class Scope:
     id = 1
 
@@ -133,6 +152,7 @@ class Interpreter:
         self.scope = Scope(interp=self)
         self.scope_stack = []
         self.first_block_scope = None  # 最外层Block的scope 用于调试打印
+        self.return_value = None
         for fn_name in self.IGNORE_FUNCS:
             self.scope.variables[fn_name] = _dummy_fn
 
@@ -176,7 +196,7 @@ class Interpreter:
         ):
             return node
         elif isinstance(node, ast.Break):
-            raise LuaBreak
+            return BREAK
         else:
             raise Exception(f"No visit_{type(node).__name__} method")
 
@@ -195,7 +215,8 @@ class Interpreter:
                 res = None
         else:
             res = None
-        raise LuaReturn("Lua返回值", res)
+        self.return_value = res
+        return RETURN
 
     def visit_LocalFunction(self, node: ast.LocalFunction):
         node.scope = self.scope
@@ -213,7 +234,7 @@ class Interpreter:
         node.scope = self.scope
         cls_name = node.source.id
         cls: LuaTable = self.scope.lookup(cls_name)
-        cls._data[node.name.id] = node
+        cls[node.name.id] = node
         node.args.insert(0, ast.Name("self"))
         # 返回值用于该函数对象被返回然后赋值给变量时
         return node
@@ -287,10 +308,12 @@ class Interpreter:
                         self.scope.define(param.id, args[idx])
                 else:
                     self.scope.define(param.id, None)
-            try:
-                self.visit(func_node.body)
-            except LuaReturn as e:
-                res = e.value
+            status = self.visit(func_node.body)
+            if status is RETURN:
+                res = self.return_value
+            elif status is BREAK:
+                # 函数中没有被循环接住的 break 仍然以异常的形式传给调用处
+                raise LuaBreak
             else:
                 res = None
         self.scope = self.scope_stack.pop()
@@ -352,23 +375,24 @@ class Interpreter:
 
     def visit_If(self, node: ast.If):
         if self._is_lua_true(self.visit(node.test)):
-            self.visit(node.body)
+            return self.visit(node.body)
         else:
             if node.orelse:
-                self.visit(node.orelse)
+                return self.visit(node.orelse)
 
     def visit_ElseIf(self, node: ast.ElseIf):
         if self._is_lua_true(self.visit(node.test)):
-            self.visit(node.body)
+            return self.visit(node.body)
         else:
             if node.orelse:
-                self.visit(node.orelse)
+                return self.visit(node.orelse)
 
     def visit_Chunk(self, node: ast.Chunk):
-        try:
-            self.visit(node.body)
-        except LuaReturn as e:
-            return e.value
+        status = self.visit(node.body)
+        if status is RETURN:
+            return self.return_value
+        if status is BREAK:
+            raise LuaBreak
 
     def _get_index_list(self, node: ast.Index):
         """解析一个Index结点，按调用顺序逆序返回标识符"""
@@ -524,18 +548,27 @@ class Interpreter:
                     else:
                         self.scope.variables.update({k_name: k})
                     try:
-                        self.visit(node.body)
+                        status = self.visit(node.body)
                     except LuaBreak:
+                        # 循环体中调用的函数里的 break
+                        break
+                    if status is BREAK:
                         break
+                    if status is RETURN:
+                        return status
         elif iter_fn_name == "ipairs":
             idx = 1
             while idx in iter_val:
                 v = iter_val[idx]
                 self.scope.variables.update({k_name: idx, v_name: v})
                 try:
-                    self.visit(node.body)
+                    status = self.visit(node.body)
                 except LuaBreak:
                     break
+                if status is BREAK:
+                    break
+                if status is RETURN:
+                    return status
                 idx += 1
 
     def visit_Fornum(self, node: ast.Fornum):
@@ -546,7 +579,10 @@ class Interpreter:
         step = self.visit(node.step)
         while stop >= var[id_]:
             with self.scope.create_child_scope():
-                self.visit(node.body)
+                status = self.visit(node.body)
+            if status is RETURN or status is BREAK:
+                # 数值 for 不处理 break，与 return 一样交给外层
+                return status
             var[id_] += step
 
     def visit_Block(self, node: ast.Block):
@@ -555,7 +591,9 @@ class Interpreter:
                 # 保存Chunk内的scope，方便打印调试
                 self.first_block_scope = self.scope
             for stmt in node.body:
-                self.visit(stmt)
+                status = self.visit(stmt)
+                if status is RETURN or status is BREAK:
+                    return status
 
     def visit_SemiColon(self, node):
         return
@@ -6,7 +6,7 @@ import time
 import re
 from typing import Optional
 
-from luaparser.ast import parse, walk, to_pretty_str
+from luaparser.ast import walk, to_pretty_str
 from luaparser.astnodes import (
     Table,
     Function,
@@ -15,8 +15,9 @@ from luaparser.astnodes import (
     AnonymousFunction,
 )
 
-from lua_types import LuaTable, DummyTable, Entity, LuaUnpack
+from lua_types import LuaTable, DummyTable, Entity, LuaUnpack, LuaFunction
 from constants import SCRIPTS_PATH
+from lua_ast import parse, parse_member
 
 # built-in
 lua_math = LuaTable()
@@ -35,7 +36,7 @@ def _math_clamp(num, min, max):
     return num <= min and min or (num >= max and max or num)
 
 
-lua_math._data = {
+lua_math.update({
     "pi": math.pi,
     "huge": math.inf,  # float("inf")相同
     "sqrt": math.sqrt,
@@ -51,7 +52,7 @@ lua_math._data = {
     "min": min,
     "atan2": math.atan2,
     "clamp": _math_clamp,
-}
+})
 
 lua_table = LuaTable()
 
@@ -63,29 +64,15 @@ def _table_insert(tbl, pos_or_val, val=None):
         pos = None
     else:
         pos = pos_or_val
-    idx = pos if pos is not None else 1
-    while True:
-        if idx not in tbl._data:
-            tbl._data[idx] = val
-            return
-        idx += 1
+    tbl.insert(val, pos)
 
 
 def _table_unpack(tbl: LuaTable, i=None, j=None):
     if tbl is None:
         return None
     i = i or 1
-    res = []
-    while True:
-        if i in tbl._data:
-            res.append(tbl._data[i])
-        else:
-            break
-        if j:
-            if i > j:
-                break
-        i += 1
-    return LuaUnpack(*res)
+    # 只取数组部分，到第一个 nil 为止
+    return LuaUnpack(*tbl._array[max(i, 1) - 1 : j])
 
 
 def _table_concat(tbl, sep="", i=0, j=None):
@@ -100,31 +87,23 @@ def _table_concat(tbl, sep="", i=0, j=None):
 
 
 def _table_contains(tbl: Optional[LuaTable], ele):
-    return ele in tbl._data.values()
+    return ele in tbl.values()
 
 
 def _table_remove(tbl: LuaTable, index=None):
-    max_idx = tbl.max_pos()
-    if index is None:
-        del tbl._data[max_idx]
-        return
-    if max_idx:
-        idx = index
-        while idx < max_idx:
-            tbl._data[idx] = tbl._data[idx + 1]
-            idx += 1
-    else:
+    if index is not None and not tbl.max_pos():
         # 表里没有数字索引
         raise Exception("no number idx in LuaTable while remove")
+    return tbl.remove(index)
 
 
-lua_table._data = {
+lua_table.update({
     "insert": _table_insert,
     "unpack": _table_unpack,
     "concat": _table_concat,
     "contains": _table_contains,
     "remove": _table_remove,
-}
+})
 
 LUA_MODULES = {}
 
@@ -147,8 +126,7 @@ def _require(interpreter, arg: str):
         path = scripts_path.joinpath(sub_path + ".lua")
         if not path.exists():
             raise Exception(f"require path {sub_path} not exists")
-        lua_code = path.read_text(errors="ignore")
-    tree = parse(lua_code)
+        tree = parse_member(zip_ref, path.at, errors="ignore")
     res = interpreter.visit(tree)
     LUA_MODULES[arg] = res
     return res
@@ -202,7 +180,7 @@ def _string_match(s, pattern):
     return None
 
 
-lua_string._data = {
+lua_string.update({
     "len": _string_len,
     "find": _string_find,
     "gsub": _string_gsub,
@@ -212,7 +190,7 @@ lua_string._data = {
     "format": str.format,
     "sub": _string_sub,
     "match": _string_match,
-}
+})
 
 
 def lua_type(obj):
@@ -224,7 +202,9 @@ def lua_type(obj):
         return "string"
     elif isinstance(obj, LuaTable):
         return "table"
-    elif isinstance(obj, (Function, LocalFunction, Method, AnonymousFunction)):
+    elif isinstance(
+        obj, (Function, LocalFunction, Method, AnonymousFunction, LuaFunction)
+    ):
         return "function"
     else:
         raise Exception(f"unknown type {obj}")
@@ -249,13 +229,8 @@ lua_assert.need_interp = True
 
 def _next(obj):
     if isinstance(obj, LuaTable):
-        iter_ = iter(obj._data)
-        try:
-            next_key = next(iter_)
-        except StopIteration:
-            return
-        else:
-            return obj._data[next_key]
+        for _, value in obj:
+            return value
     return
 
 
@@ -391,7 +366,7 @@ world_tiles = LuaTable()
 for node in walk(tree):
     if isinstance(node, Table):
         for field in node.fields:
-            world_tiles._data[field.key.id] = field.value.n
+            world_tiles[field.key.id] = field.value.n
 
 SCANNED_PREFABS = {}
 
@@ -489,7 +464,7 @@ def _the_world_push_event(self, *args, **kwds):
 
 _the_world = LuaTable()
 _the_world_state = LuaTable()
-_the_world_state._data = {
+_the_world_state.update({
     # worldstate.lua
     "season": "autumn",
     "isautumn": True,
@@ -521,23 +496,23 @@ _the_world_state._data = {
     "wetness": 0,
     "phase": "day",
     "lunarhaillevel": 0,
-}
-_the_world._data = {
+})
+_the_world.update({
     "ismastersim": False,
     "state": _the_world_state,
     "HasTag": lambda x, y: True,
     "components": DummyTable(),
     "PushEvent": _the_world_push_event,
-}
+})
 
 _the_sim = LuaTable()
-_the_sim._data = {
+_the_sim.update({
     "GetTickTime": lambda x: 0.03333,
     "AtlasContains": lambda x, y, z: True,
-}
+})
 
 _the_net = LuaTable()
-_the_net._data = {
+_the_net.update({
     "IsDedicated": lambda x: True,
     "GetIsClient": lambda x: False,
     "GetServerGameMode": lambda x: dict(
@@ -554,12 +529,12 @@ _the_net._data = {
         reset_time=True,
         invalid_recipes={},
     ),
-}
+})
 
 _loc = LuaTable()
-_loc._data = {
+_loc.update({
     "GetTextScale": lambda: 1,
-}
+})
 
 
 def _event_server_data(*args, **kwds):
@@ -571,9 +546,9 @@ def _spawn_prefab(name):
 
 
 _the_camera = DummyTable()
-_the_camera._data = {
+_the_camera.update({
     "GetDownVec": lambda x: Vector3(0, 0, 0),
-}
+})
 
 G = {
     # built-ins
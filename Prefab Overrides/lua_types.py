@@ -1,4 +1,6 @@
-from typing import Any, Dict, Iterable, Iterator, Tuple
+from typing import Any, Iterator, Tuple
+
+import lua_table
 
 
 def is_hashable(value):
@@ -10,9 +12,11 @@ def is_hashable(value):
 
 
 # Lua -> Python的数据结构
-class LuaTable:
+class LuaTable(lua_table.LuaTable):
     """A light-weight emulation of Lua's table semantics.
 
+    - Array part and hash part are kept apart (see lua_table.py), so # and
+      appending with table.insert are O(1).
     - Keys may be ints/strings/tuples/etc. Missing keys return None.
     - Assigning None deletes the key (Lua: setting to nil removes it).
     - insert(value, pos) shifts numeric keys >= pos upwards.
@@ -20,76 +24,17 @@ class LuaTable:
     """
 
     def __init__(self, *args) -> None:
-        self._data: Dict[Any, Any] = {}
+        super().__init__()
         for arg in args:
             self.insert(arg)
 
-    def insert(self, value, pos: int | None = None):
-        """Insert value into array part.
-
-        If pos is None, append at the first free positive integer index.
-        If pos is provided and occupied, shift integer keys >= pos upward.
-        """
-        if pos is None:
-            pos = 1
-            while pos in self._data:
-                pos += 1
-        else:
-            # shift numeric keys >= pos up by 1 (descending order)
-            numeric_keys = [
-                k for k in self._data.keys() if isinstance(k, int) and k >= pos
-            ]
-            for k in sorted(numeric_keys, reverse=True):
-                self._data[k + 1] = self._data[k]
-                # delete old key after moving to avoid duplicates
-                del self._data[k]
-        self._data[pos] = value
-
-    def max_pos(self) -> int:
-        """Return the maximum contiguous positive integer index from 1."""
-        pos = 1
-        while pos in self._data:
-            pos += 1
-        return pos - 1
-
-    def __getitem__(self, index):
-        """支持索引访问；不可哈希索引返回 None（Lua 的 nil）。"""
-        try:
-            return self._data.get(index, None)
-        except TypeError:
-            return None
-
-    def __setitem__(self, index, value):
-        """支持索引赋值；将 None 视为删除该键（Lua 的赋 nil）。"""
-        if value is None:
-            # delete if exists
-            try:
-                del self._data[index]
-            except Exception:
-                pass
-        else:
-            self._data[index] = value
-
-    def keys(self) -> Iterable[Any]:
-        return list(self._data.keys())
-
-    def values(self) -> Iterable[Any]:
-        return list(self._data.values())
-
-    def items(self) -> Iterable[Tuple[Any, Any]]:
-        return list(self._data.items())
-
-    def to_dict(self) -> Dict[Any, Any]:
-        """Shallow copy to a plain dict."""
-        return dict(self._data)
-
     def __repr__(self) -> str:
-        return f"LuaTable({self._data!r})"
+        return f"LuaTable({self.to_dict()!r})"
 
     def __str__(self) -> str:
         # Safe shallow repr to avoid infinite recursion.
         parts = []
-        for k, v in self._data.items():
+        for k, v in self.pairs():
             # avoid calling __str__ on nested LuaTable to prevent recursion
             if isinstance(k, LuaTable):
                 k_s = f"<LuaTable id={id(k)}>"
@@ -102,26 +47,39 @@ class LuaTable:
             parts.append(f"{k_s}:{v_s}")
         return "{" + ", ".join(parts) + "}"
 
-    def __contains__(self, item):
-        return item in self._data
-
-    def __len__(self):
-        return len(self._data)
-
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         # Return the value under "_ctor" if present.
-        return self._data.get("_ctor", None)
+        return self["_ctor"]
 
     def __iter__(self) -> Iterator[Tuple[Any, Any]]:
         # yield (k, v) pairs to match Interpreter.pairs behavior
-        for k, v in self._data.items():
-            yield k, v
+        return self.pairs()
 
 
 class LuaVarArgs(list):
     pass
 
 
+class LuaFunction:
+    """compiler.py 编译后端中的 Lua 函数值：编译好的函数体和定义时的帧"""
+
+    __slots__ = ("code", "frame")
+    # 与 DummyTable、_dummy_fn 等一样通过 getattr 判断调用方式
+    ignore_args = False
+    need_interp = False
+
+    def __init__(self, code, frame) -> None:
+        self.code = code
+        self.frame = frame
+
+    def __deepcopy__(self, memo):
+        # 函数不复制，deepcopy 含函数的表时共用同一个函数
+        return self
+
+    def __repr__(self) -> str:
+        return f"LuaFunction({self.code.name})"
+
+
 class LuaUnpack:
     def __init__(self, *args, **kwds) -> None:
         self.args = args
@@ -142,7 +100,7 @@ class DummyTable(LuaTable):
             res = DummyTable()
             # store dummy only for hashable keys
             try:
-                self._data[index] = res
+                self[index] = res
             except TypeError:
                 # unhashable key: just return dummy without storing
                 pass
@@ -2,16 +2,37 @@ import os
 import importlib
 import json
 import sys
+import argparse
 
 from scan_prefabs import get_prefab_name_override, SCANNED_PREFABS
+from constants import SCRIPTS_PATH, VERSION_PATH
 
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-Client = importlib.import_module("main").site
+from scripts_zip import ScriptsTracker
 
 
 if __name__ == "__main__":
-    get_prefab_name_override()
+    # 并行扫描用进程池，spawn 方式的工作进程会以 __mp_main__ 重新导入此脚本，
+    # main.py 在此导入，避免每个工作进程都重新登录维基
+    Client = importlib.import_module("main").site
+
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--force", action="store_true", help="忽略变更检测，重新扫描")
+    args = arg_parser.parse_args()
+
+    # prefab 会 require 任意模块，只要有 Lua 文件变化就重新扫描
+    tracker = ScriptsTracker(
+        "prefab_overrides",
+        SCRIPTS_PATH,
+        lambda name: name.endswith(".lua"),
+        VERSION_PATH,
+        force=args.force,
+    )
+    if not tracker.report():
+        sys.exit(0)
+
+    get_prefab_name_override(workers=os.cpu_count())
     overrides = {}
     for name, inst in sorted(SCANNED_PREFABS.items(), key=lambda x: x[0]):
         override = getattr(inst, "prefab_name_override", False)
@@ -35,3 +56,4 @@ if __name__ == "__main__":
         elif wait_for_end is True:
             new_content += line + "\n"
     Client.pages["模块:ItemTable/PrefabOverrides"].save(new_content)
+    tracker.commit()
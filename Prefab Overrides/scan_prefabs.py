@@ -1,28 +1,36 @@
 import zipfile
 import json
 import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import redirect_stdout
 
-from luaparser import ast
-
 from constants import SCRIPTS_PATH, CHARACTERS
+from lua_ast import parse_member
 from lua_globals import G, LUA_MODULES, SCANNED_PREFABS
+from lua_types import LuaTable
 from interpreter import (
     Scope,
     Interpreter,
     PrefabInterpreter,
     ConstantsInterpreter,
 )
+from compiler import COMPILED_INTERPRETERS
+
+# 为 True 时用 compiler.py 把语法树编译为闭包执行，否则用 interpreter.py 逐个结点解释执行
+COMPILE = True
+
+
+def get_interpreter(Interp):
+    return COMPILED_INTERPRETERS[Interp] if COMPILE else Interp
 
 
 def interpret_file(path, Interp=Interpreter, scopes=None):
-    with zipfile.ZipFile(SCRIPTS_PATH) as zip_ref:
-        p = zipfile.Path(zip_ref, f"scripts/{path}.lua")
-        lua_code = p.read_text()
     with open(os.devnull, "w") as f:
         with redirect_stdout(f):
-            tree = ast.parse(lua_code)
-            i = Interp()
+            with zipfile.ZipFile(SCRIPTS_PATH) as zip_ref:
+                tree = parse_member(zip_ref, f"scripts/{path}.lua")
+            i = get_interpreter(Interp)()
             i.scope.variables.update(G)
             if scopes:
                 for scope in scopes:
@@ -32,18 +40,69 @@ def interpret_file(path, Interp=Interpreter, scopes=None):
     return i
 
 
+# 并行扫描时实体对象无法跨进程传递，工作进程只带回 prefab_name_override
+ScannedPrefab = namedtuple("ScannedPrefab", ["prefab_name_override"])
+
+# 工作进程中预处理好的基础模块状态和打开的压缩包
+_worker_state = None
+_worker_zip = None
+
+
+class BaseState:
+    """
+    基础模块预处理后的全局变量、已加载的模块和其中所有表的内容
+    每个文件用新的解释器扫描，扫描完后把这些表原地恢复、把 LUA_MODULES 恢复为只有基础模块，
+    文件对 TUNING 等共用表的修改和 require 加载的模块都不会影响之后扫描的文件，
+    结果与扫描顺序、文件被分到哪个进程无关
+    """
+
+    def __init__(self, scope):
+        self.variables = dict(scope.variables)
+        self.modules = dict(LUA_MODULES)
+        # id -> (表, 数组部分, 哈希部分)
+        self.tables = {}
+        stack = [*self.variables.values(), *self.modules.values()]
+        while stack:
+            value = stack.pop()
+            if not isinstance(value, LuaTable) or id(value) in self.tables:
+                continue
+            self.tables[id(value)] = (value, tuple(value._array), dict(value._hash))
+            stack.extend(value._array)
+            stack.extend(value._hash.keys())
+            stack.extend(value._hash.values())
+
+    def restore(self):
+        for table, array, hash_part in self.tables.values():
+            table._array = list(array) if array else array
+            table._hash = dict(hash_part)
+        LUA_MODULES.clear()
+        LUA_MODULES.update(self.modules)
+
+
+def scan_prefab_file(zip_ref, name, state):
+    """
+    用新的解释器扫描单个 prefab 文件，扫描到的 prefab 记入 SCANNED_PREFABS，之后恢复基础模块的状态
+    """
+    i = get_interpreter(PrefabInterpreter)()
+    i.scope.variables.update(state.variables)
+    try:
+        with open(os.devnull, "w") as f:
+            with redirect_stdout(f):
+                tree = parse_member(zip_ref, name)
+                i.visit(tree)
+    finally:
+        state.restore()
+
+
 def scan_prefabs_in_zip(zip_path, should_ignore=None, scope=None):
     """
     扫描压缩包内 scripts/prefabs/ 下所有 Lua 文件，解析并执行 PrefabInterpreter。
     支持忽略列表和前缀过滤。
+    每个文件都在基础模块预处理后的状态上扫描，与并行扫描的结果相同
     """
-    import zipfile
-    from luaparser import ast
-
-    i = PrefabInterpreter()
     if scope is None:
         scope = Scope()
-    i.scope.variables.update(scope.variables)
+    state = BaseState(scope)
 
     failed = []
 
@@ -55,21 +114,75 @@ def scan_prefabs_in_zip(zip_path, should_ignore=None, scope=None):
                 continue
             print(f"visiting {path.name}")
             try:
-                lua_code = path.read_text()
-                with open(os.devnull, "w") as f:
-                    with redirect_stdout(f):
-                        tree = ast.parse(lua_code)
-                        i.visit(tree)
+                scan_prefab_file(zip_ref, path.at, state)
             except Exception as e:
                 print(f"Failed to parse {path.name}: {e}")
                 failed.append((path.name, e))
-    
+
+    _report_failed(failed)
+
+
+def _report_failed(failed):
     if failed:
         print(f"\n--- Failed to parse ({len(failed)}) ---")
         for name, err in failed:
             print(f"  {name}: {err}")
-            
-    return i
+
+
+def _init_worker(zip_path):
+    global _worker_state, _worker_zip
+    _worker_state = BaseState(preload_base_scope())
+    _worker_zip = zipfile.ZipFile(zip_path)
+
+
+def _scan_prefab_file(name):
+    """
+    在工作进程中扫描单个 prefab 文件。
+    返回 ([(prefab 名, prefab_name_override)], 错误信息或 None)
+    """
+    SCANNED_PREFABS.clear()
+    error = None
+    try:
+        scan_prefab_file(_worker_zip, name, _worker_state)
+    except Exception as e:
+        error = str(e)
+    scanned = [
+        (prefab, getattr(inst, "prefab_name_override", False))
+        for prefab, inst in SCANNED_PREFABS.items()
+    ]
+    return scanned, error
+
+
+def scan_prefabs_in_zip_parallel(zip_path, should_ignore=None, workers=None):
+    """
+    用进程池并行扫描压缩包内 scripts/prefabs/ 下所有 Lua 文件。
+    每个工作进程启动时各自预处理基础模块，结果按文件顺序合并到 SCANNED_PREFABS，
+    同名 prefab 以后扫描到的为准，与顺序扫描一致。
+    """
+    names = []
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        for path in zipfile.Path(zip_ref, "scripts/prefabs/").iterdir():
+            if should_ignore and should_ignore(path.name):
+                print(f"skipping {path.name}")
+                continue
+            names.append(path.at)
+
+    failed = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(zip_path,)
+    ) as executor:
+        for name, (scanned, error) in zip(
+            names, executor.map(_scan_prefab_file, names)
+        ):
+            name = name.rsplit("/", maxsplit=1)[-1]
+            print(f"visiting {name}")
+            for prefab, override in scanned:
+                SCANNED_PREFABS[prefab] = ScannedPrefab(override)
+            if error is not None:
+                print(f"Failed to parse {name}: {error}")
+                failed.append((name, error))
+
+    _report_failed(failed)
 
 
 def dump_prefab_overrides():
@@ -84,9 +197,9 @@ def dump_prefab_overrides():
     print(f"Dumped prefab overrides to {output_path}")
 
 
-def get_prefab_name_override():
+def preload_base_scope():
     """
-    预处理基础模块后，扫描所有 prefabs 并保存 prefab_name_override。
+    预处理基础模块，返回包含其全局变量的作用域。
     """
     scope = Scope()
     # 预处理基础模块
@@ -101,6 +214,14 @@ def get_prefab_name_override():
     ]:
         i = interpret_file(mod, interp_cls, scopes=(scope,))
         scope.variables.update(i.scope.variables)
+    return scope
+
+
+def get_prefab_name_override(workers=1):
+    """
+    预处理基础模块后，扫描所有 prefabs 并保存 prefab_name_override。
+    workers: 大于 1 时用多个进程并行扫描
+    """
     # 解析所有 prefabs
     IGNORE_PREFABS = {
         "skinprefabs",
@@ -137,8 +258,15 @@ def get_prefab_name_override():
             or (name.startswith("lava") and not name.startswith("lavae"))
         )
 
-    scan_prefabs_in_zip(
-        SCRIPTS_PATH,
-        should_ignore=skip_prefab,
-        scope=scope,
-    )
+    if workers > 1:
+        scan_prefabs_in_zip_parallel(
+            SCRIPTS_PATH,
+            should_ignore=skip_prefab,
+            workers=workers,
+        )
+    else:
+        scan_prefabs_in_zip(
+            SCRIPTS_PATH,
+            should_ignore=skip_prefab,
+            scope=preload_base_scope(),
+        )
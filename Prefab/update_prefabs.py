@@ -4,8 +4,9 @@ from main import *
 
 path = dst_path / "data/unsafedata/DST_Prefab.json"
 df = pd.read_json(path).sort_index(axis=1)
+pages = {}
 for column in tqdm(df.columns):
     pagedata = df[column].dropna()
     pagedata.loc["prefab"] = column
-    pagedata = pagedata.sort_index().to_json()
-    site.pages[f"Data:DST Prefab/{column}.json"].save(pagedata)
+    pages[f"Data:DST Prefab/{column}.json"] = pagedata.sort_index().to_json()
+save_pages(pages)
@@ -1,7 +1,3 @@
-class ReturnValue(Exception):
-    pass
-
-
 class IdentifierNotFound(Exception):
     pass
 
@@ -13,16 +13,15 @@ class ModuleWrapper:
 class LuaTableModule:
 
     @staticmethod
-    def insert(tbl: LuaTable, val, index=None):
+    def insert(tbl: LuaTable, pos_or_val, val=None):
         assert isinstance(
             tbl, LuaTable
         ), "table.insert only call on a Luatable"
-        idx = index or 1
-        while True:
-            if idx not in tbl:
-                tbl[idx] = val
-                return
-            idx = idx + 1
+        # table.insert(t, v) 或 table.insert(t, pos, v)
+        if val is None:
+            tbl.insert(pos_or_val)
+        else:
+            tbl.insert(val, pos_or_val)
 
     # def _table_unpack(tbl: LuaTable, i=None, j=None):
     #     if tbl is None:
@@ -2,6 +2,7 @@ import zipfile
 from typing import Optional, Dict, Any
 
 import constants
+from po_catalog import load_catalog
 
 
 def scan_chn_po(include_strings: bool = False) -> Dict[str, Dict[str, str]]:
@@ -13,79 +14,24 @@ def scan_chn_po(include_strings: bool = False) -> Dict[str, Dict[str, str]]:
     po_list = ["strings.pot", "chinese_s.po"]
     if not include_strings:
         po_list = ["chinese_s.po"]
-    # 一次打开 zip，依次读取所需文件，减少重复打开
+    # 一次打开 zip，依次读取所需文件；解析结果由 po_catalog 按文件 CRC 缓存
     zip_path = constants.SCRIPTS_PATH
     with zipfile.ZipFile(str(zip_path)) as zip_ref:
         for po_name in po_list:
-            _scan_po(zip_ref, po_name, res)
-    return res
-
-
-def _unquote(s: str) -> str:
-    s = s.strip()
-    if s.startswith('"') and s.endswith('"'):
-        return s[1:-1]
-    return s
-
-
-def _scan_po(
-    zip_ref: zipfile.ZipFile, po_name: str, res: Dict[str, Dict[str, str]]
-) -> None:
-    """
-    扫描单个 po 文件，支持 msgctxt/msgid/msgstr 的多行续行。
-    将每个完整条目以 msgctxt 为键写入 res。
-    """
-    entry = {"msgctxt": None, "msgid": None, "msgstr": None}
-    current = None  # 当前正在累积的字段名
-    try:
-        with zip_ref.open(f"scripts/languages/{po_name}") as po:
-            for raw in po:
-                try:
-                    line = raw.decode("utf-8").rstrip("\n")
-                except Exception:
-                    continue
-                stripped = line.strip()
-                if not stripped or stripped.startswith("#"):
-                    continue
-                if stripped.startswith("msgctxt"):
-                    # 新条目开始
-                    entry = {"msgctxt": None, "msgid": None, "msgstr": None}
-                    value = stripped[len("msgctxt") :].strip()
-                    entry["msgctxt"] = _unquote(value)
-                    current = "msgctxt"
-                elif stripped.startswith("msgid"):
-                    value = stripped[len("msgid") :].strip()
-                    entry["msgid"] = _unquote(value)
-                    current = "msgid"
-                elif stripped.startswith("msgstr"):
-                    value = stripped[len("msgstr") :].strip()
-                    entry["msgstr"] = _unquote(value)
-                    # 完成一条记录（po 的 msgstr 一般表示该条目的结束）
-                    if (
-                        entry["msgctxt"] is not None
-                        and entry["msgid"] is not None
-                    ):
-                        res[entry["msgctxt"]] = {
-                            "msgctxt": entry["msgctxt"],
-                            "msgid": entry["msgid"],
-                            "msgstr": entry["msgstr"] or "",
-                        }
-                    entry = {"msgctxt": None, "msgid": None, "msgstr": None}
-                    current = None
-                elif stripped.startswith('"') and current:
-                    # 续行，追加到当前字段
-                    cont = _unquote(stripped)
-                    if entry[current] is None:
-                        entry[current] = cont
-                    else:
-                        entry[current] += cont
-                else:
-                    # 忽略其它行
+            try:
+                catalog = load_catalog(zip_ref, f"scripts/languages/{po_name}")
+            except KeyError:
+                print(f"zip 中未找到文件: scripts/languages/{po_name}")
+                continue
+            for entry in catalog:
+                if entry.msgid is None:
                     continue
-    except KeyError:
-        print(f"zip 中未找到文件: scripts/languages/{po_name}")
-    except Exception as e:
-        print(f"解析 {po_name} 时出错: {e}")
+                res[entry.msgctxt] = {
+                    "msgctxt": entry.msgctxt,
+                    "msgid": entry.msgid,
+                    "msgstr": entry.msgstr or "",
+                }
+    return res
 
 
 def _add_into_map(
@@ -9,9 +9,10 @@ from typing import Dict
 import os
 from contextlib import redirect_stdout
 
-from luaparser import astnodes, ast
+from luaparser import astnodes
 
 import constants
+from lua_ast import parse_member
 from lua_core.lua_types import LuaTable
 from parser import LuaParser
 from exceptions import MissionComplete
@@ -155,15 +156,13 @@ def scan_recipes() -> Dict[str, Dict]:
 
     try:
         with zipfile.ZipFile(constants.SCRIPTS_PATH) as zip_ref:
-            with zip_ref.open("scripts/recipes.lua") as fp:
-                content = fp.read().decode("utf-8")
-                with open(os.devnull, "w") as f:
-                    with redirect_stdout(f):
-                        chunk = ast.parse(content)
-                try:
-                    parser.visit(chunk)
-                except MissionComplete:
-                    pass
+            with open(os.devnull, "w") as f:
+                with redirect_stdout(f):
+                    chunk = parse_member(zip_ref, "scripts/recipes.lua")
+            try:
+                parser.visit(chunk)
+            except MissionComplete:
+                pass
 
         print(f"成功解析 {len(parser.recipes)} 个配方")
         return parser.recipes
@@ -1,14 +1,20 @@
 import os
 import sys
 import json
+import argparse
 import importlib
 
 from recipes_parser import scan_recipes
 from read_po import scan_chn_po
 from tabx import DSTRecipes
+import constants
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 Client = importlib.import_module("main").site
+from scripts_zip import ScriptsTracker
+
+# 配方只来自 recipes.lua，描述来自中文 po
+SOURCE_MEMBERS = ["scripts/recipes.lua", "scripts/languages/chinese_s.po"]
 
 
 def get_previous_tabx():
@@ -49,6 +55,14 @@ def pop_tabx_from_scripts() -> dict:
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--force", action="store_true", help="忽略变更检测，重新处理")
+    args = arg_parser.parse_args()
+
+    tracker = ScriptsTracker("recipes", constants.SCRIPTS_PATH, SOURCE_MEMBERS, constants.VERSION_PATH, force=args.force)
+    if not tracker.report():
+        sys.exit(0)
+
     new = pop_tabx_from_scripts()
     old = get_previous_tabx()
     old_data = old["data"]
@@ -60,3 +74,4 @@ if __name__ == "__main__":
     if i == "y":
         datas = json.dumps(new, indent=2, ensure_ascii=False)
         Client.pages["Data:DSTRecipes.tabx"].edit(datas)
+        tracker.commit()
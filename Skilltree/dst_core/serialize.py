@@ -2,9 +2,19 @@ from json.encoder import JSONEncoder
 
 from luaparser import astnodes
 
+from tools.dummy import DummyTable
+from tools.strings import StringsResolver
+
 
 class SkillTreeEncoder(JSONEncoder):
+    # resolver: 用于查询STRINGS翻译的StringsResolver, 多次导出时传入同一个以复用已读取的po
+    def __init__(self, *args, resolver=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolver = resolver or StringsResolver()
+
     def default(self, o):
+        if isinstance(o, DummyTable):
+            return o.to_json(self.resolver)
         if (not isinstance(o, astnodes.Node)) and hasattr(o, "to_json"):
             # print("to json for", o)
             return o.to_json()
@@ -1,62 +1,51 @@
+import os
+import sys
+
+# 根目录的 lua_table.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import lua_table
+
+
 # 继承dict会导致json序列化时无法调用to_json方法，因此需要自定义LuaTable类
-class LuaTable:
+# 数组部分和哈希部分分开保存，见根目录的 lua_table.py
+class LuaTable(lua_table.LuaTable):
 
     def __init__(self, *args, **kwargs):
-        self.table = dict()
-        self.table.update(dict(*args, **kwargs))
-
-    def __getitem__(self, key):
-        # 未定义的key返回None
-        # 其余同dict的行为
-        return self.table.get(key, None)
+        super().__init__()
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
 
     def __setitem__(self, key, value):
-        self.table[key] = value
+        if value is None:
+            # 与 dict 一样保留值为 None 的键，序列化时输出 null
+            super().__setitem__(key, None)
+            self._hash[key] = None
+        else:
+            super().__setitem__(key, value)
 
     def __delitem__(self, key):
-        del self.table[key]
-
-    def __len__(self):
-        return len(self.table)
+        if key not in self:
+            raise KeyError(key)
+        super().__setitem__(key, None)
 
     def __iter__(self):
-        return iter(self.table)
+        return iter(self.keys())
 
     def __repr__(self):
-        return repr(self.table)
+        return repr(self.to_dict())
 
     def __str__(self):
-        return str(self.table)
+        return str(self.to_dict())
 
     # 访问属性时如果属性不存在则访问__getitem__
     def __getattr__(self, key):
-        return self.table.get(key, None)
+        if key in ("_array", "_hash"):
+            # 初始化之前（例如 copy 时）
+            raise AttributeError(key)
+        return self[key]
 
     def __setattr__(self, key, value):
-        if key in ("table",):
+        if key in ("_array", "_hash"):
             super().__setattr__(key, value)
         else:
-            self.table[key] = value
-
-    def __contains__(self, key):
-        return key in self.table
-
-    def keys(self):
-        return self.table.keys()
-
-    def values(self):
-        return self.table.values()
-
-    def items(self):
-        return self.table.items()
-
-    def to_json(self):
-        # 如果表中键是数字序列，则转换为数组
-        # print(f"check to json for table {self}")
-        if all(isinstance(k, int) for k in self.keys()):
-            # print("regard table as array")
-            res = [self[k] for k in sorted(self.keys())]
-            # print(res)
-            return res
-        # print("regard table as dict")
-        return self.table
+            self[key] = value
@@ -20,9 +20,12 @@ from operator import (
 
 from luaparser import astnodes
 
-from exceptions import ReturnValue, IdentifierNotFound
+from exceptions import IdentifierNotFound
 from lua_core import LuaTable
 
+# visit_Return 的返回值，表示所在的块到此结束，返回值保存在 LuaParser.return_value 中
+RETURN = object()
+
 
 logger = logging.getLogger(__name__)
 
@@ -135,7 +138,9 @@ class LuaParser:
     def visit_Block(self, node: astnodes.Block):
         with Scope(self, self.scope):
             for stmt in node.body:
-                self.visit(stmt)
+                if self.visit(stmt) is RETURN:
+                    # return 只结束它所在的块，外层的块继续执行
+                    break
 
     def visit_LocalAssign(self, node: astnodes.LocalAssign):
         # 未考虑左值和右值中"..."的情况
@@ -348,7 +353,11 @@ class LuaParser:
 
     def visit_Invoke(self, node: astnodes.Invoke):
         source = self.visit(node.source)
-        func = getattr(source, node.func.id)
+        if isinstance(source, LuaTable):
+            # 表的方法是表中的字段，不能用 getattr：insert、remove 等同名的 LuaTable 方法会遮住字段
+            func = source[node.func.id]
+        else:
+            func = getattr(source, node.func.id)
         args = tuple(map(self.visit, node.args))
         return func(source, *args)
 
@@ -410,7 +419,7 @@ class LuaParser:
             self.return_value = self.visit(node.values[0])
         else:
             self.return_value = tuple(self.visit(v) for v in node.values)
-        raise ReturnValue
+        return RETURN
 
     def visit_Nil(self, node: astnodes.Nil):
         return None
@@ -461,8 +470,6 @@ class Scope(dict):
             self.parser.scope = self.parent
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug("Exit scope: %r (exc_type=%r)", self, exc_type)
-        if exc_type == ReturnValue:
-            return True
         return False
 
     def get_value(self, name: str):
@@ -1,11 +1,10 @@
-from luaparser import ast
-
 import json
 import zipfile
 import os
 import logging
 import importlib
 import sys
+import argparse
 from contextlib import redirect_stdout
 
 from parser import LuaParser, Scope
@@ -15,10 +14,16 @@ from dst_core import (
     SKILL_TREE_FNS,
     SkillTreeEncoder,
 )
+from tools.strings import StringsResolver
 import constants
+from lua_ast import parse_member
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 client = importlib.import_module("main").site
+from scripts_zip import ScriptsTracker
+
+SKILLTREE_PREFIX = "scripts/prefabs/skilltree_w"
+PO_MEMBER = "scripts/languages/chinese_s.po"
 
 # 配置日志为INFO级别
 logging.basicConfig(level=logging.INFO)
@@ -43,22 +48,57 @@ def get_img_url(filename):
     return page["imageinfo"][0]["url"]
 
 
-def main():
+def skilltree_json_path(filename):
+    """技能树文件对应的输出文件"""
+    character = filename.split("_")[-1].split(".")[0]
+    return os.path.join(
+        constants.SKILLTREE_OUTPUT_DIR,
+        f"skilltree_{character}.json",
+    )
+
+
+def main(force=False):
+    tracker = ScriptsTracker(
+        "skilltree",
+        constants.SCRIPTS_PATH,
+        lambda name: name.startswith(SKILLTREE_PREFIX) or name == PO_MEMBER,
+        constants.VERSION_PATH,
+        force=force,
+    )
+    changed = set(tracker.report())
+    # 文本变化时所有角色都要重新生成，否则只处理技能树文件有变化的角色
+    if PO_MEMBER in changed:
+        changed = set(tracker.crcs)
+    # 输出文件不存在的角色（例如输出文件被删除）即使文件没有变化也要重新生成
+    missing = {
+        filename
+        for filename in tracker.crcs
+        if filename.startswith(SKILLTREE_PREFIX)
+        and not os.path.exists(skilltree_json_path(filename))
+    }
+    if missing - changed:
+        logger.info(
+            "Output missing for %d character(s), regenerating",
+            len(missing - changed),
+        )
+    changed |= missing
+    if not changed:
+        return
+
     img_url_mapping = {}
+    resolver = StringsResolver()
     with zipfile.ZipFile(constants.SCRIPTS_PATH) as zip_ref:
         for file_info in zip_ref.infolist():
             # 检查文件是否在目标目录中
             filename = file_info.filename
-            if filename.startswith("scripts/prefabs/skilltree_w"):
+            if filename.startswith(SKILLTREE_PREFIX) and filename in changed:
                 character = filename.split("_")[-1].split(".")[0]
                 logger.info(
                     "Processing skilltree for character: %s", character
                 )
-                with zip_ref.open(filename) as f_read:
-                    content = f_read.read().decode("utf-8")
-                    with open(os.devnull, "w") as f_write:
-                        with redirect_stdout(f_write):
-                            chunk = ast.parse(content)
+                with open(os.devnull, "w") as f_write:
+                    with redirect_stdout(f_write):
+                        chunk = parse_member(zip_ref, filename)
                 parser = LuaParser(builtins=LUA_BUILTINS)
                 parser.scope.top_scope.update(DST_GLOBALS)
                 parser.scope.top_scope.update(SkillTreeFns=SKILL_TREE_FNS)
@@ -67,10 +107,7 @@ def main():
                 with Scope(parser, fn.scope, enclosure=True):
                     parser.visit(fn.body)
                     res = parser.return_value
-                skilltree_json_path = os.path.join(
-                    constants.SKILLTREE_OUTPUT_DIR,
-                    f"skilltree_{character}.json",
-                )
+                json_path = skilltree_json_path(filename)
                 if not os.path.exists(constants.SKILLTREE_OUTPUT_DIR):
                     os.makedirs(constants.SKILLTREE_OUTPUT_DIR)
                 skilltree_def = res["SKILLS"]
@@ -86,20 +123,25 @@ def main():
                         else:
                             img_url = img_url_mapping[icon_name]
                         skill_def["icon_url"] = img_url
-                with open(skilltree_json_path, "w") as f:
+                with open(json_path, "w") as f:
                     json.dump(
                         skilltree_def,
                         f,
                         cls=SkillTreeEncoder,
+                        resolver=resolver,
                         indent=4,
                         ensure_ascii=False,
                     )
                 logger.info(
                     "skilltree for character: %s saved to %s",
                     character,
-                    skilltree_json_path,
+                    json_path,
                 )
+    tracker.commit()
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--force", action="store_true", help="忽略变更检测，处理所有角色")
+    args = arg_parser.parse_args()
+    main(force=args.force)
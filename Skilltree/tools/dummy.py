@@ -36,10 +36,12 @@ class DummyTable:
     def __repr__(self):
         return self.__str__()
 
-    def to_json(self):
+    def to_json(self, resolver=None):
         s = str(self)
         if s.startswith("STRINGS."):
-            from read_po import scan_chn_po
+            if resolver is None:
+                from .strings import StringsResolver
 
-            return scan_chn_po()[s]["msgstr"]
+                resolver = StringsResolver()
+            return resolver.resolve(s)
         return self.__str__()
@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+
+class StringsResolver:
+    # 查询STRINGS.*的中文翻译, po文件在第一次查询时读取, 之后的查询都走缓存
+    def __init__(self, loader=None):
+        self._loader = loader
+        self._po = None
+        self.resolve = lru_cache(maxsize=4096)(self._resolve)
+
+    def _resolve(self, msgctxt):
+        if self._po is None:
+            if self._loader is None:
+                from read_po import scan_chn_po
+
+                self._loader = scan_chn_po
+            self._po = self._loader()
+        return self._po[msgctxt]["msgstr"]
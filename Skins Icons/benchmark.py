@@ -0,0 +1,193 @@
+"""
+动画文件解析的性能测试
+python benchmark.py bank [--anim-dir <饥荒联机版>/data/anim] [--top 5]
+python benchmark.py build [--anim-dir <饥荒联机版>/data/anim] [--top 5]
+python benchmark.py tex [--tex-dir <饥荒联机版>/data/anim/dynamic] [--top 20]
+python benchmark.py atlas [--counts 50 200 800]
+不指定目录时只测试按比例生成的合成数据，解析速度（MB/s）不随文件大小下降说明解析是线性时间
+"""
+
+import os, time, struct, argparse, subprocess
+import numpy as np
+from PIL import Image
+from zipfile import ZipFile
+from tempfile import TemporaryDirectory
+
+from ds_file.anim_bank import AnimBank
+from ds_file.anim_build import AnimBuild
+from ds_file.anim_util import strhash
+from ds_file.dyn_decrypt import open_dyn
+from ktech.ktex import KTEX
+from klei import atlas_image
+from ktech.texture_converter import KTECH
+
+def timeit(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def report(name, size, elapsed):
+    print(f"{name:<40} {size / 1024:>10.1f} KB {elapsed * 1000:>10.2f} ms {size / 1024 / 1024 / elapsed:>8.2f} MB/s")
+
+def synth_bank(anim_num, frame_num=30, element_num=12):
+    # 直接按 anim.bin 格式生成合成数据
+    hash_dict = {}
+    content = bytearray()
+    for idx in range(anim_num):
+        name = f"anim{idx}".encode("ascii")
+        content += struct.pack(f"<i{len(name)}sBIfI", len(name), name, 8, strhash("bank", hash_dict), 30.0, frame_num)
+        for frame in range(frame_num):
+            content += struct.pack("<ffffII", 0, 0, 100, 100, 0, element_num)
+            for z in range(element_num):
+                content += struct.pack("<III7f", strhash(f"symbol{z % 7}", hash_dict), z, strhash(f"layer{z % 5}", hash_dict), 1, 0, 0, 1, z, -z, 0)
+    content += struct.pack("<I", len(hash_dict))
+    for hash, name in hash_dict.items():
+        content += struct.pack(f"<Ii{len(name)}s", hash, len(name), name.encode("ascii"))
+    head = struct.pack("<4siIIII", b"ANIM", AnimBank.version, anim_num * frame_num * element_num, anim_num * frame_num, 0, anim_num)
+    return bytes(head + content)
+
+def synth_build(symbol_num, frame_num=10, region_num=4):
+    # 直接按 build.bin 格式生成合成数据，每帧 region_num 个矩形区域，每个区域 6 个顶点
+    hash_dict = {}
+    symbols = b""
+    vert_num = 0
+    # 打包时 symbol 按 hash 排序，合成数据也按此顺序写入，才能与重新打包的结果比较
+    for hash in sorted(strhash(f"symbol{idx}", hash_dict) for idx in range(symbol_num)):
+        symbols += struct.pack("<II", hash, frame_num)
+        for frame in range(frame_num):
+            symbols += struct.pack("<IIffffII", frame, 1, 0, 0, 64, 64, vert_num, region_num * 6)
+            vert_num += region_num * 6
+    verts = b"".join(struct.pack("<ffffff", idx % 64, idx % 32, 0, idx % 7 / 7, idx % 5 / 5, 0) for idx in range(vert_num))
+    hashes = b"".join(struct.pack(f"<Ii{len(name)}s", hash, len(name), name.encode("ascii")) for hash, name in hash_dict.items())
+    head = struct.pack("<4siIIi5sIi14s", b"BILD", AnimBuild.version, symbol_num, symbol_num * frame_num, 5, b"synth", 1, 14, b"atlas-0.tex")
+    return head + symbols + struct.pack("<I", vert_num) + verts + struct.pack("<I", len(hash_dict)) + hashes
+
+def iter_anim_files(anim_dir, name):
+    for file in os.listdir(anim_dir):
+        if file.endswith(".zip"):
+            with ZipFile(os.path.join(anim_dir, file)) as zip_file:
+                if name in zip_file.namelist():
+                    yield file, zip_file.read(name)
+
+def bench_bank(args):
+    for anim_num in (10, 40, 160, 640):
+        content = synth_bank(anim_num)
+        report(f"synthetic {anim_num} anims", len(content), timeit(lambda: AnimBank(content).bin_to_json()))
+
+    if args.anim_dir:
+        banks = sorted(iter_anim_files(args.anim_dir, "anim.bin"), key=lambda item: len(item[1]), reverse=True)[:args.top]
+        for file, content in banks:
+            report(file, len(content), timeit(lambda: AnimBank(content).bin_to_json()))
+
+def round_trip(content):
+    build = AnimBuild(content)
+    build.bin_to_json()
+    build.json_to_bin()
+    return build.content
+
+def bench_build(args):
+    builds = [(f"synthetic {symbol_num} symbols", synth_build(symbol_num)) for symbol_num in (10, 40, 160, 640)]
+    if args.anim_dir:
+        builds += sorted(iter_anim_files(args.anim_dir, "build.bin"), key=lambda item: len(item[1]), reverse=True)[:args.top]
+
+    for name, content in builds:
+        # 解析后重新打包应与原文件完全一致
+        assert round_trip(content) == content, name
+        report(f"{name} decode", len(content), timeit(lambda: AnimBuild(content).bin_to_json()))
+        build = AnimBuild(content)
+        build.bin_to_json()
+        report(f"{name} encode", len(content), timeit(build.json_to_bin))
+
+def synth_tex(size):
+    # 平滑渐变加噪声，接近真实贴图的块内颜色分布
+    y, x = np.mgrid[0:size, 0:size]
+    noise = np.random.default_rng(size).integers(0, 16, (size, size, 4))
+    pixels = np.stack([x * 255 // size, y * 255 // size, (x + y) * 127 // size, np.full_like(x, 255)], axis=-1) + noise
+    return KTEX.encode(Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGBA"), "bc3")
+
+def iter_dynamic_texes(tex_dir):
+    for file in os.listdir(tex_dir):
+        if file.endswith(".dyn") or file.endswith(".zip"):
+            with (open_dyn(os.path.join(tex_dir, file)) if file.endswith(".dyn") else ZipFile(os.path.join(tex_dir, file))) as zip_file:
+                for name in zip_file.namelist():
+                    if name.endswith(".tex"):
+                        yield f"{file}/{name}", zip_file.read(name)
+
+def bench_tex(args):
+    texes = [(f"synthetic {size}x{size} bc3", synth_tex(size)) for size in (256, 512, 1024, 2048)]
+    if args.tex_dir:
+        texes += sorted(iter_dynamic_texes(args.tex_dir), key=lambda item: len(item[1]), reverse=True)[:args.top]
+
+    # ktech.exe 只能在 Windows 上运行，其他系统只测试 ktex.py
+    use_exe = os.name == "nt" and os.path.exists(KTECH)
+    native_total = exe_total = 0
+    with TemporaryDirectory() as temp_dir:
+        for name, content in texes:
+            elapsed = timeit(lambda: KTEX(content).to_image())
+            native_total += elapsed
+            report(f"{name} ktex.py", len(content), elapsed)
+
+            if use_exe:
+                tex_path = os.path.join(temp_dir, "bench.tex")
+                with open(tex_path, "wb") as file:
+                    file.write(content)
+                elapsed = timeit(lambda: subprocess.call([KTECH, tex_path, os.path.join(temp_dir, "bench.png")]))
+                exe_total += elapsed
+                report(f"{name} ktech.exe", len(content), elapsed)
+
+            image = KTEX(content).to_image()
+            report(f"{name} encode bc3", len(content), timeit(lambda: KTEX.encode(image, "bc3"), repeat=1))
+
+    print(f"decode total: ktex.py {native_total:.2f} s" + (f", ktech.exe {exe_total:.2f} s" if use_exe else ""))
+
+def synth_images(count, max_size=160):
+    # 大小随机的 symbol 帧，大图少小图多，接近真实动画
+    rng = np.random.default_rng(count)
+    images = []
+    for idx in range(count):
+        w, h = (int(size) for size in np.clip(rng.exponential(max_size / 3, 2), 4, max_size))
+        image = Image.new("RGBA", (w, h))
+        image.name = f"image-{idx}"
+        images.append(image)
+    return images
+
+def bench_atlas(args):
+    for count in args.counts:
+        images = synth_images(count)
+        for packer in ("scan", "skyline", "maxrects"):
+            start = time.perf_counter()
+            atlases = atlas_image.Atlas(images, "atlas", packer=packer)
+            elapsed = time.perf_counter() - start
+            used = sum(bbox.w * bbox.h for atlas in atlases for bbox in atlas.bboxes.values())
+            total = sum(atlas.mips.im.size[0] * atlas.mips.im.size[1] for atlas in atlases)
+            print(f"{count:>5} images {packer:<10} {elapsed * 1000:>10.1f} ms {len(atlases):>3} atlases  fill {used / total:>6.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bank_parser = subparsers.add_parser("bank", help="anim.bin 解析")
+    bank_parser.add_argument("--anim-dir", help="包含动画 zip 的目录，例如 <饥荒联机版>/data/anim")
+    bank_parser.add_argument("--top", type=int, default=5, help="测试最大的几个文件")
+    bank_parser.set_defaults(func=bench_bank)
+
+    build_parser = subparsers.add_parser("build", help="build.bin 解析与打包")
+    build_parser.add_argument("--anim-dir", help="包含动画 zip 的目录，例如 <饥荒联机版>/data/anim")
+    build_parser.add_argument("--top", type=int, default=5, help="测试最大的几个文件")
+    build_parser.set_defaults(func=bench_build)
+
+    tex_parser = subparsers.add_parser("tex", help="KTEX 纹理解码与编码")
+    tex_parser.add_argument("--tex-dir", help="包含 .dyn 或 .zip 的目录，例如 <饥荒联机版>/data/anim/dynamic")
+    tex_parser.add_argument("--top", type=int, default=20, help="测试最大的几个文件")
+    tex_parser.set_defaults(func=bench_tex)
+
+    atlas_parser = subparsers.add_parser("atlas", help="图集打包")
+    atlas_parser.add_argument("--counts", type=int, nargs="+", default=[50, 200, 800], help="图片数量")
+    atlas_parser.set_defaults(func=bench_atlas)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -11,6 +11,14 @@ class AnimBank():
     endianstring = "<"
     file_name = "anim"
 
+    # 预编译的结构体，解析时在 memoryview 上按偏移读取，避免反复切片复制
+    _int = struct.Struct(endianstring + "i")
+    _uint = struct.Struct(endianstring + "I")
+    _anim_head = struct.Struct(endianstring + "BIfI")
+    _frame_head = struct.Struct(endianstring + "ffffI")
+    _element = struct.Struct(endianstring + "III7f")
+    _hash_head = struct.Struct(endianstring + "Ii")
+
     def __init__(self, anim=None):
         self.content = None
         self.data = {}
@@ -39,69 +47,73 @@ class AnimBank():
 
         return self
 
-    def bin_to_json(self):
+    def bin_to_json(self, anims=None):
+        """
+        anims: 只解码这些动画（名字包含朝向后缀），其余动画的帧直接跳过，不会出现在 data 中
+        """
         if not self.content:
             return
 
-        endianstring = self.endianstring
+        view = memoryview(self.content)
         self.data = {}
 
-        anim_num = struct.unpack(endianstring + "I", self.content[20: 24])[0]
+        anim_num = self._uint.unpack_from(view, 20)[0]
 
-        data_content = self.content[24:]
+        offset = 24
         self.data["banks"] = {}
         elements = []
         for idx in range(anim_num):
-            anim_name_len = struct.unpack(endianstring + "i", data_content[: 4])[0]
-            anim_name = struct.unpack(endianstring + str(anim_name_len) + "s", data_content[4: 4 + anim_name_len])[0].decode("utf-8")
-            facing_byte = struct.unpack(endianstring + "B", data_content[4 + anim_name_len: 5 + anim_name_len])[0]
-            anim_root_hash = struct.unpack(endianstring + "I", data_content[5 + anim_name_len: 9 + anim_name_len])[0]
-            framerate = int(struct.unpack(endianstring + "f", data_content[9 + anim_name_len: 13 + anim_name_len])[0])
-            numframes = struct.unpack(endianstring + "I", data_content[13 + anim_name_len: 17 + anim_name_len])[0]
+            anim_name_len = self._int.unpack_from(view, offset)[0]
+            offset += 4
+            anim_name = bytes(view[offset: offset + anim_name_len]).decode("utf-8")
+            offset += anim_name_len
+            facing_byte, anim_root_hash, framerate, numframes = self._anim_head.unpack_from(view, offset)
+            offset += self._anim_head.size
+            framerate = int(framerate)
+
+            anim_name += faceing_dir.get(facing_byte, "")
+            if anims is not None and anim_name not in anims:
+                for idx in range(numframes):
+                    event_num = self._uint.unpack_from(view, offset + 16)[0]
+                    element_num = self._uint.unpack_from(view, offset + 20 + event_num * 4)[0]
+                    offset += 24 + event_num * 4 + element_num * self._element.size
+                continue
 
             if anim_root_hash not in self.data["banks"]:
                 self.data["banks"][anim_root_hash] = {}
+            frames = []
+            self.data["banks"][anim_root_hash][anim_name] = {"framerate": framerate, "numframes": numframes, "frames": frames}
 
-            anim_name += faceing_dir.get(facing_byte, "")
-            self.data["banks"][anim_root_hash][anim_name] = {"framerate": framerate, "numframes": numframes, "frames":[]}
-
-            data_content = data_content[17 + anim_name_len:]
             for idx in range(numframes):
-                x, y, w, h = struct.unpack(endianstring + "ffff", data_content[: 16])
-                event_num = struct.unpack(endianstring + "I", data_content[16: 20])[0]
-                element_num = struct.unpack(endianstring + "I", data_content[20 + event_num * 4: 24 + event_num * 4])[0]
-
-                frame_data = {"x": x, "y": y, "w": w, "h": h, "elements": []}
-
-                data_content = data_content[24 + event_num * 4: ]
-                for z_index in range(element_num):
-                    element_name_hash = struct.unpack(endianstring + "I", data_content[: 4])[0]
-                    frame = struct.unpack(endianstring + "I", data_content[4: 8])[0]
-                    layername_hash = struct.unpack(endianstring + "I", data_content[8: 12])[0]
-                    m_a, m_b, m_c, m_d, m_tx, m_ty, z = struct.unpack(endianstring + "fffffff", data_content[12: 40])
-
+                x, y, w, h, event_num = self._frame_head.unpack_from(view, offset)
+                offset += self._frame_head.size + event_num * 4
+                element_num = self._uint.unpack_from(view, offset)[0]
+                offset += 4
+
+                frame_elements = []
+                end = offset + element_num * self._element.size
+                for z_index, (element_name_hash, frame, layername_hash, m_a, m_b, m_c, m_d, m_tx, m_ty, z) in enumerate(self._element.iter_unpack(view[offset: end])):
                     element = {"name": element_name_hash, "frame": frame, "layername": layername_hash, "m_a": m_a, "m_b": m_b, "m_c": m_c, "m_d": m_d, "m_tx": m_tx, "m_ty": m_ty, "z_index": z_index}
-                    frame_data["elements"].append(element)
-                    elements.append(element)
-                    data_content = data_content[40: ]
+                    frame_elements.append(element)
+                offset = end
 
-                sorted(frame_data["elements"], key=lambda element: element["z_index"])
-                self.data["banks"][anim_root_hash][anim_name]["frames"].append(frame_data)
+                elements.extend(frame_elements)
+                frames.append({"x": x, "y": y, "w": w, "h": h, "elements": frame_elements})
 
         hash_dict = {}
-        hash_dict_len = struct.unpack(endianstring + "I", data_content[: 4])[0]
-        data_content = data_content[4: ]
+        hash_dict_len = self._uint.unpack_from(view, offset)[0]
+        offset += 4
         for idx in range(hash_dict_len):
-            hash = struct.unpack(endianstring + "I", data_content[: 4])[0]
-            name_len = struct.unpack(endianstring + "i", data_content[4: 8])[0]
-            name = struct.unpack(endianstring + str(name_len) + "s",  data_content[8: 8 + name_len])[0].decode("utf-8")
+            hash, name_len = self._hash_head.unpack_from(view, offset)
+            offset += self._hash_head.size
+            name = bytes(view[offset: offset + name_len]).decode("utf-8")
+            offset += name_len
 
             if hash in self.data["banks"]:
                 self.data["banks"][name] = self.data["banks"][hash]
                 del self.data["banks"][hash]
 
             hash_dict[hash] = name
-            data_content = data_content[8 + name_len: ]
 
         for element in elements:
             element["name"] = hash_dict[element["name"]].lower()
@@ -115,6 +127,16 @@ class AnimBank():
         self.content = bytes()
         hash_dict = {}
 
+        # 先批量计算所有名字的 hash，下面逐个调用 strhash 时都能命中缓存
+        names = set(self.data["banks"])
+        for bank in self.data["banks"].values():
+            for anim in bank.values():
+                for frame in anim["frames"]:
+                    for element in frame["elements"]:
+                        names.add(element["name"])
+                        names.add(element["layername"])
+        hash_many(names)
+
         anim_num = 0
         frame_num = 0
         element_num = 0
@@ -1,4 +1,6 @@
-import os, re, math, struct, json, copy
+import os, re, sys, math, struct, json, copy
+from array import array
+from pathlib import Path
 from PIL import Image
 from zipfile import ZipFile, ZIP_DEFLATED
 from tempfile import TemporaryDirectory
@@ -8,13 +10,70 @@ from ds_file.anim_util import *
 from ds_file.anim_bank import AnimBank
 from klei.symbol_map import GetSwapSymbol
 from klei import atlas_image, optimize_image
-from ktech.texture_converter import tex_to_png, png_to_tex
+from ktech.texture_converter import png_to_tex
+from ktech.ktex import tex_to_image
+
+class VertArray():
+    # 顶点列表，每个顶点的 x y z u v w 六个 float 连续存放在 array 中，读写 build.bin 时整体复制
+    fields = ("x", "y", "z", "u", "v", "w")
+
+    def __init__(self, values=()):
+        self.values = array("f", values)
+
+    @classmethod
+    def from_dicts(cls, verts):
+        return cls(float(vert[field]) for vert in verts for field in cls.fields)
+
+    @classmethod
+    def frombytes(cls, data):
+        verts = cls()
+        verts.values.frombytes(data)
+        if sys.byteorder == "big":
+            verts.values.byteswap()
+        return verts
+
+    def tobytes(self):
+        if sys.byteorder == "big":
+            values = array("f", self.values)
+            values.byteswap()
+            return values.tobytes()
+        return self.values.tobytes()
+
+    def append(self, x, y, z, u, v, w):
+        self.values.extend((x, y, z, u, v, w))
+
+    def column(self, field):
+        return self.values[self.fields.index(field)::6]
+
+    def __len__(self):
+        return len(self.values) // 6
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            assert step == 1
+            return VertArray(self.values[start * 6: stop * 6])
+        if idx < 0:
+            idx += len(self)
+        return dict(zip(self.fields, self.values[idx * 6: idx * 6 + 6]))
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
 
 class AnimBuild():
     version = 6
     endianstring = "<"
     file_name = "build"
 
+    # 预编译的结构体，解析时在 memoryview 上按偏移读取，打包时写入 bytearray
+    _int = struct.Struct(endianstring + "i")
+    _uint = struct.Struct(endianstring + "I")
+    _head = struct.Struct(endianstring + "4siII")
+    _symbol_head = struct.Struct(endianstring + "II")
+    _frame = struct.Struct(endianstring + "IIffffII")
+    _hash_head = struct.Struct(endianstring + "Ii")
+
     def __init__(self, build: bytes|dict=None, atlas: str|ZipFile=None, images: str|dict=None) -> None:
         self.temp_dir = TemporaryDirectory()
         self.temp_path = self.temp_dir.name
@@ -27,6 +86,8 @@ class AnimBuild():
             self.content = build
         elif isinstance(build, dict):
             self.data = build
+            if isinstance(self.data.get("Vert"), list):
+                self.data["Vert"] = VertArray.from_dicts(self.data["Vert"])
 
         if atlas is not None:
             self._parse_atlas(atlas)
@@ -82,25 +143,26 @@ class AnimBuild():
             self.symbol_images = {name.lower(): Image.open(path) for name, path in fp.items() if path.find(".png") != -1 and path.find("(missing)") == -1 and re.search(r"(duration\'(.+?)\')", path) is None}
 
     def _parse_atlas(self, fp: str|ZipFile):
+        # tex 直接在内存中解码，不解压到临时目录，也不调用 ktech.exe
         if isinstance(fp, ZipFile):
-            for file_name in fp.namelist():
-                if file_name.find(".tex") != -1:
-                    fp.extract(file_name, path=self.temp_path)
-            fp = self.temp_path
+            files = fp.namelist()
+            read = fp.read
+        else:
+            root, dirs, files = next(os.walk(fp), (None, None, []))
+            read = lambda file_name: Path(root, file_name).read_bytes()
 
         for atlas in self.atlases:
             atlas.close()
         self.atlases = []
-        root, dirs, files = next(os.walk(fp), (None, None, []))
-        for file_name in sorted([file_name for file_name in files if file_name.find(".tex") != -1], key=lambda s: int(s.split('-')[1].split('.')[0])):
-            image_path = os.path.join(self.temp_path, file_name.replace(".tex", ".png"))
-            tex_to_png([os.path.join(root, file_name)], image_path)
-            self.atlases.append(Image.open(image_path).convert("RGBA"))
+        # 只取 atlas-N.tex 并按 N 排序，其他 tex 文件不是这个 build 的图集
+        atlases = {int(match[1]): file_name for file_name in files if (match := re.fullmatch(r"atlas-(\d+)\.tex", file_name))}
+        for _, file_name in sorted(atlases.items()):
+            self.atlases.append(tex_to_image(read(file_name)))
 
     def set_build_name(self, name: str):
         self.data["name"] = name
 
-    def atlas_images(self, name="atlas"):
+    def atlas_images(self, name="atlas", packer="scan"):
         if not self.data:
             self.bin_to_json()
 
@@ -113,10 +175,10 @@ class AnimBuild():
                 images.append(self.symbol_images[frame_name])
 
         scale_factor = self.data["scale"]
-        atlases = atlas_image.Atlas(images, name, scale_factor=scale_factor)
+        atlases = atlas_image.Atlas(images, name, scale_factor=scale_factor, packer=packer)
 
-        self.data["Vert"] = []
-        symbol_names = sorted(self.data["Symbol"], key=lambda name: strhash(name, {}))
+        self.data["Vert"] = VertArray()
+        symbol_names = sorted(self.data["Symbol"], key=strhash)
         for symbol_name in symbol_names:
             for frame in self.data["Symbol"][symbol_name]:
                 frame_name = f'{symbol_name}-{frame["framenum"]}'
@@ -163,12 +225,12 @@ class AnimBuild():
                             assert 0 <= vmin and vmin <= 1
                             assert 0 <= vmax and vmax <= 1
 
-                            self.data["Vert"].append({"x": left, "y": top, "z": 0, "u": umin, "v": vmin, "w": idx})
-                            self.data["Vert"].append({"x": right, "y": top, "z": 0, "u": umax, "v": vmin, "w": idx})
-                            self.data["Vert"].append({"x": left, "y": bottom, "z": 0, "u": umin, "v": vmax, "w": idx})
-                            self.data["Vert"].append({"x": right, "y": top, "z": 0, "u": umax, "v": vmin, "w": idx})
-                            self.data["Vert"].append({"x": right, "y": bottom, "z": 0, "u": umax, "v": vmax, "w": idx})
-                            self.data["Vert"].append({"x": left, "y": bottom, "z": 0, "u": umin, "v": vmax, "w": idx})
+                            self.data["Vert"].append(left, top, 0, umin, vmin, idx)
+                            self.data["Vert"].append(right, top, 0, umax, vmin, idx)
+                            self.data["Vert"].append(left, bottom, 0, umin, vmax, idx)
+                            self.data["Vert"].append(right, top, 0, umax, vmin, idx)
+                            self.data["Vert"].append(right, bottom, 0, umax, vmax, idx)
+                            self.data["Vert"].append(left, bottom, 0, umin, vmax, idx)
 
                             frame["alphacount"] += 6
 
@@ -194,16 +256,16 @@ class AnimBuild():
                 verts = self.data["Vert"][frame["alphaidx"]: frame["alphaidx"] + frame["alphacount"]]
                 x_offset, y_offset = frame["x"] - (w := frame["w"]) // 2, frame["y"] - (h := frame["h"]) // 2
 
-                if len(verts) == 0 or max(u_list := [vert["u"] for vert in verts] or [0]) == min(u_list):
+                if len(verts) == 0 or max(u_list := verts.column("u") or [0]) == min(u_list):
                     self.symbol_images[image_name] = Image.new("RGBA", (w, h))
                     continue
 
-                region_verts = [verts[i: i + 6] for i in range(0, len(verts), 6)]
-
-                region_left = min(verts[0]["x"] for verts in region_verts)
-                region_right = max(verts[1]["x"] for verts in region_verts)
-                region_top = min(verts[0]["y"] for verts in region_verts)
-                region_bottom = max(verts[2]["y"] for verts in region_verts)
+                # 每 6 个顶点是一个矩形区域，依次为 左上 右上 左下 右上 右下 左下
+                x_list, y_list = verts.column("x"), verts.column("y")
+                region_left = min(x_list[0::6])
+                region_right = max(x_list[1::6])
+                region_top = min(y_list[0::6])
+                region_bottom = max(y_list[2::6])
 
                 region_x = round_up(region_left - x_offset)
                 region_y = round_up(region_top - y_offset)
@@ -213,7 +275,7 @@ class AnimBuild():
                 atlas = self.atlases[int(verts[0]["w"])]
                 cropped = atlas.crop((
                     min(u_list) * atlas.width,
-                    (1 - max(v_list := [vert["v"] for vert in verts] or [0])) * atlas.height,
+                    (1 - max(v_list := verts.column("v") or [0])) * atlas.height,
                     max(u_list) * atlas.width,
                     (1 - min(v_list)) * atlas.height
                 ))
@@ -237,61 +299,54 @@ class AnimBuild():
         if not self.content:
             return
 
-        endianstring = self.endianstring
+        view = memoryview(self.content)
 
-        symbol_num = struct.unpack(endianstring + "I", self.content[8: 12])[0]
-        build_name_len = struct.unpack(endianstring + "I", self.content[16: 20])[0]
-        self.data["name"] = struct.unpack(endianstring + str(build_name_len) + "s", self.content[20: 20 + build_name_len])[0].decode("utf-8")
+        _, _, symbol_num, _ = self._head.unpack_from(view, 0)
+        build_name_len = self._uint.unpack_from(view, 16)[0]
+        offset = 20
+        self.data["name"] = bytes(view[offset: offset + build_name_len]).decode("utf-8")
+        offset += build_name_len
 
-        atlas_num = struct.unpack(endianstring + "I", self.content[20 + build_name_len: 24 + build_name_len])[0]
-        data_content = self.content[24 + build_name_len: ]
+        atlas_num = self._uint.unpack_from(view, offset)[0]
+        offset += 4
 
         self.data["Atlas"] = []
         for atlas_idx in range(atlas_num):
-            atlas_name_len = struct.unpack(endianstring + "I", data_content[: 4])[0]
-            atlas_name = struct.unpack(endianstring + str(atlas_name_len) + "s", data_content[4: 4 + atlas_name_len])[0].decode("utf-8")
-            data_content = data_content[4 + atlas_name_len: ]
-            self.data["Atlas"].append(atlas_name)
+            atlas_name_len = self._uint.unpack_from(view, offset)[0]
+            offset += 4
+            self.data["Atlas"].append(bytes(view[offset: offset + atlas_name_len]).decode("utf-8"))
+            offset += atlas_name_len
 
         self.data["Symbol"] = {}
         for symbol_idx in range(symbol_num):
-            symbol_name_hash = struct.unpack(endianstring + "I", data_content[: 4])[0]
-            frames_len = struct.unpack(endianstring + "I", data_content[4: 8])[0]
-            self.data["Symbol"][symbol_name_hash] = []
-            data_content = data_content[8:]
-
-            for frame_idx in range(frames_len):
-                framenum = struct.unpack(endianstring + "I", data_content[0: 4])[0]
-                duration = struct.unpack(endianstring + "I", data_content[4: 8])[0]
-                x, y, w, h = struct.unpack(endianstring + "ffff", data_content[8: 24])
-                alphaidx = struct.unpack(endianstring + "I", data_content[24: 28])[0]
-                alphacount = struct.unpack(endianstring + "I", data_content[28: 32])[0]
-                self.data["Symbol"][symbol_name_hash].append({"framenum": framenum, "duration": duration, "x": x, "y": y, "w": int(w), "h": int(h), "alphaidx": alphaidx, "alphacount": alphacount})
-                data_content = data_content[32:]
-            sorted(self.data["Symbol"][symbol_name_hash], key=lambda frame: frame["framenum"])
-
-        verts_len = struct.unpack(endianstring + "I", data_content[: 4])[0]
-        data_content = data_content[4: ]
-        self.data["Vert"] = []
-        for vert_idx in range(verts_len):
-            x, y, z, u, v, w = struct.unpack(endianstring + "ffffff", data_content[: 24])
-            self.data["Vert"].append({"x": x, "y": y, "z": z, "u": u, "v": v, "w": w})
-            data_content = data_content[24: ]
-
-        hash_dict_len = struct.unpack(endianstring + "I", data_content[: 4])[0]
-        data_content = data_content[4: ]
+            symbol_name_hash, frames_len = self._symbol_head.unpack_from(view, offset)
+            offset += self._symbol_head.size
+            end = offset + frames_len * self._frame.size
+            self.data["Symbol"][symbol_name_hash] = [
+                {"framenum": framenum, "duration": duration, "x": x, "y": y, "w": int(w), "h": int(h), "alphaidx": alphaidx, "alphacount": alphacount}
+                for framenum, duration, x, y, w, h, alphaidx, alphacount in self._frame.iter_unpack(view[offset: end])
+            ]
+            offset = end
+
+        verts_len = self._uint.unpack_from(view, offset)[0]
+        offset += 4
+        end = offset + verts_len * 24
+        self.data["Vert"] = VertArray.frombytes(view[offset: end])
+        offset = end
+
+        hash_dict_len = self._uint.unpack_from(view, offset)[0]
+        offset += 4
 
         for hash_idx in range(hash_dict_len):
-            hash = struct.unpack(endianstring + "I", data_content[: 4])[0]
-            hash_str_len = struct.unpack(endianstring + "i", data_content[4: 8])[0]
-            hash_str = struct.unpack(endianstring + str(hash_str_len) + "s", data_content[8: 8 + hash_str_len])[0].decode("utf-8")
+            hash, hash_str_len = self._hash_head.unpack_from(view, offset)
+            offset += self._hash_head.size
+            hash_str = bytes(view[offset: offset + hash_str_len]).decode("utf-8")
+            offset += hash_str_len
 
             if hash in self.data["Symbol"]:
                 self.data["Symbol"][hash_str.lower()] = self.data["Symbol"][hash]
                 del self.data["Symbol"][hash]
 
-            data_content = data_content[8 + hash_str_len: ]
-
         if self.atlases:
             self.split_altas()
 
@@ -299,38 +354,35 @@ class AnimBuild():
         if not self.data:
             return
 
-        endianstring = self.endianstring
         hash_dict = {}
-
-        self.content = bytes()
-        self.content += struct.pack(endianstring + "cccci", b"B", b"I", b"L", b"D", self.version)
-        self.content += struct.pack(endianstring + "I", len(symbols := self.data["Symbol"]))
-        self.content += struct.pack(endianstring + "I", sum([len(frames) for frames in self.data["Symbol"].values()]))
-        self.content += struct.pack(endianstring + "i" + str(len(buildname := self.data["name"].encode("ascii"))) + "s", len(buildname), buildname)
-        self.content += struct.pack(endianstring + "I", len(atlases := self.data["Atlas"]))
+        if not isinstance(verts := self.data["Vert"], VertArray):
+            verts = VertArray.from_dicts(verts)
+
+        content = bytearray()
+        content += self._head.pack(b"BILD", self.version, len(symbols := self.data["Symbol"]), sum([len(frames) for frames in self.data["Symbol"].values()]))
+        content += self._int.pack(len(buildname := self.data["name"].encode("ascii")))
+        content += buildname
+        content += self._uint.pack(len(atlases := self.data["Atlas"]))
         for atlas_name in atlases:
-            self.content += struct.pack(endianstring + "i" + str(len(atlas_name)) + "s", len(atlas_name), atlas_name.encode("ascii"))
+            content += self._int.pack(len(atlas_name))
+            content += atlas_name.encode("ascii")
 
-        symbol_hash_dict = sorted([strhash(symbol_name, hash_dict) for symbol_name in symbols])
+        symbol_hash_dict = sorted(hash_many(symbols, hash_dict))
         for hash in symbol_hash_dict:
-            self.content += struct.pack(endianstring + "I", hash)
-            self.content += struct.pack(endianstring + "I", len(frames := symbols[hash_dict[hash]]))
+            content += self._symbol_head.pack(hash, len(frames := symbols[hash_dict[hash]]))
 
             for frame in frames:
-                self.content += struct.pack(endianstring + "I", frame["framenum"])
-                self.content += struct.pack(endianstring + "I", frame["duration"])
-                self.content += struct.pack(endianstring + "ffff", frame["x"], frame["y"], frame["w"], frame["h"])
-                self.content += struct.pack(endianstring + "I", frame["alphaidx"])
-                self.content += struct.pack(endianstring + "I", frame["alphacount"])
+                content += self._frame.pack(frame["framenum"], frame["duration"], frame["x"], frame["y"], frame["w"], frame["h"], frame["alphaidx"], frame["alphacount"])
 
-        self.content += struct.pack(endianstring + "I", len(self.data["Vert"]))
-        for vert in self.data["Vert"]:
-            self.content += struct.pack(endianstring + "ffffff", float(vert["x"]), float(vert["y"]), float(vert["z"]), float(vert["u"]), float(vert["v"]), float(vert["w"]))
+        content += self._uint.pack(len(verts))
+        content += verts.tobytes()
 
-        self.content += struct.pack(endianstring + "I", len(hash_dict))
+        content += self._uint.pack(len(hash_dict))
         for hash, name in hash_dict.items():
-            self.content += struct.pack(endianstring + "I", hash)
-            self.content += struct.pack(endianstring + "i" + str(len(name)) + "s", len(name), name.encode("ascii"))
+            content += self._hash_head.pack(hash, len(name))
+            content += name.encode("ascii")
+
+        self.content = bytes(content)
 
     def to_scml(self, scml: Element, banks: AnimBank, output: str, mapping: bool=False):
         folders = {}
@@ -1,4 +1,6 @@
 import os
+from itertools import islice
+import numpy as np
 
 FRAME_RATE = 30
 
@@ -34,14 +36,50 @@ def try_makedirs(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def strhash(str, hash_dict):
+# 名字到 hash 的缓存，同一个 symbol、layer 名在打包时会反复出现
+# 最多保存 HASH_CACHE_SIZE 个名字，超出时丢弃最早加入的，一次处理大量皮肤时不会一直增长
+HASH_CACHE_SIZE = 1 << 16
+_hash_cache: dict[str, int] = {}
+
+def _cache_hashes(items):
+    _hash_cache.update(items)
+    excess = len(_hash_cache) - HASH_CACHE_SIZE
+    if excess > 0:
+        for name in list(islice(_hash_cache, excess)):
+            del _hash_cache[name]
+
+def _strhash(str):
     hash = 0
     for c in str:
         v = ord(c.lower())
         hash = (v + (hash << 6) + (hash << 16) - hash) & 0xFFFFFFFF
-    hash_dict[hash] = str
     return hash
 
+def strhash(str, hash_dict=None):
+    if (hash := _hash_cache.get(str)) is None:
+        hash = _strhash(str)
+        _cache_hashes(((str, hash),))
+    if hash_dict is not None:
+        hash_dict[hash] = str
+    return hash
+
+def hash_many(names, hash_dict=None) -> list[int]:
+    """
+    批量计算 hash，结果与逐个调用 strhash 相同
+    没有缓存的名字用 numpy 按字符位置一列一列地同时计算
+    """
+    names = list(names)
+    missing = list(dict.fromkeys(name for name in names if name not in _hash_cache))
+    if len(missing) > 16 and all(name.isascii() for name in missing):
+        chars = np.array([name.lower() for name in missing]).reshape(-1, 1).view(np.uint32).astype(np.uint64)
+        lengths = np.array([len(name) for name in missing])
+        hashes = np.zeros(len(missing), dtype=np.uint64)
+        for idx in range(chars.shape[1]):
+            hashes = np.where(idx < lengths, (chars[:, idx] + (hashes << np.uint64(6)) + (hashes << np.uint64(16)) - hashes) & np.uint64(0xFFFFFFFF), hashes)
+        _cache_hashes(zip(missing, hashes.tolist()))
+
+    return [strhash(name, hash_dict) for name in names]
+
 def round_up(a, b=0):
     assert b <= 0
 
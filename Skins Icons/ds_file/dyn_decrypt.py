@@ -26,43 +26,51 @@ SOFTWARE.
 # https://github.com/UNOWEN-OwO/dyn_decrypt/blob/master
 
 import os
+import numpy as np
+from io import BytesIO
+from zipfile import ZipFile
+
+# XOR key and shuffle index arrays for convert
+CHUNK_SIZE = 8
+KEY = np.arange(0x8D, 0x8D + CHUNK_SIZE, dtype=np.uint8)
+INDICES = np.array([5, 3, 6, 7, 4, 2, 0, 1])
+
+def _convert(data: bytes, decrypt: bool) -> bytes:
+    # 除最后一块（不超过 8 字节，原样保留）外每 8 字节一块，整个文件作为 (块数, 8) 的数组一次完成异或和换位
+    blocks_len = (len(data) - 1) // CHUNK_SIZE * CHUNK_SIZE if data else 0
+    blocks = np.frombuffer(data, dtype=np.uint8, count=blocks_len).reshape(-1, CHUNK_SIZE)
+    if decrypt:
+        out = blocks[:, INDICES] ^ KEY
+    else:
+        out = np.empty_like(blocks)
+        out[:, INDICES] = blocks ^ KEY
+    return out.tobytes() + data[blocks_len:]
+
+def decrypt_dyn(data: bytes) -> bytes:
+    # 已经是 zip 的直接返回
+    if data[:2] == b"PK":
+        return data
+    return _convert(data, True)
+
+def encrypt_dyn(data: bytes) -> bytes:
+    return _convert(data, False)
+
+def open_dyn(filename) -> ZipFile:
+    """在内存中解密 .dyn，返回 ZipFile，不写临时文件"""
+    with open(filename, "rb") as file:
+        return ZipFile(BytesIO(decrypt_dyn(file.read())))
 
 def convert_dyn(filename, debug_info=False):
     print("convert_dyn" + filename)
 
-    def debug(msg):
-        if debug_info:
-            print(msg)
-
     dest = os.path.splitext(filename)[0] + (".zip" if (isDecrypt := os.path.splitext(filename)[1] == ".dyn") else ".dyn")
+    if debug_info:
+        print("chunk size = {}, key = {}, indices = {}".format(CHUNK_SIZE, KEY.tobytes(), INDICES.tolist()))
+        print("filename = {}, dest = {}".format(filename, dest))
 
-    # XOR key and shuffle index arrays for convert
-    CHUNK_SIZE = 8
-    key = bytearray([(0x8D + i) for i in range(CHUNK_SIZE)])
-    indices = [5, 3, 6, 7, 4, 2, 0, 1]
-
-    debug("chunk size = {}, key = {}, indices = {}".format(CHUNK_SIZE, key, indices))
-    debug("filename = {}, dest = {}".format(filename, dest))
-
-    with open(filename, "rb") as file, open(dest, "wb") as output:
-        swap = 0
-        while (swap := swap + 1) > 0:
-            # Read in a chunk of raw data
-            chunk = (file.read(CHUNK_SIZE) if swap == 1 else chunk[CHUNK_SIZE:]) + file.read(CHUNK_SIZE)
-            if not chunk or (swap == 1 and isDecrypt and chunk[:2] == b"PK"):
-                output.write(chunk + file.read() + b""[:(swap := -2)] if swap == 1 and chunk[:2] == b"PK" else b""[:(swap := -1)])
-
-            else:  # Need a full 8-byte chunk to convert.
-                if len(chunk) > CHUNK_SIZE:
-                    out = bytearray(CHUNK_SIZE)
-
-                    # Convert the chunk.
-                    for i in range(CHUNK_SIZE):
-                        out[i if isDecrypt else indices[i]] = chunk[indices[i] if isDecrypt else i] ^ key[i]
-                else:
-                    out = chunk
-
-                debug("out = {}".format(out))
-                output.write(out)
+    with open(filename, "rb") as file:
+        data = file.read()
+    with open(dest, "wb") as output:
+        output.write(decrypt_dyn(data) if isDecrypt else encrypt_dyn(data))
 
-        print("{} {} to {}".format("Decrypted" if isDecrypt else "Encrypted", filename, dest) if not swap else "IT IS A ZIP!")
\ No newline at end of file
+    print("{} {} to {}".format("Decrypted" if isDecrypt else "Encrypted", filename, dest))
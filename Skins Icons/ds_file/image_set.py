@@ -7,7 +7,7 @@ from tempfile import TemporaryDirectory
 from xml.etree.ElementTree import ElementTree
 from ktech.texture_converter import tex_to_png, png_to_tex
 
-def AtlasImages(image_dir):
+def AtlasImages(image_dir, packer="scan"):
     with TemporaryDirectory() as temp_path:
         dir_name = os.path.split(image_dir)[1]
 
@@ -43,7 +43,7 @@ def AtlasImages(image_dir):
             image.name = os.path.splitext(os.path.basename(image_path))[0] + ".tex"
             images.append(image)
 
-        atlas_data = atlas_image.Atlas(images, dir_name)
+        atlas_data = atlas_image.Atlas(images, dir_name, packer=packer)
         assert len(atlas_data) == 1
         page = atlas_data[0]
 
@@ -0,0 +1,72 @@
+"""
+皮肤图标渲染，update_skin_icons.py 在进程池中调用
+此模块不依赖 main.py，工作进程导入时不会重复登录维基
+"""
+
+import os
+from io import BytesIO
+from zipfile import ZipFile
+from concurrent.futures import ProcessPoolExecutor
+
+from ds_file.anim_build import AnimBuild
+from ds_file.dyn_decrypt import open_dyn
+
+_worker_builds_zip = None
+_worker_tex_path = None
+
+
+def open_build(builds_zip: ZipFile, skin_name: str) -> ZipFile:
+    # anim_dynamic.zip 中每个皮肤是一个嵌套的 zip，只读取需要的成员，在内存中打开
+    for build_path in (f'anim/dynamic/{skin_name}.zip', f'anim/{skin_name}.zip'):
+        try:
+            return ZipFile(BytesIO(builds_zip.read(build_path)))
+        except KeyError:
+            pass
+    raise FileNotFoundError(build_path)
+
+
+def render_icon(builds_zip: ZipFile, tex_path, skin_name: str) -> bytes:
+    # 整个过程在内存中完成：build.bin 和 atlas 解码后切出 swap_icon 的第 0 帧，返回 png 数据
+    with open_build(builds_zip, skin_name) as build_zip:
+        build_bin = build_zip.read('build.bin')
+
+    # .dyn 在内存中解密，不在游戏目录下生成 .zip
+    tex_dyn_path = f'{tex_path}/{skin_name}.dyn'
+    if os.path.exists(tex_dyn_path):
+        tex_zip = open_dyn(tex_dyn_path)
+    else:
+        tex_zip = ZipFile(f'/data/anim/{skin_name}.zip', 'r')
+    with tex_zip, AnimBuild(build_bin, atlas=tex_zip) as build:
+        build.bin_to_json()
+        if 'swap_icon-0' not in build.symbol_images:
+            raise FileNotFoundError(f'{skin_name} 没有 swap_icon')
+        buffer = BytesIO()
+        build.symbol_images['swap_icon-0'].save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _init_worker(builds_zip_path, tex_path):
+    # 每个工作进程只打开一次 anim_dynamic.zip
+    global _worker_builds_zip, _worker_tex_path
+    _worker_builds_zip = ZipFile(builds_zip_path, 'r')
+    _worker_tex_path = tex_path
+
+
+def _render_icon(skin_name):
+    """在工作进程中渲染一个皮肤，异常作为结果返回，不中断其他皮肤"""
+    try:
+        return render_icon(_worker_builds_zip, _worker_tex_path, skin_name), None
+    except Exception as e:
+        return None, e
+
+
+def render_icons(skin_names, builds_zip_path, tex_path, workers=None):
+    """
+    用进程池并行渲染皮肤图标，按 skin_names 的顺序逐个产出 (皮肤名, png 数据, 异常)
+    渲染成功时异常为 None，失败时 png 数据为 None
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(str(builds_zip_path), str(tex_path))
+    ) as executor:
+        for skin_name, (icon, error) in zip(skin_names, executor.map(_render_icon, skin_names)):
+            yield skin_name, icon, error
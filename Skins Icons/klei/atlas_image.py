@@ -61,13 +61,115 @@ def TryInsertImage(w, h, fblist: list, atlassize) -> None|BBox:
 
     return None
 
+class SkylinePacker():
+    # 天际线算法：记录每一段已占用的最低高度 [x, y, w]，每张图放在使放置后底边最低的位置
+    def __init__(self, size, align=4):
+        self.size = int(size)
+        self.align = align
+        self.skyline = [[0, 0, self.size]]
+
+    def fit(self, idx, w, h):
+        x = self.skyline[idx][0]
+        if x + w > self.size:
+            return None
+        y, width_left = 0, w
+        while width_left > 0:
+            if idx >= len(self.skyline):
+                return None
+            y = max(y, self.skyline[idx][1])
+            if y + h > self.size:
+                return None
+            width_left -= self.skyline[idx][2]
+            idx += 1
+        return y
+
+    def insert(self, w, h) -> None|BBox:
+        pack_w, pack_h = NextMultipleOf(w, self.align), NextMultipleOf(h, self.align)
+        best = None
+        for idx, (x, _, _) in enumerate(self.skyline):
+            y = self.fit(idx, pack_w, pack_h)
+            if y is not None and (best is None or (y + pack_h, x) < (best[1] + pack_h, best[0])):
+                best = (x, y, idx)
+        if best is None:
+            return None
+
+        x, y, idx = best
+        self.skyline.insert(idx, [x, y + pack_h, pack_w])
+        # 去掉被新线段覆盖的部分
+        idx += 1
+        while idx < len(self.skyline):
+            segment, prev = self.skyline[idx], self.skyline[idx - 1]
+            shrink = prev[0] + prev[2] - segment[0]
+            if shrink <= 0:
+                break
+            segment[0] += shrink
+            segment[2] -= shrink
+            if segment[2] > 0:
+                break
+            del self.skyline[idx]
+        # 合并高度相同的相邻线段
+        idx = 0
+        while idx < len(self.skyline) - 1:
+            if self.skyline[idx][1] == self.skyline[idx + 1][1]:
+                self.skyline[idx][2] += self.skyline.pop(idx + 1)[2]
+            else:
+                idx += 1
+        return BBox(x, y, w, h)
+
+def BBoxContains(bb1: BBox, bb2: BBox) -> bool:
+    return bb1.x <= bb2.x and bb1.y <= bb2.y and bb1.x + bb1.w >= bb2.x + bb2.w and bb1.y + bb1.h >= bb2.y + bb2.h
+
+class MaxRectsPacker():
+    # MaxRects 算法：维护所有极大空闲矩形，每张图放在使放置后底边最低的空闲矩形的左上角
+    def __init__(self, size, align=4):
+        self.size = int(size)
+        self.align = align
+        self.free_rects = [BBox(0, 0, self.size, self.size)]
+
+    def insert(self, w, h) -> None|BBox:
+        pack_w, pack_h = NextMultipleOf(w, self.align), NextMultipleOf(h, self.align)
+        best = None
+        for rect in self.free_rects:
+            if rect.w >= pack_w and rect.h >= pack_h and (best is None or (rect.y, rect.x) < (best.y, best.x)):
+                best = rect
+        if best is None:
+            return None
+
+        placed = BBox(best.x, best.y, pack_w, pack_h)
+        kept, split = [], []
+        for rect in self.free_rects:
+            if not BBoxIntersects(rect, placed):
+                kept.append(rect)
+                continue
+            # 与新放置的矩形相交的空闲矩形拆成最多四个
+            if placed.x > rect.x:
+                split.append(BBox(rect.x, rect.y, placed.x - rect.x, rect.h))
+            if placed.x + placed.w < rect.x + rect.w:
+                split.append(BBox(placed.x + placed.w, rect.y, rect.x + rect.w - placed.x - placed.w, rect.h))
+            if placed.y > rect.y:
+                split.append(BBox(rect.x, rect.y, rect.w, placed.y - rect.y))
+            if placed.y + placed.h < rect.y + rect.h:
+                split.append(BBox(rect.x, placed.y + placed.h, rect.w, rect.y + rect.h - placed.y - placed.h))
+
+        # 原有的空闲矩形互不包含，只需要检查拆出来的矩形
+        split = list(dict.fromkeys(split))
+        split = [rect for idx, rect in enumerate(split)
+                 if not any(BBoxContains(other, rect) for other in kept)
+                 and not any(BBoxContains(other, rect) for other_idx, other in enumerate(split) if other_idx != idx)]
+        kept = [rect for rect in kept if not any(BBoxContains(other, rect) for other in split)]
+        self.free_rects = kept + split
+        return BBox(best.x, best.y, w, h)
+
+# scan 为原来的逐行扫描，结果与之前完全一致；skyline 和 maxrects 在图片很多时快得多
+PACKERS = {"skyline": SkylinePacker, "maxrects": MaxRectsPacker}
+
 # images: list of subimages
 # outname: prefix name for output image
 
 # returns dest, atlases
 # dest = {image_name: [ (origbbox, destbbox, destatlasidx) ]
 # atlases = {index : (name, image) ]
-def Atlas(images, out_name, max_size=2048, scale_factor=1, force_square=False) -> list[AtlasData]:
+def Atlas(images, out_name, max_size=2048, scale_factor=1, force_square=False, packer="scan") -> list[AtlasData]:
     blocksize = 4
     dim = GetDim(images, blocksize, max_size, scale_factor)
     size = (dim, dim)
@@ -77,6 +179,7 @@ def Atlas(images, out_name, max_size=2048, scale_factor=1, force_square=False) -
 
     # Full boxes are areas where we have placed images in the atlas
     fullboxes = [(size, [])]
+    packers = [PACKERS[packer](dim)] if packer != "scan" else None
 
     # Do the actual atlasing by sticking the largest images we can have into the smallest valid free boxes
     source_idx = 0
@@ -90,7 +193,10 @@ def Atlas(images, out_name, max_size=2048, scale_factor=1, force_square=False) -
         inserted = False
         for idx, fb in enumerate(fullboxes):
             fblist = fb[1]
-            insertbbox = TryInsertImage(image.size[0], image.size[1], fblist, dim)
+            if packers is None:
+                insertbbox = TryInsertImage(image.size[0], image.size[1], fblist, dim)
+            else:
+                insertbbox = packers[idx].insert(image.size[0], image.size[1])
             if insertbbox:
                 inserted = True
                 fblist.append(FullBox(image, idx, insertbbox, image.name))
@@ -98,6 +204,9 @@ def Atlas(images, out_name, max_size=2048, scale_factor=1, force_square=False) -
 
         if not inserted:
             dim = newsize = GetDim(images[source_idx:], blocksize, max_size, scale_factor)
+            if packers is not None:
+                packers.append(PACKERS[packer](newsize))
+                packers[-1].insert(image.size[0], image.size[1])
             fullboxes.append(((newsize, newsize), [FullBox(image, len(fullboxes), BBox(0, 0, image.size[0], image.size[1]), image.name)]))
 
         return source_idx + 1
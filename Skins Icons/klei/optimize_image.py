@@ -1,6 +1,7 @@
 from PIL.Image import Image
 from ds_file.anim_util import round_up
 from collections import namedtuple
+import numpy as np
 
 BBox = namedtuple("Bbox", "x y w h")
 Regions = namedtuple("Regions", "alpha, opaque")
@@ -20,34 +21,45 @@ def BlockName(block):
         return "Alpha"
     return "Unknown"
 
-def Analyze(image: Image, bbox: BBox):
-    numalpha = 0
-    numblank = 0
-    numopaque = 0
-
-    pixels = image.load()
-    for y in range(bbox.y, bbox.y + bbox.h):
-        for x in range(bbox.x, bbox.x + bbox.w):
-            p = pixels[x, y]
-            if p[3] == 0:
-                numblank += 1
-            elif p[3] == 255:
-                numopaque += 1
-            else:
-                numalpha += 1
+def _summed_area(mask):
+    table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int64), axis=1, out=table[1:, 1:])
+    return table
+
+class AlphaTable:
+    # 全透明、不透明像素数的二维前缀和，只需遍历一次图片，之后任意矩形的统计都是 O(1)
+    def __init__(self, image: Image):
+        alpha = np.asarray(image.getchannel("A"))
+        self.blank = _summed_area(alpha == 0)
+        self.opaque = _summed_area(alpha == 255)
+
+    @staticmethod
+    def _count(table, bbox: BBox):
+        x0, y0, x1, y1 = bbox.x, bbox.y, bbox.x + bbox.w, bbox.y + bbox.h
+        return int(table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0])
+
+    def analyze(self, bbox: BBox):
+        numblank = self._count(self.blank, bbox)
+        numopaque = self._count(self.opaque, bbox)
+        numalpha = bbox.w * bbox.h - numblank - numopaque
+
+        if numalpha == 0 and numblank == 0:
+            return BlockType.OPAQUE
+        elif numalpha == 0 and numopaque == 0:
+            return BlockType.EMPTY
+        else:
+            return BlockType.ALPHA
 
-    if numalpha == 0 and numblank == 0:
-        return BlockType.OPAQUE
-    elif numalpha == 0 and numopaque == 0:
-        return BlockType.EMPTY
-    else:
-        return BlockType.ALPHA
+def Analyze(image: Image, bbox: BBox):
+    return AlphaTable(image).analyze(bbox)
 
 
 class QuadTreeNode:
-    def __init__(self, image: Image, bbox = None, depth = 0, blocksize = 32):
+    def __init__(self, image: Image, bbox = None, depth = 0, blocksize = 32, table: AlphaTable = None):
         if bbox == None:
             bbox = BBox(0, 0, image.width, image.height)
+        if table == None:
+            table = AlphaTable(image)
         self.blocksize = blocksize
         self.depth = depth
         self.bbox = bbox
@@ -68,10 +80,10 @@ class QuadTreeNode:
 
             # figure out the child image types
             childtypes = [
-                Analyze(image, childboxes[0]),
-                Analyze(image, childboxes[1]),
-                Analyze(image, childboxes[2]),
-                Analyze(image, childboxes[3])
+                table.analyze(childboxes[0]),
+                table.analyze(childboxes[1]),
+                table.analyze(childboxes[2]),
+                table.analyze(childboxes[3])
             ]
 
             same_type = childtypes[0] == childtypes[1] == childtypes[2] == childtypes[3]
@@ -83,17 +95,17 @@ class QuadTreeNode:
             else:
                 # otherwise, split up the children
                 self.children = (
-                    QuadTreeNode(image, childboxes[0], depth + 1, self.blocksize),
-                    QuadTreeNode(image, childboxes[1], depth + 1, self.blocksize),
-                    QuadTreeNode(image, childboxes[2], depth + 1, self.blocksize),
-                    QuadTreeNode(image, childboxes[3], depth + 1, self.blocksize)
+                    QuadTreeNode(image, childboxes[0], depth + 1, self.blocksize, table),
+                    QuadTreeNode(image, childboxes[1], depth + 1, self.blocksize, table),
+                    QuadTreeNode(image, childboxes[2], depth + 1, self.blocksize, table),
+                    QuadTreeNode(image, childboxes[3], depth + 1, self.blocksize, table)
                 )
 
             if self.children and len(self.children) == 4 and self.children[0].type == self.children[1].type == self.children[2].type == self.children[3].type == BlockType.ALPHA:
                 self.children = None
                 self.type = BlockType.ALPHA
         else:
-            self.type = Analyze(image, bbox)
+            self.type = table.analyze(bbox)
 
     def __repr__(self):
         if self.children == None:
@@ -0,0 +1,274 @@
+"""
+KTEX 纹理编解码，用 numpy 按块批量处理 DXT1/DXT3/DXT5 和未压缩格式，不需要 ktech.exe 和 TextureConverter.exe，在 Linux 上也能运行
+文件格式参考 ktools: https://github.com/nsimplex/ktools
+"""
+
+import struct
+import numpy as np
+from PIL import Image
+
+DXT1, DXT3, DXT5, RGBA, RGB = 0, 1, 2, 4, 5
+# TextureConverter 的 --format 参数名
+COMPRESSIONS = {"bc1": DXT1, "dxt1": DXT1, "bc2": DXT3, "dxt3": DXT3, "bc3": DXT5, "dxt5": DXT5, "rgba": RGBA, "rgb": RGB}
+PLATFORMS = {"default": 0, "ps3": 10, "xbox360": 11, "opengl": 12, "pc": 12}
+TEXTURE_2D = 2
+
+class UnsupportedFormat(ValueError):
+    """ktex.py 不支持的压缩类型或纹理格式，texture_converter 遇到时改用 exe"""
+
+class KTEX():
+    magic = b"KTEX"
+    endianstring = "<"
+
+    _head = struct.Struct(endianstring + "4sI")
+    _mip_head = struct.Struct(endianstring + "HHHI")
+
+    # 头部是一个 32 位的位域 (名字, 起始位, 位数)，饥荒联机版使用新格式，fill 全为 1
+    header_specs = (("platform", 0, 4), ("compression", 4, 5), ("texture_type", 9, 4), ("mip_count", 13, 5), ("flags", 18, 2), ("fill", 20, 12))
+    old_header_specs = (("platform", 0, 3), ("compression", 3, 3), ("texture_type", 6, 3), ("mip_count", 9, 4), ("flags", 13, 1), ("fill", 14, 18))
+
+    def __init__(self, content: bytes) -> None:
+        view = memoryview(content)
+        magic, header = self._head.unpack_from(view, 0)
+        if magic != self.magic:
+            raise ValueError("not a KTEX file")
+
+        specs = self.header_specs if header >> 20 == 0xFFF else self.old_header_specs
+        for name, offset, bits in specs:
+            setattr(self, name, (header >> offset) & ((1 << bits) - 1))
+
+        # 先是所有 mipmap 的头，然后依次是各层的数据
+        offset = self._head.size
+        mip_heads = []
+        for mip_idx in range(self.mip_count):
+            mip_heads.append(self._mip_head.unpack_from(view, offset))
+            offset += self._mip_head.size
+
+        self.mips: list[tuple[int, int, int, memoryview]] = []
+        for width, height, pitch, data_size in mip_heads:
+            self.mips.append((width, height, pitch, view[offset: offset + data_size]))
+            offset += data_size
+
+    def decode(self, mip: int=0, demultiply: bool=True) -> np.ndarray:
+        """解压一层 mipmap，返回 (高, 宽, 4) 的 RGBA 数组，已上下翻转为图片坐标"""
+        width, height, pitch, data = self.mips[mip]
+
+        if self.compression in (RGBA, RGB):
+            channels = 4 if self.compression == RGBA else 3
+            pitch = pitch or width * channels
+            rows = np.frombuffer(data, dtype=np.uint8, count=pitch * height).reshape(height, pitch)
+            pixels = rows[:, :width * channels].reshape(height, width, channels)
+            if channels == 3:
+                pixels = np.concatenate([pixels, np.full((height, width, 1), 255, dtype=np.uint8)], axis=-1)
+        elif self.compression in (DXT1, DXT3, DXT5):
+            block_w, block_h = (width + 3) // 4, (height + 3) // 4
+            block_size = 8 if self.compression == DXT1 else 16
+            blocks = np.frombuffer(data, dtype=np.uint8, count=block_w * block_h * block_size).reshape(-1, block_size)
+
+            if self.compression == DXT1:
+                pixels = decode_colour(blocks, True)
+            else:
+                pixels = decode_colour(blocks[:, 8:], False)
+                pixels[:, :, 3] = decode_dxt3_alpha(blocks[:, :8]) if self.compression == DXT3 else decode_dxt5_alpha(blocks[:, :8])
+
+            # (块行, 块列, 4, 4, RGBA) -> (行, 列, RGBA)
+            pixels = pixels.reshape(block_h, block_w, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(block_h * 4, block_w * 4, 4)
+            pixels = pixels[:height, :width]
+        else:
+            raise UnsupportedFormat(f"unsupported KTEX compression {self.compression}")
+
+        pixels = pixels[::-1]
+        if demultiply:
+            pixels = demultiply_alpha(pixels)
+        return np.ascontiguousarray(pixels, dtype=np.uint8)
+
+    def to_image(self, mip: int=0, demultiply: bool=True) -> Image.Image:
+        return Image.fromarray(self.decode(mip, demultiply), "RGBA")
+
+    def to_images(self, demultiply: bool=True) -> list[Image.Image]:
+        return [self.to_image(mip, demultiply) for mip in range(len(self.mips))]
+
+    @classmethod
+    def encode(cls, images: Image.Image|list[Image.Image], compression: str|int="bc3", premultiply: bool=True, generate_mips: bool=False, platform: str="opengl") -> bytes:
+        """
+        把图片编码为 KTEX
+        images: 一张图片，或者从大到小的各层 mipmap
+        compression: TextureConverter 的格式名（bc1 bc2 bc3 rgba rgb）或者压缩类型编号
+        generate_mips: 只传入一张图片时，是否逐层缩小生成 mipmap 直到 1×1
+        """
+        if isinstance(compression, str):
+            if compression.lower() not in COMPRESSIONS:
+                raise UnsupportedFormat(f"unsupported texture format {compression}")
+            compression = COMPRESSIONS[compression.lower()]
+        if isinstance(images, Image.Image):
+            images = [images]
+            if generate_mips:
+                while max(images[-1].size) > 1:
+                    images.append(images[-1].resize((max(images[-1].width // 2, 1), max(images[-1].height // 2, 1)), Image.LANCZOS))
+
+        header = 0
+        fields = {"platform": PLATFORMS.get(platform.lower(), 0), "compression": compression, "texture_type": TEXTURE_2D, "mip_count": len(images), "flags": 0, "fill": 0xFFF}
+        for name, offset, bits in cls.header_specs:
+            header |= fields[name] << offset
+
+        mip_heads, mip_datas = b"", []
+        for image in images:
+            pixels = np.asarray(image.convert("RGBA"), dtype=np.uint8)[::-1]
+            if premultiply:
+                pixels = premultiply_alpha(pixels)
+            pitch, data = encode_pixels(pixels, compression)
+            mip_heads += cls._mip_head.pack(image.width, image.height, pitch, len(data))
+            mip_datas.append(data)
+
+        return cls._head.pack(cls.magic, header) + mip_heads + b"".join(mip_datas)
+
+def unpack_565(colour: np.ndarray) -> np.ndarray:
+    colour = colour.astype(np.int32)
+    r, g, b = (colour >> 11) & 0x1F, (colour >> 5) & 0x3F, colour & 0x1F
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1)
+
+def pack_565(rgb: np.ndarray) -> np.ndarray:
+    rgb = rgb.astype(np.int32)
+    return ((rgb[..., 0] * 31 + 127) // 255 << 11) | ((rgb[..., 1] * 63 + 127) // 255 << 5) | ((rgb[..., 2] * 31 + 127) // 255)
+
+def colour_palette(c0: np.ndarray, c1: np.ndarray, four: np.ndarray) -> np.ndarray:
+    # 由两个 RGB565 端点得到 4 色调色板 (块数, 4, RGBA)，four 为 False 的块是三色加透明模式
+    p0, p1 = unpack_565(c0), unpack_565(c1)
+    four = four[:, None]
+    palette = np.empty((len(c0), 4, 4), dtype=np.int32)
+    palette[:, 0, :3] = p0
+    palette[:, 1, :3] = p1
+    palette[:, 2, :3] = np.where(four, (2 * p0 + p1) // 3, (p0 + p1) // 2)
+    palette[:, 3, :3] = np.where(four, (p0 + 2 * p1) // 3, 0)
+    palette[:, :3, 3] = 255
+    palette[:, 3, 3] = np.where(four[:, 0], 255, 0)
+    return palette
+
+def alpha_codes(a0: np.ndarray, a1: np.ndarray) -> np.ndarray:
+    # DXT5 的 8 个透明度 (块数, 8)，a0 > a1 时是 8 级插值，否则是 6 级插值加 0 和 255
+    a0, a1 = a0.astype(np.int32)[:, None], a1.astype(np.int32)[:, None]
+    steps = np.arange(1, 7)
+    codes = np.empty((len(a0), 8), dtype=np.int32)
+    codes[:, :1], codes[:, 1:2] = a0, a1
+    codes[:, 2:] = np.where(
+        a0 > a1,
+        ((7 - steps) * a0 + steps * a1) // 7,
+        np.concatenate([((5 - steps[:4]) * a0 + steps[:4] * a1) // 5, np.broadcast_to([0, 255], (len(a0), 2))], axis=1),
+    )
+    return codes
+
+def decode_colour(blocks: np.ndarray, dxt1: bool) -> np.ndarray:
+    # 每块 8 字节：两个 RGB565 端点，16 个 2 位索引，返回 (块数, 16, 4) 的 RGBA
+    block_num = len(blocks)
+    endpoints = np.ascontiguousarray(blocks[:, :4]).view("<u2")
+    c0, c1 = endpoints[:, 0], endpoints[:, 1]
+
+    # DXT1 中 c0 <= c1 时是三色加透明模式，DXT3/DXT5 总是四色模式
+    palette = colour_palette(c0, c1, c0 > c1 if dxt1 else np.ones(block_num, dtype=bool))
+
+    indices = np.ascontiguousarray(blocks[:, 4:8]).view("<u4")
+    indices = (indices >> (2 * np.arange(16, dtype=np.uint32))) & 3
+    return palette.astype(np.uint8)[np.arange(block_num)[:, None], indices]
+
+def decode_dxt3_alpha(blocks: np.ndarray) -> np.ndarray:
+    # 16 个 4 位透明度，低位在前
+    return np.stack([blocks & 0x0F, blocks >> 4], axis=-1).reshape(-1, 16) * 17
+
+def decode_dxt5_alpha(blocks: np.ndarray) -> np.ndarray:
+    # 两个端点加 16 个 3 位索引
+    codes = alpha_codes(blocks[:, 0], blocks[:, 1])
+    bits = np.zeros(len(blocks), dtype=np.uint64)
+    for byte_idx in range(6):
+        bits |= blocks[:, 2 + byte_idx].astype(np.uint64) << np.uint64(8 * byte_idx)
+    indices = (bits[:, None] >> (3 * np.arange(16, dtype=np.uint64))) & np.uint64(7)
+    return codes.astype(np.uint8)[np.arange(len(blocks))[:, None], indices.astype(np.intp)]
+
+def encode_colour(pixels: np.ndarray, dxt1: bool) -> np.ndarray:
+    # 取每块 RGB 包围盒的两角作为端点（range fit），每个像素选调色板中最近的颜色，返回 (块数, 8) 的字节
+    block_num = len(pixels)
+    rgb = pixels[:, :, :3].astype(np.int32)
+    c0, c1 = pack_565(rgb.max(axis=1)), pack_565(rgb.min(axis=1))
+
+    # DXT1 中有透明像素的块交换端点使用三色加透明模式 (c0 <= c1)
+    transparent = pixels[:, :, 3] < 128
+    if dxt1:
+        swap = transparent.any(axis=1)
+        c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+        four = c0 > c1
+    else:
+        four = np.ones(block_num, dtype=bool)
+
+    palette = colour_palette(c0, c1, four)
+    distance = ((rgb[:, :, None, :] - palette[:, None, :, :3]) ** 2).sum(axis=-1)
+    # 三色模式下 3 号是透明色，只给透明像素使用
+    distance[:, :, 3] = np.where(four[:, None], distance[:, :, 3], np.iinfo(np.int32).max)
+    indices = distance.argmin(axis=-1)
+    if dxt1:
+        indices = np.where(transparent, 3, indices)
+
+    packed = (indices.astype(np.uint32) << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    out = np.empty((block_num, 8), dtype=np.uint8)
+    out[:, :4] = np.ascontiguousarray(np.stack([c0, c1], axis=-1).astype("<u2")).view(np.uint8)
+    out[:, 4:] = np.ascontiguousarray(packed.astype("<u4")[:, None]).view(np.uint8)
+    return out
+
+def encode_dxt3_alpha(pixels: np.ndarray) -> np.ndarray:
+    alpha = (pixels[:, :, 3].astype(np.int32) + 8) // 17
+    return (alpha[:, 0::2] | (alpha[:, 1::2] << 4)).astype(np.uint8)
+
+def encode_dxt5_alpha(pixels: np.ndarray) -> np.ndarray:
+    alpha = pixels[:, :, 3].astype(np.int32)
+    a0, a1 = alpha.max(axis=1), alpha.min(axis=1)
+    codes = alpha_codes(a0, a1)
+    indices = np.abs(alpha[:, :, None] - codes[:, None, :]).argmin(axis=-1)
+
+    bits = (indices.astype(np.uint64) << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+    out = np.empty((len(pixels), 8), dtype=np.uint8)
+    out[:, 0], out[:, 1] = a0, a1
+    out[:, 2:] = np.ascontiguousarray(bits.astype("<u8")[:, None]).view(np.uint8)[:, :6]
+    return out
+
+def encode_pixels(pixels: np.ndarray, compression: int) -> tuple[int, bytes]:
+    """把 (高, 宽, 4) 的 RGBA 数组（纹理坐标，第一行在最下面）编码为一层 mipmap，返回 (pitch, 数据)"""
+    height, width = pixels.shape[:2]
+    if compression == RGBA:
+        return width * 4, pixels.tobytes()
+    if compression == RGB:
+        return width * 3, np.ascontiguousarray(pixels[:, :, :3]).tobytes()
+    if compression not in (DXT1, DXT3, DXT5):
+        raise UnsupportedFormat(f"unsupported KTEX compression {compression}")
+
+    # 补齐到 4 的倍数，再拆成 (块数, 16, RGBA)
+    block_w, block_h = (width + 3) // 4, (height + 3) // 4
+    pixels = np.pad(pixels, ((0, block_h * 4 - height), (0, block_w * 4 - width), (0, 0)), mode="edge")
+    blocks = pixels.reshape(block_h, 4, block_w, 4, 4).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 4)
+
+    if compression == DXT1:
+        data = encode_colour(blocks, True)
+    else:
+        alpha = encode_dxt3_alpha(blocks) if compression == DXT3 else encode_dxt5_alpha(blocks)
+        data = np.concatenate([alpha, encode_colour(blocks, False)], axis=1)
+    return block_w * data.shape[1], data.tobytes()
+
+# 除回透明度的查找表 [alpha, 颜色]
+_alpha, _colour = np.mgrid[0:256, 0:256]
+DEMULTIPLY_TABLE = np.where(_alpha > 0, np.minimum((_colour * 255 + _alpha // 2) // np.maximum(_alpha, 1), 255), 0).astype(np.uint8)
+
+def demultiply_alpha(pixels: np.ndarray) -> np.ndarray:
+    # 游戏纹理是预乘透明度的，转成普通图片时除回去
+    # 不透明的像素不变，只查表处理半透明和透明的像素
+    out = np.array(pixels, dtype=np.uint8)
+    mask = out[:, :, 3] != 255
+    out[mask, :3] = DEMULTIPLY_TABLE[out[mask, 3:], out[mask, :3]]
+    return out
+
+def premultiply_alpha(pixels: np.ndarray) -> np.ndarray:
+    pixels = pixels.astype(np.int32)
+    alpha = pixels[:, :, 3:]
+    return np.concatenate([(pixels[:, :, :3] * alpha + 127) // 255, alpha], axis=-1).astype(np.uint8)
+
+def tex_to_image(content: bytes, mip: int=0) -> Image.Image:
+    return KTEX(content).to_image(mip)
+
+def image_to_tex(images: Image.Image|list[Image.Image], compression: str|int="bc3", **kwargs) -> bytes:
+    return KTEX.encode(images, compression, **kwargs)
@@ -1,15 +1,35 @@
 import os, sys
 import subprocess
+from PIL import Image
+
+from ktech.ktex import KTEX, UnsupportedFormat
 
 TOOL_PATH = os.path.dirname(__file__)
 KTECH = os.path.abspath(os.path.join(TOOL_PATH, "ktech.exe"))
 TEXTURE_CONVERTER = os.path.abspath(os.path.join(TOOL_PATH, "TextureConverter.exe"))
 
+# 优先使用 ktex.py 在进程内编解码，不支持的格式再调用 exe
+NATIVE = True
+
 def tex_to_png(input_paths: list[str]|str, output: str):
     if isinstance(input_paths, str):
         input_paths = [input_paths]
 
     for input_path in input_paths:
+        if NATIVE:
+            output_path = output
+            # 和 ktech 一样，输出可以是目录
+            if not output or os.path.isdir(output):
+                output_path = os.path.join(output, os.path.splitext(os.path.basename(input_path))[0] + ".png")
+            try:
+                with open(input_path, "rb") as file:
+                    image = KTEX(file.read()).to_image()
+                image.save(output_path)
+                continue
+            except ValueError as e:
+                # 不是 KTEX 文件或 UnsupportedFormat（ValueError 的子类）
+                sys.stderr.write("Native decoder failed on {} ({}), falling back to ktech\n".format(input_path, e))
+
         cmd_list = [KTECH, input_path, output]
         if subprocess.call(cmd_list) != 0:
             sys.stderr.write("Error attempting to convert {} to {}\n".format(input_path, output))
@@ -20,6 +40,20 @@ def png_to_tex(input_paths: list[str]|str, output: str, texture_format="bc3", no
     if isinstance(input_paths, str):
         input_paths = [input_paths]
 
+    if NATIVE:
+        try:
+            # 传入多张图片时作为各层 mipmap
+            images = [Image.open(input_path) for input_path in input_paths]
+            if width or height:
+                images[0] = images[0].resize((width or images[0].width, height or images[0].height), Image.LANCZOS)
+            content = KTEX.encode(images if len(images) > 1 else images[0], texture_format, premultiply=not no_premultiply,
+                                  generate_mips=generate_mips, platform=platform)
+            with open(output, "wb") as file:
+                file.write(content)
+            return
+        except UnsupportedFormat as e:
+            sys.stderr.write("Native encoder failed on {} ({}), falling back to TextureConverter\n".format(input_paths, e))
+
     # If a list is passed in, concatenate the filenames with semi-colon separators, otherwise just use the filename
     src_filename_str = ';'.join(input_paths)
 
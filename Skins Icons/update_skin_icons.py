@@ -2,77 +2,63 @@
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from main import *
-from convert import convert
-
-BUILDS_ZIP_PATH = dst_path / "data/databundles/anim_dynamic.zip"
-TEX_PATH = dst_path / "data/anim/dynamic"
-ANIM_PATH = dst_path / "data/anim/accountitem_frame.zip"
+from io import BytesIO
+from icon_render import render_icons
+# main.py 只在 __main__ 中导入：spawn 方式的进程池中每个工作进程都会以 __mp_main__ 重新导入此脚本，
+# 在模块顶层导入 main.py 会让每个工作进程都重新登录维基
 
 def normalize_title(s: str) -> str:
     s = s.replace('_', ' ')
     if s.startswith('File:'):
         s = '文件:' + s[5:6].upper() + s[6:]
     return s
-exist = {image.name for image in site.allimages()}
-skin_names = []
-for address in ['Item', 'Player', 'Other']:
-    pagedata = json.loads(site.pages[f"Data:DST Skins {address}.tabx"].text())
-    fields = pagedata['schema']['fields']
-    for i, field in enumerate(fields):
-        if field['name'] == 'huijiwiki_icon':
-            icon_idx = i
-        elif field['name'] == 'blacklist':
-            blacklist_idx = i
-    icons = [line[icon_idx]
-             for line in pagedata['data'] if line[blacklist_idx] == 'n/a']
-    for icon in tqdm(icons):
-        if not normalize_title(icon) in exist and not site.pages[icon].exists: # 后者处理重定向
-            skin_names.append(icon.replace(
-                'File:', '').replace('_icon.png', ''))
 
-print(skin_names)
+def get_missing_skins():
+    exist = set(get_listing('images'))
+    icons = []
+    for text in fetch_texts([f"Data:DST Skins {address}.tabx" for address in ['Item', 'Player', 'Other']]).values():
+        pagedata = json.loads(text)
+        fields = pagedata['schema']['fields']
+        for i, field in enumerate(fields):
+            if field['name'] == 'huijiwiki_icon':
+                icon_idx = i
+            elif field['name'] == 'blacklist':
+                blacklist_idx = i
+        icons += [line[icon_idx]
+                  for line in pagedata['data'] if line[blacklist_idx] == 'n/a']
+    # allimages 中没有的再批量查一次，处理重定向
+    exists = exists_many([icon for icon in icons if normalize_title(icon) not in exist])
+    return [icon.replace('File:', '').replace('_icon.png', '')
+            for icon, e in exists.items() if not e]
+
+def upload_icon(skin_name, icon):
+    return site.upload(BytesIO(icon), f"{skin_name}_icon.png", '[[分类:皮肤]]', True)
+
+if __name__ == "__main__":
+    from main import *
 
-with ZipFile(BUILDS_ZIP_PATH, 'r') as builds_zip:
-    builds_zip.extractall('builds')
+    BUILDS_ZIP_PATH = dst_path / "data/databundles/anim_dynamic.zip"
+    TEX_PATH = dst_path / "data/anim/dynamic"
 
-errors = []
-try:
-    for skin_name in tqdm(skin_names):
-        try: 
-            with ZipFile('temp.zip', 'w') as temp_zip:
-                with ZipFile(ANIM_PATH, 'r') as anim_zip:
-                    temp_zip.writestr('anim.bin', anim_zip.read('anim.bin'))
+    skin_names = get_missing_skins()
+    print(skin_names)
 
-                build_path = f'builds/anim/dynamic/{skin_name}.zip'
-                if not os.path.exists(build_path):
-                    build_path = f'builds/anim/{skin_name}.zip'
-                with ZipFile(build_path, 'r') as build_zip:
-                    temp_zip.writestr('build.bin', build_zip.read('build.bin'))
+    # 解密、解码、渲染在进程池中进行，渲染好的图标交给线程池上传，两者同时进行
+    errors = {}
+    with ThreadPoolExecutor(max_workers=EDIT_WORKERS) as uploader:
+        uploads = {}
+        for skin_name, icon, error in tqdm(render_icons(skin_names, BUILDS_ZIP_PATH, TEX_PATH, os.cpu_count()), total=len(skin_names)):
+            if error is not None:
+                errors[skin_name] = error
+            else:
+                uploads[uploader.submit(with_retry, lambda skin_name=skin_name, icon=icon: upload_icon(skin_name, icon))] = skin_name
+        for future in as_completed(uploads):
+            try:
+                future.result()
+            except Exception as e:
+                errors[uploads[future]] = e
 
-                tex_dyn_path = f'{TEX_PATH}/{skin_name}.dyn'
-                tex_zip_path = f'{TEX_PATH}/{skin_name}.zip'
-                if not os.path.exists(tex_dyn_path):
-                    tex_zip_path = f'/data/anim/{skin_name}.zip'
-                else:
-                    convert(tex_dyn_path)
-                with ZipFile(tex_zip_path, 'r') as tex_zip:
-                    for tex_file in tex_zip.namelist():
-                        if 'atlas' in tex_file:
-                            temp_zip.writestr(tex_file, tex_zip.read(tex_file))
-            convert('temp.zip')
-            os.remove('temp.zip')
-            os.remove(f'{TEX_PATH}/{skin_name}.zip')
-            site.upload(f'{skin_name}/swap_icon/swap_icon-0.png',
-                        f"{skin_name}_icon.png", '[[分类:皮肤]]', True)
-        except FileNotFoundError:
-            errors.append(skin_name)
-        finally:
-            if os.path.exists(skin_name):
-                shutil.rmtree(skin_name)
-finally:
-    if os.path.exists('builds'):
-        shutil.rmtree('builds')
     print("以下皮肤上传失败：")
-    for error in errors:
-        print(f"  - {error}")
+    for skin_name in skin_names:
+        if skin_name in errors:
+            print(f"  - {skin_name}: {errors[skin_name]}")
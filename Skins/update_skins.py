@@ -1,11 +1,13 @@
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from main import *
+from po_catalog import load_catalog, CHINESE_S_MEMBER
+from scripts_zip import ScriptsTracker
+import argparse
 
 SCRIPTS_PATH = dst_path / "data/databundles/scripts.zip"
 paths = [
     "scripts/skin_strings.lua",
-    "scripts/languages/chinese_s.po",
     "scripts/prefabs/skinprefabs.lua",
     "scripts/clothing.lua",
     "scripts/beefalo_clothing.lua",
@@ -13,10 +15,19 @@ paths = [
     "scripts/misc_items.lua",
     "scripts/item_blacklist.lua"
 ]
+
+arg_parser = argparse.ArgumentParser()
+arg_parser.add_argument("--force", action="store_true", help="忽略变更检测，重新生成")
+args = arg_parser.parse_args()
+tracker = ScriptsTracker("skins", SCRIPTS_PATH, paths + [CHINESE_S_MEMBER], dst_path / "version.txt", force=args.force)
+if not tracker.report():
+    sys.exit(0)
+
 with ZipFile(SCRIPTS_PATH, 'r') as scripts_zip:
     for path in paths:
         scripts_zip.extract(path, 'temp')
-SKIN_STRINGS_PATH, CHINESE_S_PATH, SKIN_PREFABS_PATH, CLOTHING_PATH, \
+    po = load_catalog(scripts_zip)
+SKIN_STRINGS_PATH, SKIN_PREFABS_PATH, CLOTHING_PATH, \
     BEEFALO_CLOTHING_PATH, EMOTE_ITEMS_PATH, MISC_ITEMS_PATH, ITEM_BLACKLIST_PATH = \
     [f"temp/{path}" for path in paths]
 
@@ -38,57 +49,16 @@ with open(SKIN_STRINGS_PATH, "r", encoding="utf-8") as file:
             id_to_name[id] = name
 
 # id_to_name_cn 皮肤代码名：皮肤名字（中文）
-id_to_name_cn = {}
-with open(CHINESE_S_PATH, "r", encoding="utf-8") as file:
-    lines = file.readlines()
-    id = None
-    for line in lines:
-        if "#. STRINGS.SKIN_NAMES." in line:
-            id = line.replace("#. STRINGS.SKIN_NAMES.", "").strip()
-        elif id and 'msgstr "' in line:
-            name_cn = line.replace('msgstr "', "").strip()[:-1].strip()
-            id_to_name_cn[id] = name_cn
-            id = None
+id_to_name_cn = {id: e.msgstr.strip() for id, e in po.prefix("STRINGS.SKIN_NAMES.").items()}
 
 # id_to_desc_cn 皮肤代码名：描述（中文）
-id_to_desc_cn = {}
-with open(CHINESE_S_PATH, "r", encoding="utf-8") as file:
-    lines = file.readlines()
-    id = None
-    for line in lines:
-        if "#. STRINGS.SKIN_DESCRIPTIONS." in line:
-            id = line.replace("#. STRINGS.SKIN_DESCRIPTIONS.", "").strip()
-        elif id and 'msgstr "' in line:
-            desc_cn = line.replace('msgstr "', "").strip()[:-1].strip()
-            id_to_desc_cn[id] = desc_cn
-            id = None
+id_to_desc_cn = {id: e.msgstr.strip() for id, e in po.prefix("STRINGS.SKIN_DESCRIPTIONS.").items()}
 
 # rarity_translation 品质代码名：品质名字（中文），以及品质前缀代码名：品质前缀名字（中文）
-rarity_translation = {}
-with open(CHINESE_S_PATH, "r", encoding="utf-8") as file:
-    lines = file.readlines()
-    rarity_en = None
-    for line in lines:
-        if "#. STRINGS.UI.RARITY." in line:
-            rarity_en = line.replace("#. STRINGS.UI.RARITY.", "").strip()
-        elif rarity_en and 'msgstr "' in line:
-            rarity_ch = line.replace('msgstr "', "").strip()[:-1]
-            rarity_translation[rarity_en] = rarity_ch
-            rarity_en = None
+rarity_translation = {rarity_en: e.msgstr for rarity_en, e in po.prefix("STRINGS.UI.RARITY.").items()}
 
 # collection_translation 系列代码名：系列名字（中文）
-collection_translation = {}
-with open(CHINESE_S_PATH, "r", encoding="utf-8") as file:
-    lines = file.readlines()
-    tag = None
-    for line in lines:
-        if "#. STRINGS.SKIN_TAG_CATEGORIES.COLLECTION." in line:
-            tag = line.replace(
-                "#. STRINGS.SKIN_TAG_CATEGORIES.COLLECTION.", "").strip()
-        elif tag and 'msgstr "' in line:
-            tag_name_cn = line.replace('msgstr "', "").strip()[:-1]
-            collection_translation[tag] = tag_name_cn
-            tag = None
+collection_translation = {tag: e.msgstr for tag, e in po.prefix("STRINGS.SKIN_TAG_CATEGORIES.COLLECTION.").items()}
 
 # id_to_type 皮肤代码名：类型，类型包括"item"（财物皮肤）、"base"（人物皮肤）、nil（都不是）
 # id_to_base 皮肤代码名：物品代码名
@@ -266,7 +236,8 @@ address_types = {
     'Other': ["beard", "beef_body", "beef_feet", "beef_head", "beef_horn",
               "beef_tail", "emote", "emoji", "playerportrait", "profileflair", "loading"]
 }
-for address, types in tqdm(address_types.items()):
+pages = {}
+for address, types in address_types.items():
     data = []
     for s in skins:
         if s['type'] in types:
@@ -277,7 +248,9 @@ for address, types in tqdm(address_types.items()):
         },
         'data': data,
     }, indent=4, ensure_ascii=False)
-    site.pages[f"Data:DST Skins {address}.tabx"].save(pagedata)
+    pages[f"Data:DST Skins {address}.tabx"] = pagedata
+save_pages(pages)
+tracker.commit()
 
 shutil.rmtree('temp')
 
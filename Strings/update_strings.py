@@ -1,24 +1,20 @@
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from main import *
+from po_catalog import load_catalog, unescape
 
 VER = "DST"  # 改成 DS 如果要更新单机版
 itemtable = "Data:ItemTable.tabx" if VER == "DST" else "Data:DSItemTable.tabx"
 
 if VER == "DST":
     SCRIPTS_PATH = dst_path / "data/databundles/scripts.zip"
-    CHINESE_S_PATH = "scripts/languages/chinese_s.po"
-    with ZipFile(SCRIPTS_PATH, "r") as z:
-        z.extract(CHINESE_S_PATH, "temp")
-    CHINESE_S_PATH = "temp/" + CHINESE_S_PATH
+    po = load_catalog(SCRIPTS_PATH)
     with open(dst_path / "version.txt") as f:
         ver = f.read().strip()
 else:
-    CHINESE_S_PATH = ds_path / "data/scripts/languages/chinese_s.po"
+    po = load_catalog(ds_path / "data/scripts/languages/chinese_s.po")
     ver = ""
 
-po = polib.pofile(CHINESE_S_PATH)
-
 
 def lua_escape(s):
     return (s or "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
@@ -65,8 +61,9 @@ code_en = {}
 new_itemtable = []
 id_to_img = {}
 
-if site.pages[itemtable].exists:
-    pagedata = json.loads(site.pages[itemtable].text())
+itemtable_text = fetch_texts([itemtable])[itemtable]
+if itemtable_text is not None:
+    pagedata = json.loads(itemtable_text)
     id_idx = img_idx = 0
     for i, f in enumerate(pagedata["schema"]["fields"]):
         if f["name"] == "id":
@@ -82,7 +79,7 @@ for e in po:
     if p[0] != "STRINGS" or len(p) < 2:
         continue
 
-    cn, en = e.msgstr, e.msgid
+    cn, en = unescape(e.msgstr), unescape(e.msgid)
 
     if p[1] == "NAMES":
         cn2 = cn.strip().replace("\n", "\\n").replace("\t", "")
@@ -107,27 +104,20 @@ for e in po:
 buckets_cn, index = create_buckets_and_index(code_cn)
 buckets_en, _ = create_buckets_and_index(code_en)
 
+pages = {}
+
 df = pd.DataFrame(index)
 df = df.sort_values("key").reset_index(drop=True)
 pagedata = json.dumps({
     "data": json.loads(df.to_json(orient="records", force_ascii=False))
 }, ensure_ascii=False)
-site.pages[f"Data:{VER} Strings Index.json"].save(
-    pagedata,
-    summary=f"Extract data from patch {ver}" if VER == "DST" else ""
-)
+pages[f"Data:{VER} Strings Index.json"] = pagedata
 
-for b in tqdm(sorted(buckets_cn)):
-    site.pages[f"Module:{VER} Strings CN {b}"].save(
-        dump_lua_table(buckets_cn[b]),
-        summary=f"Extract data from patch {ver}" if VER == "DST" else ""
-    )
+for b in sorted(buckets_cn):
+    pages[f"Module:{VER} Strings CN {b}"] = dump_lua_table(buckets_cn[b])
 
-for b in tqdm(sorted(buckets_en)):
-    site.pages[f"Module:{VER} Strings EN {b}"].save(
-        dump_lua_table(buckets_en[b]),
-        summary=f"Extract data from patch {ver}" if VER == "DST" else ""
-    )
+for b in sorted(buckets_en):
+    pages[f"Module:{VER} Strings EN {b}"] = dump_lua_table(buckets_en[b])
 
 
 pagedata = json.dumps({
@@ -146,13 +136,11 @@ pagedata = json.dumps({
     "data": new_itemtable,
 }, ensure_ascii=False, indent=2)
 
-site.pages[itemtable].save(
-    pagedata, summary=f"Extract data from patch {ver}" if VER == "DST" else "")
+pages[itemtable] = pagedata
+save_pages(pages, summary=f"Extract data from patch {ver}" if VER == "DST" else "")
 
 if VER == "DST":
-    shutil.rmtree("temp")
-
-    exist = {page.name for page in site.allpages()}
+    exist = set(get_listing('ns:0'))
     no_need = {"“月亮” 草图", "沐浴球图纸", "月蛾草图", "???", "月光斧蓝图", "空无一物", "未使用", "环形山地皮蓝图", "未知", "迷你冰山", "融化的迷你冰山"}
     exist.update(no_need)
     need = {line[0]: f"<tr><td>{line[0]}</td><td>[[{line[1]}]]</td></tr>" for line in tqdm(
@@ -169,5 +157,4 @@ if VER == "DST":
 {"".join([need[id] for id in sorted(need.keys()) if "quagmire" in id])}
 </table>
 """
-    site.pages['Project:施工计划/缺失页面'].save(
-        pagetext, summary=f"Extract data from patch {ver}")
+    save_pages({'Project:施工计划/缺失页面': pagetext}, summary=f"Extract data from patch {ver}")
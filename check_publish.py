@@ -0,0 +1,202 @@
+"""
+用本地 http.server 模拟维基 API，检查 main.py 中并发编辑的行为：
+两次编辑之间至少间隔 edit_interval 秒（RateLimiter），maxlag 和 5xx 错误会重试、其他错误不重试（with_retry），
+publish 的结果按提交顺序排列，save_pages 只编辑内容有变化的页面
+在临时目录中生成指向本地服务器的 config.json 后再导入 main.py，不会访问真正的维基
+python check_publish.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlparse
+
+INTERVAL = 0.2
+WORKERS = 4
+# 保存这些页面时依次返回的错误，数字为 HTTP 状态码，其余为 API 错误码，用完之后正常保存
+FAILURES = {
+    'Maxlag': ['maxlag', 'maxlag'],
+    'Error503': [503],
+    'Protected': ['protectedpage'] * 5,
+}
+# 保存这些页面时服务器先等待一段时间，让完成的顺序与提交的顺序不同
+SLOW = {'Slow': 1.0}
+
+
+class Wiki:
+    """模拟的维基：页面内容、每次编辑请求到达的时间和每个页面的请求次数"""
+
+    def __init__(self, pages):
+        self.lock = threading.Lock()
+        self.pages = {title: {'text': text, 'revid': revid}
+                      for revid, (title, text) in enumerate(pages.items(), 1)}
+        self.revid = len(self.pages)
+        self.requests = []
+        self.attempts = Counter()
+        self.saved = []
+
+    def query(self, params):
+        query = {}
+        meta = params.get('meta', '').split('|')
+        if 'siteinfo' in meta:
+            query['general'] = {'generator': 'MediaWiki 1.39.0', 'sitename': 'stub'}
+            query['namespaces'] = {'0': {'id': 0, '*': ''}}
+        if 'userinfo' in meta:
+            query['userinfo'] = {'id': 1, 'name': 'Bot', 'groups': ['user'], 'rights': ['read', 'edit']}
+        if 'tokens' in meta:
+            query['tokens'] = {f"{params.get('type', 'csrf')}token": 'token+\\'}
+        if 'titles' in params:
+            pages = {}
+            with self.lock:
+                for n, title in enumerate(params['titles'].split('|'), 1):
+                    page = self.pages.get(title)
+                    if page is None:
+                        pages[str(-n)] = {'ns': 0, 'title': title, 'missing': '', 'protection': []}
+                        continue
+                    info = {'pageid': n, 'ns': 0, 'title': title, 'lastrevid': page['revid'], 'protection': []}
+                    if 'revisions' in params.get('prop', ''):
+                        info['revisions'] = [{'revid': page['revid'], 'slots': {'main': {'*': page['text']}}}]
+                    pages[str(n)] = info
+            query['pages'] = pages
+        return {'batchcomplete': '', 'query': query}
+
+    def edit(self, params):
+        """返回 (HTTP 状态码, 结果)"""
+        title = params['title']
+        with self.lock:
+            self.requests.append((time.monotonic(), title))
+            attempt = self.attempts[title]
+            self.attempts[title] += 1
+        failures = FAILURES.get(title, [])
+        if attempt < len(failures):
+            failure = failures[attempt]
+            if isinstance(failure, int):
+                return failure, {}
+            return 200, {'error': {'code': failure, 'info': failure}}
+        time.sleep(SLOW.get(title, 0))
+        with self.lock:
+            self.revid += 1
+            self.pages[title] = {'text': params['text'], 'revid': self.revid}
+            self.saved.append(title)
+            return 200, {'edit': {'result': 'Success', 'title': title, 'newrevid': self.revid,
+                                  'newtimestamp': '2024-01-01T00:00:00Z'}}
+
+
+def make_handler(wiki):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.handle_api(dict(parse_qsl(urlparse(self.path).query)))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            self.handle_api(dict(parse_qsl(body)))
+
+        def handle_api(self, params):
+            action = params.get('action')
+            status = 200
+            if action == 'query':
+                result = wiki.query(params)
+            elif action == 'login':
+                result = {'login': {'result': 'Success', 'lgusername': 'Bot'}}
+            elif action == 'edit':
+                status, result = wiki.edit(params)
+            else:
+                result = {'error': {'code': 'badvalue', 'info': f'unknown action {action}'}}
+            data = json.dumps(result).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def import_main(port, tmp):
+    config = {
+        'dontstarve': {'dst_path': tmp, 'ds_path': tmp},
+        'huijiwiki': {'username': 'Bot', 'password': 'password', 'X-authkey': '',
+                      'host': f'127.0.0.1:{port}', 'scheme': 'http',
+                      'edit_workers': WORKERS, 'edit_interval': INTERVAL},
+        'steam': {'username': '', 'password': ''},
+    }
+    with open(os.path.join(tmp, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    from mwclient.sleep import Sleepers
+    # mwclient 自己遇到 5xx 时会等待后重试，这些重试不经过 edit_limiter，这里关掉，5xx 只由 with_retry 重试
+    main.site.sleepers = Sleepers(0, 0)
+    main.CACHE_PATH = Path(tmp)
+    main.PAGES_MANIFEST_PATH = Path(tmp) / 'pages_manifest.json'
+    return main
+
+
+def check_rate(wiki):
+    times = sorted(t for t, _ in wiki.requests)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    # 请求从客户端到达本地服务器的时间有少许抖动
+    assert min(gaps) >= INTERVAL - 0.05, f"编辑请求的最小间隔 {min(gaps):.3f} s，应至少为 {INTERVAL} s"
+    print(f"频率限制：{len(times)} 个编辑请求，最小间隔 {min(gaps):.3f} s")
+
+
+def check_publish(main, wiki):
+    titles = ['Slow', 'A', 'Maxlag', 'B', 'Error503', 'Protected', 'C']
+
+    def edit(title):
+        page = main.Page(main.site, title)
+        return lambda: page.save(f'text of {title}', summary='check', maxlag=main.site.max_lag)
+
+    results, errors = main.publish({title: edit(title) for title in titles})
+    assert list(results) == [title for title in titles if title != 'Protected'], f"结果顺序错误：{list(results)}"
+    assert list(errors) == ['Protected'], f"错误：{errors}"
+    assert wiki.saved != list(results), "服务器完成编辑的顺序与提交顺序相同，无法检查结果顺序"
+    expected = {'Maxlag': 3, 'Error503': 2, 'Protected': 1}
+    for title in titles:
+        assert wiki.attempts[title] == expected.get(title, 1), \
+            f"{title} 请求了 {wiki.attempts[title]} 次，应为 {expected.get(title, 1)} 次"
+    print(f"publish：完成顺序 {wiki.saved}，结果顺序 {list(results)}")
+    print(f"with_retry：maxlag 重试 2 次，503 重试 1 次，protectedpage 不重试")
+
+
+def check_save_pages(main, wiki):
+    pages = {
+        'A': 'text of A',
+        'Existing': 'existing text\n',
+        'Data.json': '{"b": 2,\n "a": 1}',
+        'New': 'new text',
+    }
+    changed = main.save_pages(pages, summary='check')
+    # A 是刚保存的，Existing 的内容与维基上的只有末尾空白不同，Data.json 的 JSON 结构相同
+    assert changed == ['New'], f"第一次 save_pages 编辑了 {changed}"
+    requests = len(wiki.requests)
+    changed = main.save_pages(pages, summary='check')
+    assert changed == [] and len(wiki.requests) == requests, f"第二次 save_pages 编辑了 {changed}"
+    print("save_pages：只编辑内容有变化的页面")
+
+
+if __name__ == '__main__':
+    wiki = Wiki({'Existing': 'existing text', 'Data.json': '{"a": 1, "b": 2}'})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(wiki))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        main = import_main(server.server_address[1], tmp)
+        check_publish(main, wiki)
+        check_save_pages(main, wiki)
+        check_rate(wiki)
+    server.shutdown()
+    print("全部通过")
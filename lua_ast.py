@@ -0,0 +1,41 @@
+"""
+Lua 语法树缓存：scripts.zip 中的文件用 lua_parser.py 解析后以 pickle 缓存在 cache/lua_ast/ 中，
+以 (zip 内文件的 CRC, luaparser 版本, lua_parser 版本) 为键，游戏没有更新时重复运行或依次运行多个更新脚本都不需要重新解析
+此模块不依赖 main.py，可以在 Recipes、Skilltree、Prefab Overrides 等子项目中直接导入
+"""
+
+import os
+import pickle
+from importlib.metadata import version
+from pathlib import Path
+
+from lua_parser import PARSER_VERSION, parse
+
+# 语法树的节点类型来自 luaparser，pickle 与 luaparser 的版本有关
+LUAPARSER_VERSION = version('luaparser')
+CACHE_PATH = Path(__file__).parent / 'cache' / 'lua_ast' / f'{LUAPARSER_VERSION}-{PARSER_VERSION}'
+
+
+def parse_member(zip_ref, name, errors='strict'):
+    """
+    解析 zip 中的一个 Lua 文件，优先读取缓存
+    zip_ref: 已打开的 ZipFile
+    name: zip 中的文件名，例如 scripts/recipes.lua
+    errors: 解码 utf-8 时的错误处理方式，同 bytes.decode
+    """
+    info = zip_ref.getinfo(name)
+    cache_file = CACHE_PATH / f"{info.CRC:08x}_{info.file_size}.pickle"
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+    tree = parse(zip_ref.read(name).decode('utf-8', errors=errors))
+    CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再替换，多个进程同时写同一个缓存时不会读到写了一半的文件
+    temp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temp_file, 'wb') as f:
+        pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, cache_file)
+    return tree
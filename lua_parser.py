@@ -0,0 +1,694 @@
+"""
+手写的 Lua 解析器：词法分析为一个正则表达式，语法分析为递归下降，
+生成与 luaparser.ast.parse 相同的语法树（luaparser.astnodes 中的节点），比 luaparser 基于 antlr 的解析快得多，也不会向标准输出打印内容
+运算符优先级、字符串和数字的求值方式都与 luaparser 3.3 相同（包括位运算优先级最低、continue 和 goto 为关键字等与 Lua 5.1 不同的地方），
+但注释不加入语法树，节点也没有 antlr 的 token，各解释器都用不到这些
+python lua_parser.py <scripts.zip 或文件夹>    与 luaparser 逐个文件比较语法树（忽略注释和 token）并比较用时
+此模块不依赖 main.py，可以在各子项目中直接导入
+"""
+
+import ast
+import gc
+import re
+
+from luaparser.astnodes import (
+    AddOp, AndLoOp, AnonymousFunction, Assign, Attribute, BAndOp, Block, BOrOp, Break, BShiftLOp, BShiftROp,
+    BXorOp, Call, CallStyle, Chunk, Concat, Continue, Do, Dots, ElseIf, EqToOp, ExpoOp, FalseExpr, Field,
+    FloatDivOp, FloorDivOp, Forin, Fornum, Function, Goto, GreaterOrEqThanOp, GreaterThanOp, If, Index,
+    IndexNotation, Invoke, Label, LessOrEqThanOp, LessThanOp, LocalAssign, LocalFunction, Method, ModOp,
+    MultOp, Name, Nil, Node, NotEqToOp, Number, OrLoOp, Repeat, Return, SemiColon, String, StringDelimiter, SubOp,
+    Table, TrueExpr, UBNotOp, ULengthOP, ULNotOp, UMinusOp, Varargs, While,
+)
+
+# 语法树的格式有变化时加一，lua_ast.py 的缓存随之失效
+PARSER_VERSION = 1
+
+
+class LuaSyntaxError(Exception):
+    pass
+
+
+# findall 得到 (token, 长括号的等号) 的列表，token 之前的空白不在结果中
+# 长注释和长字符串共用表示等号的分组，以免 findall 返回的元组过长，未闭合的长字符串在 tokenize 中报错
+TOKEN_RE = re.compile(
+    r"""
+    [ \t\f\r\n]*
+    (
+        (?:--)?\[(=*)\[.*?(?:\]\2\]|\Z)
+      | --[^\n]*
+      | [A-Za-z_][A-Za-z_0-9]*
+      | 0[xX](?:[0-9a-fA-F]+(?:\.[0-9a-fA-F]*)?|\.[0-9a-fA-F]+)(?:[pP][+-]?[0-9]+)?
+      | (?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?
+      | "(?:\\(?:\r\n|.)|[^"\\])*"
+      | '(?:\\(?:\r\n|.)|[^'\\])*'
+      | \.\.\.|\.\.|==|~=|<=|>=|<<|>>|//|::|[-+*/%^#&~|<>=(){}\[\];:,.]
+      | [^ \t\f\r\n]
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+KEYWORDS = {
+    "and", "break", "continue", "do", "else", "elseif", "end", "false", "for", "function", "goto", "if", "in",
+    "local", "nil", "not", "or", "repeat", "return", "then", "true", "until", "while",
+}
+SYMBOLS = {
+    "...", "..", "==", "~=", "<=", ">=", "<<", ">>", "//", "::",
+    "-", "+", "*", "/", "%", "^", "#", "&", "~", "|", "<", ">", "=", "(", ")", "{", "}", "[", "]", ";", ":", ",", ".",
+}
+# 关键字和符号的 token 类型就是它们本身
+FIXED_TOKENS = {token: token for token in KEYWORDS | SYMBOLS}
+NAME_START = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_")
+NUMBER_START = set("0123456789.")
+
+# 非关键字、非符号的 token 类型，不会与关键字和符号重复
+NAME = "<name>"
+NUMBER = "<number>"
+STRING = "<string>"
+EOF = "<eof>"
+
+# 与 luaparser 的 builder.visitString 一样，[==[ ]==] 中的 . 不匹配换行，多行时保留原文
+LONG_STRING_RE = re.compile(r"^\[=+\[(.*)]=+]")
+
+
+def _number(text):
+    if text.isdigit() and (text[0] != "0" or len(text) == 1):
+        return int(text)
+    # 与 luaparser 一样按 Python 字面量求值，前导 0（例如 007）时转为浮点数
+    try:
+        return ast.literal_eval(text)
+    except Exception:
+        return float(text)
+
+
+def _string(text):
+    """返回 (字符串的值, 引号)，与 luaparser 的 builder.visitString 相同"""
+    first = text[0]
+    if first == '"':
+        s, delimiter = text[1:-1], StringDelimiter.DOUBLE_QUOTE
+    elif first == "'":
+        s, delimiter = text[1:-1], StringDelimiter.SINGLE_QUOTE
+    elif text.startswith("[["):
+        s, delimiter = text[2:-2], StringDelimiter.DOUBLE_SQUARE
+    else:
+        match = LONG_STRING_RE.match(text)
+        s, delimiter = match.group(1) if match else text, StringDelimiter.SINGLE_QUOTE
+    # luaparser 把内容放进 Python 的双引号字符串中求值来处理转义，没有反斜杠和双引号时结果不变
+    if "\\" in s or '"' in s:
+        try:
+            s = ast.literal_eval(f'"{s}"')
+        except Exception:
+            pass
+    return s, delimiter
+
+
+def tokenize(source):
+    """返回 (token 类型列表, token 值列表)，以 EOF 结尾"""
+    kinds, values = [], []
+    add_kind, add_value = kinds.append, values.append
+    numbers = {}
+    pos = 0
+    if source.startswith("#"):
+        # 第一行的 #! 等当作注释
+        pos = source.find("\n")
+        if pos < 0:
+            pos = len(source)
+    # findall 不创建 Match 对象，比 finditer 快得多
+    for text, level in TOKEN_RE.findall(source, pos):
+        kind = FIXED_TOKENS.get(text)
+        if kind is not None:
+            add_kind(kind)
+            add_value(text)
+            continue
+        first = text[0]
+        if first in NAME_START:
+            add_kind(NAME)
+            add_value(text)
+        elif first in NUMBER_START:
+            # 数据文件中同一个数字反复出现，转换结果按文本缓存
+            value = numbers.get(text)
+            if value is None:
+                value = numbers[text] = _number(text)
+            add_kind(NUMBER)
+            add_value(value)
+        elif first == '"' or first == "'":
+            if len(text) == 1:
+                # 没有结束的字符串只匹配到引号本身
+                raise LuaSyntaxError(f"第 {_line(source, len(kinds))} 行：字符串没有结束")
+            add_kind(STRING)
+            add_value(_string(text))
+        elif first == "[":
+            if not text.endswith(f"]{level}]") or len(text) < 2 * len(level) + 4:
+                raise LuaSyntaxError(f"第 {_line(source, len(kinds))} 行：长字符串没有结束")
+            add_kind(STRING)
+            add_value(_string(text))
+        elif first != "-":
+            raise LuaSyntaxError(f"第 {_line(source, len(kinds))} 行：无法识别的字符 {text!r}")
+    add_kind(EOF)
+    add_value(None)
+    return kinds, values
+
+
+def _line(source, index):
+    # 第 index 个 token 所在的行号，只在报错时使用，重新扫描一遍得到位置
+    pos = 0
+    if source.startswith("#"):
+        pos = source.find("\n")
+        if pos < 0:
+            pos = len(source)
+    for match in TOKEN_RE.finditer(source, pos):
+        if not match.group(1).startswith("--"):
+            if index == 0:
+                return source.count("\n", 0, match.start(1)) + 1
+            index -= 1
+    return source.count("\n") + 1
+
+
+# 二元运算符: (优先级, 右侧表达式的最低优先级, 节点类型)，与 luaparser 的 antlr 语法相同
+# 左结合的运算符右侧最低优先级加一，右结合的（^ 和 ..）不变，位运算的优先级最低
+BINARY_OPS = {
+    "^": (9, 9, ExpoOp),
+    "*": (7, 8, MultOp),
+    "/": (7, 8, FloatDivOp),
+    "%": (7, 8, ModOp),
+    "//": (7, 8, FloorDivOp),
+    "+": (6, 7, AddOp),
+    "-": (6, 7, SubOp),
+    "..": (5, 5, Concat),
+    "<": (4, 5, LessThanOp),
+    ">": (4, 5, GreaterThanOp),
+    "<=": (4, 5, LessOrEqThanOp),
+    ">=": (4, 5, GreaterOrEqThanOp),
+    "~=": (4, 5, NotEqToOp),
+    "==": (4, 5, EqToOp),
+    "and": (3, 4, AndLoOp),
+    "or": (2, 3, OrLoOp),
+    "&": (1, 2, BAndOp),
+    "|": (1, 2, BOrOp),
+    "~": (1, 2, BXorOp),
+    "<<": (1, 2, BShiftLOp),
+    ">>": (1, 2, BShiftROp),
+}
+UNARY_OPS = {"not": ULNotOp, "#": ULengthOP, "-": UMinusOp, "~": UBNotOp}
+# 一元运算符的操作数的最低优先级，-x^2 为 -(x^2)
+UNARY_PRIORITY = 8
+
+BLOCK_END = {EOF, "end", "else", "elseif", "until"}
+CALL_ARGS = {"(", STRING, "{"}
+
+
+class Parser:
+    def __init__(self, source):
+        self.source = source
+        self.kinds, self.values = tokenize(source)
+        self.i = 0
+        # 见 statement：(调用链开始的位置, 第一次调用的 ( 的位置, 调用链结束的位置)，以及重新解析时在哪个 ( 之前停下
+        self.ambiguous_call = None
+        self.stop = None
+
+    def error(self, message):
+        line = _line(self.source, self.i)
+        kind = self.kinds[self.i]
+        token = kind if kind in (EOF, NAME, NUMBER, STRING) else repr(kind)
+        raise LuaSyntaxError(f"第 {line} 行 {token} 附近：{message}")
+
+    def expect(self, kind):
+        """跳过一个 kind 类型的 token 并返回它的值"""
+        i = self.i
+        if self.kinds[i] != kind:
+            self.error(f"应为 {kind}")
+        self.i = i + 1
+        return self.values[i]
+
+    def name(self):
+        return Name(self.expect(NAME))
+
+    def chunk(self):
+        body = self.block()
+        if self.kinds[self.i] != EOF:
+            self.error("应为文件结尾")
+        return Chunk(body)
+
+    def block(self):
+        kinds = self.kinds
+        body = []
+        while True:
+            kind = kinds[self.i]
+            if kind in BLOCK_END:
+                break
+            if kind == "return" or kind == "continue":
+                body.append(self.last_statement())
+                break
+            # 块末尾的 break; 与 luaparser 一样当作 break 和 ; 两句
+            body.append(self.statement())
+        return Block(body)
+
+    def last_statement(self):
+        kind = self.kinds[self.i]
+        self.i += 1
+        if kind == "return":
+            kind = self.kinds[self.i]
+            values = [] if kind in BLOCK_END or kind == ";" else self.explist()
+            node = Return(values)
+        else:
+            node = Continue()
+        if self.kinds[self.i] == ";":
+            self.i += 1
+        if self.kinds[self.i] not in BLOCK_END:
+            self.error("应为块的结尾")
+        return node
+
+    def statement(self):
+        """
+        与 luaparser 的 antlr 语法一样处理有歧义的调用：语句以 a.b[c](x)... 这样的调用链结尾，
+        且去掉 a.b[c] 后 (x)... 本身是一条函数调用语句时，antlr 选择在 a.b[c] 处结束这条语句，
+        例如 local y = f(a):g() 解析为 local y = f 和 (a):g() 两句，这里找到这样的调用链后在 ( 之前停下重新解析这条语句
+        只有这样拆开才能解析的代码（例如 x = f "s" (a).b, c = 1）Lua 本身也会报错，这里同样报错，不模仿 luaparser
+        """
+        start = self.i
+        self.ambiguous_call = None
+        node = self.statement_node()
+        call = self.ambiguous_call
+        # 调用链就是整条语句时（例如 f(a):g()）去掉 (a):g() 后不是语句，没有歧义
+        if call is not None and call[2] == self.i and call[0] != start:
+            # 重新解析时语句中的函数体可能也有这样的语句，stop 要恢复为外层的
+            stop = self.stop
+            self.i, self.stop = start, call[1]
+            node = self.statement_node()
+            self.stop = stop
+        self.ambiguous_call = None
+        return node
+
+    def statement_node(self):
+        kind = self.kinds[self.i]
+        if kind == NAME or kind == "(":
+            return self.expression_statement()
+        if kind == "local":
+            self.i += 1
+            if self.kinds[self.i] == "function":
+                self.i += 1
+                name = self.name()
+                args, body = self.funcbody()
+                return LocalFunction(name, args, body)
+            targets = []
+            while True:
+                name = self.name()
+                if self.kinds[self.i] == "<":
+                    self.i += 1
+                    name.attribute = Attribute(self.name())
+                    self.expect(">")
+                targets.append(name)
+                if self.kinds[self.i] != ",":
+                    break
+                self.i += 1
+            if self.kinds[self.i] == "=":
+                self.i += 1
+                return LocalAssign(targets, self.explist())
+            return LocalAssign(targets, [])
+        if kind == "if":
+            return self.if_statement()
+        if kind == "function":
+            self.i += 1
+            name = self.name()
+            while self.kinds[self.i] == ".":
+                self.i += 1
+                name = Index(self.name(), name, IndexNotation.DOT)
+            if self.kinds[self.i] == ":":
+                self.i += 1
+                method = self.name()
+                args, body = self.funcbody()
+                return Method(name, method, args, body)
+            args, body = self.funcbody()
+            return Function(name, args, body)
+        if kind == "for":
+            return self.for_statement()
+        if kind == "while":
+            self.i += 1
+            test = self.exp(0)
+            self.expect("do")
+            body = self.block()
+            self.expect("end")
+            return While(test, body)
+        if kind == "do":
+            self.i += 1
+            body = self.block()
+            self.expect("end")
+            return Do(body)
+        if kind == "repeat":
+            self.i += 1
+            body = self.block()
+            self.expect("until")
+            return Repeat(body, self.exp(0))
+        if kind == ";":
+            self.i += 1
+            return SemiColon()
+        if kind == "break":
+            self.i += 1
+            return Break()
+        if kind == "goto":
+            self.i += 1
+            return Goto(self.name())
+        if kind == "::":
+            self.i += 1
+            label = self.name()
+            self.expect("::")
+            return Label(label)
+        self.error("应为语句")
+
+    def expression_statement(self):
+        """赋值或函数调用"""
+        node = self.suffixedexp()
+        kind = self.kinds[self.i]
+        if kind == "=" or kind == ",":
+            targets = [node]
+            while self.kinds[self.i] == ",":
+                self.i += 1
+                targets.append(self.suffixedexp())
+            self.expect("=")
+            for target in targets:
+                if not (type(target) is Index or type(target) is Name and not target.wrapped):
+                    self.error("不能赋值的表达式")
+            return Assign(targets, self.explist())
+        if (type(node) is Call or type(node) is Invoke) and not node.wrapped:
+            return node
+        self.error("应为赋值或函数调用")
+
+    def if_statement(self):
+        self.i += 1
+        test = self.exp(0)
+        self.expect("then")
+        node = If(test, self.block(), None)
+        leaf = node
+        while True:
+            kind = self.kinds[self.i]
+            self.i += 1
+            if kind == "elseif":
+                test = self.exp(0)
+                self.expect("then")
+                leaf.orelse = ElseIf(test, self.block(), None)
+                leaf = leaf.orelse
+            elif kind == "else":
+                leaf.orelse = self.block()
+                self.expect("end")
+                return node
+            elif kind == "end":
+                return node
+            else:
+                self.i -= 1
+                self.error("应为 end")
+
+    def for_statement(self):
+        self.i += 1
+        target = self.name()
+        if self.kinds[self.i] == "=":
+            self.i += 1
+            start = self.exp(0)
+            self.expect(",")
+            stop = self.exp(0)
+            step = 1
+            if self.kinds[self.i] == ",":
+                self.i += 1
+                step = self.exp(0)
+            self.expect("do")
+            body = self.block()
+            self.expect("end")
+            return Fornum(target, start, stop, step, body)
+        targets = [target]
+        while self.kinds[self.i] == ",":
+            self.i += 1
+            targets.append(self.name())
+        self.expect("in")
+        iter = self.explist()
+        self.expect("do")
+        body = self.block()
+        self.expect("end")
+        return Forin(body, iter, targets)
+
+    def funcbody(self):
+        """返回 (参数列表, 函数体)"""
+        self.expect("(")
+        args = []
+        if self.kinds[self.i] != ")":
+            while True:
+                if self.kinds[self.i] == "...":
+                    self.i += 1
+                    args.append(Varargs())
+                    break
+                args.append(self.name())
+                if self.kinds[self.i] != ",":
+                    break
+                self.i += 1
+        self.expect(")")
+        body = self.block()
+        self.expect("end")
+        return args, body
+
+    def explist(self):
+        values = [self.exp(0)]
+        while self.kinds[self.i] == ",":
+            self.i += 1
+            values.append(self.exp(0))
+        return values
+
+    def exp(self, limit):
+        """解析优先级不低于 limit 的二元运算组成的表达式"""
+        kinds = self.kinds
+        kind = kinds[self.i]
+        unary = UNARY_OPS.get(kind)
+        if unary is not None:
+            self.i += 1
+            left = unary(self.exp(UNARY_PRIORITY))
+        else:
+            left = self.simpleexp(kind)
+        while True:
+            op = BINARY_OPS.get(kinds[self.i])
+            if op is None or op[0] < limit:
+                return left
+            self.i += 1
+            left = op[2](left, self.exp(op[1]))
+
+    def simpleexp(self, kind):
+        if kind == NAME or kind == "(":
+            return self.suffixedexp()
+        if kind == NUMBER:
+            self.i += 1
+            return Number(self.values[self.i - 1])
+        if kind == STRING:
+            self.i += 1
+            return String(*self.values[self.i - 1])
+        if kind == "{":
+            return self.table()
+        if kind == "nil":
+            self.i += 1
+            return Nil()
+        if kind == "true":
+            self.i += 1
+            return TrueExpr()
+        if kind == "false":
+            self.i += 1
+            return FalseExpr()
+        if kind == "function":
+            self.i += 1
+            args, body = self.funcbody()
+            return AnonymousFunction(args, body)
+        if kind == "...":
+            self.i += 1
+            return Dots()
+        self.error("应为表达式")
+
+    def suffixedexp(self):
+        """变量、函数调用或括号中的表达式，以及之后的 .name、[exp]、:name(args) 和 (args)"""
+        kinds = self.kinds
+        start = self.i
+        kind = kinds[start]
+        # plain: 到目前为止是否只有 .name 和 [exp]，first_call: 此时的第一次 (x) 调用，见 statement
+        plain = kind == NAME
+        first_call = position = None
+        if kind == NAME:
+            node = Name(self.values[self.i])
+            self.i += 1
+        elif kind == "(":
+            self.i += 1
+            node = self.exp(0)
+            self.expect(")")
+            node.wrapped = True
+        else:
+            self.error("应为名称或 (")
+        while True:
+            kind = kinds[self.i]
+            if kind == ".":
+                self.i += 1
+                node = Index(self.name(), node, IndexNotation.DOT)
+            elif kind == "[":
+                self.i += 1
+                key = self.exp(0)
+                self.expect("]")
+                node = Index(key, node, IndexNotation.SQUARE)
+            elif kind == ":":
+                plain = False
+                self.i += 1
+                method = self.name()
+                args, style = self.args()
+                node = Invoke(node, method, args, style)
+            elif kind in CALL_ARGS:
+                if plain:
+                    plain = False
+                    if kind == "(":
+                        if self.i == self.stop:
+                            return node
+                        position = self.i
+                args, style = self.args()
+                node = Call(node, args, style)
+                if position is not None and first_call is None:
+                    first_call = node if len(args) == 1 else False
+            else:
+                if first_call and node is not first_call and (type(node) is Call or type(node) is Invoke):
+                    self.ambiguous_call = (start, position, self.i)
+                return node
+
+    def args(self):
+        """返回 (参数列表, 调用方式)"""
+        kind = self.kinds[self.i]
+        if kind == "(":
+            self.i += 1
+            args = [] if self.kinds[self.i] == ")" else self.explist()
+            self.expect(")")
+            return args, CallStyle.DEFAULT
+        if kind == STRING:
+            self.i += 1
+            return [String(*self.values[self.i - 1])], CallStyle.NO_PARENTHESIS
+        if kind == "{":
+            return [self.table()], CallStyle.NO_PARENTHESIS
+        self.error("应为函数参数")
+
+    def table(self):
+        self.expect("{")
+        kinds = self.kinds
+        fields = []
+        array_index = 1
+        while kinds[self.i] != "}":
+            kind = kinds[self.i]
+            if kind == "[":
+                self.i += 1
+                key = self.exp(0)
+                self.expect("]")
+                self.expect("=")
+                fields.append(Field(key, self.exp(0), between_brackets=True))
+            elif kind == NAME and kinds[self.i + 1] == "=":
+                key = Name(self.values[self.i])
+                self.i += 2
+                fields.append(Field(key, self.exp(0)))
+            else:
+                # 与 luaparser 一样，没有键的值以 Number(序号) 为键
+                fields.append(Field(Number(array_index), self.exp(0), between_brackets=True))
+                array_index += 1
+            if kinds[self.i] != "," and kinds[self.i] != ";":
+                break
+            self.i += 1
+        self.expect("}")
+        return Table(fields)
+
+
+def parse(source):
+    """解析 Lua 源码，返回 Chunk，语法错误时抛出 LuaSyntaxError"""
+    # 解析时创建大量节点且不会产生循环引用，暂停垃圾回收可以省下一半左右的时间
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return Parser(source).chunk()
+    finally:
+        if enabled:
+            gc.enable()
+
+
+IGNORED_ATTRS = {"comments", "_first_token", "_last_token"}
+
+
+def diff_tree(a, b, path="Chunk"):
+    """比较两棵语法树，忽略注释和 token，返回第一个不同之处的路径，相同时返回 None"""
+    if type(a) is not type(b):
+        return f"{path}: {type(a).__name__} != {type(b).__name__}"
+    if isinstance(a, list):
+        if len(a) != len(b):
+            return f"{path}: 长度 {len(a)} != {len(b)}"
+        for index, (x, y) in enumerate(zip(a, b)):
+            diff = diff_tree(x, y, f"{path}[{index}]")
+            if diff:
+                return diff
+        return None
+    if isinstance(a, Node):
+        attrs_a, attrs_b = vars(a), vars(b)
+        keys = attrs_a.keys() - IGNORED_ATTRS
+        if keys != attrs_b.keys() - IGNORED_ATTRS:
+            return f"{path}: 属性 {sorted(keys)} != {sorted(attrs_b.keys() - IGNORED_ATTRS)}"
+        for key in keys:
+            diff = diff_tree(attrs_a[key], attrs_b[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    return None if a == b else f"{path}: {a!r} != {b!r}"
+
+
+def _read_sources(path):
+    # (文件名, 源码)，path 为 zip 文件或文件夹
+    import zipfile
+    from pathlib import Path
+
+    path = Path(path)
+    if path.is_dir():
+        for file in sorted(path.rglob("*.lua")):
+            yield str(file.relative_to(path)), file.read_text("utf-8", errors="replace")
+    else:
+        with zipfile.ZipFile(path) as zip_ref:
+            for name in zip_ref.namelist():
+                if name.endswith(".lua"):
+                    yield name, zip_ref.read(name).decode("utf-8", errors="replace")
+
+
+def _check(path):
+    # 逐个文件与 luaparser 比较语法树和用时
+    import io
+    import sys
+    import time
+    from contextlib import redirect_stdout
+
+    from luaparser import ast as luaparser_ast
+
+    sys.setrecursionlimit(10000)
+    total_old = total_new = 0
+    files = different = 0
+    for name, source in _read_sources(path):
+        files += 1
+        start = time.perf_counter()
+        try:
+            with redirect_stdout(io.StringIO()):
+                expected = luaparser_ast.parse(source)
+        except Exception as e:
+            expected = e
+        total_old += time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            tree = parse(source)
+        except LuaSyntaxError as e:
+            tree = e
+        total_new += time.perf_counter() - start
+        if isinstance(expected, Exception) or isinstance(tree, Exception):
+            if not (isinstance(expected, Exception) and isinstance(tree, Exception)):
+                different += 1
+                print(f"{name}: luaparser {expected if isinstance(expected, Exception) else '正常'}，"
+                      f"lua_parser {tree if isinstance(tree, Exception) else '正常'}")
+            continue
+        diff = diff_tree(expected, tree)
+        if diff:
+            different += 1
+            print(f"{name}: {diff}")
+    print(f"{files} 个文件，{different} 个不同")
+    print(f"luaparser {total_old:.2f} s，lua_parser {total_new:.2f} s，快 {total_old / max(total_new, 1e-9):.1f} 倍")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="与 luaparser 比较语法树和解析用时")
+    arg_parser.add_argument("path", help="scripts.zip 或包含 Lua 文件的文件夹")
+    _check(arg_parser.parse_args().path)
@@ -0,0 +1,172 @@
+"""
+Lua 表：与 Lua 5.x 的实现一样分为数组部分和哈希部分
+键 1..n 的连续非 nil 值按顺序保存在列表 _array 中，其余的键保存在字典 _hash 中，
+# 运算、表尾的 table.insert 和 table.remove 都是 O(1)，导出 JSON 时只有数组部分的表直接转为列表
+Recipes、Skilltree 和 Prefab Overrides 各自的 LuaTable 都继承这里的 LuaTable，只补充各自解释器需要的接口
+此模块不依赖 main.py，可以在各子项目中直接导入
+"""
+
+from itertools import chain
+
+# 没有数组部分的表共用的空数组，大部分表（例如 prefab 中的 DummyTable）只有哈希部分，
+# 少创建一个列表可以减少垃圾回收的次数
+EMPTY = ()
+
+
+class LuaTable:
+    """
+    键为 nil 时读取得到 None，赋值为 None 即删除该键
+    遍历（pairs、keys、values、items）先按顺序遍历数组部分，再按插入顺序遍历哈希部分
+    """
+
+    def __init__(self) -> None:
+        self._array = EMPTY
+        self._hash = {}
+
+    def __getitem__(self, key):
+        if type(key) is int:
+            if 0 < key <= len(self._array):
+                return self._array[key - 1]
+            return self._hash.get(key)
+        if type(key) is float and key.is_integer():
+            # 与 dict 一样，2.0 和 2 是同一个键
+            return self[int(key)]
+        try:
+            return self._hash.get(key)
+        except TypeError:
+            # 不可哈希的键当作不存在
+            return None
+
+    def __setitem__(self, key, value):
+        if type(key) is float and key.is_integer():
+            key = int(key)
+        if type(key) is int and key > 0:
+            array = self._array
+            n = len(array)
+            if key <= n:
+                if value is None:
+                    self._truncate(key)
+                else:
+                    array[key - 1] = value
+                return
+            if key == n + 1 and value is not None:
+                if n:
+                    array.append(value)
+                else:
+                    self._array = [value]
+                if self._hash:
+                    self._hash.pop(key, None)
+                    self._migrate()
+                return
+        if value is None:
+            try:
+                del self._hash[key]
+            except (KeyError, TypeError):
+                pass
+        else:
+            self._hash[key] = value
+
+    def __delitem__(self, key):
+        self[key] = None
+
+    def __contains__(self, key):
+        if type(key) is int and 0 < key <= len(self._array):
+            return True
+        if type(key) is float and key.is_integer():
+            return int(key) in self
+        return key in self._hash
+
+    def __len__(self):
+        """Lua 的 # 运算，即数组部分的长度"""
+        return len(self._array)
+
+    def __bool__(self):
+        # # 运算只看数组部分，Python 中的真假仍然看表是否为空
+        return bool(self._array) or bool(self._hash)
+
+    def _migrate(self):
+        # 数组变长后，哈希部分中紧接着的整数键移到数组部分
+        array, hash_ = self._array, self._hash
+        key = len(array) + 1
+        while hash_.get(key) is not None:
+            array.append(hash_.pop(key))
+            key += 1
+
+    def _truncate(self, key):
+        # 数组中间的键赋 nil：数组部分到 key - 1 为止，之后的值移到哈希部分
+        array = self._array
+        tail = array[key:]
+        del array[key - 1 :]
+        for idx, value in enumerate(tail, key + 1):
+            self._hash[idx] = value
+
+    def insert(self, value, pos: int | None = None):
+        """
+        同 table.insert，pos 为 None 时追加到数组末尾（O(1)），
+        否则 pos 及之后的整数键（包括哈希部分中的）都后移一位，插入 nil 时不做任何事
+        """
+        if value is None:
+            return
+        array = self._array
+        n = len(array)
+        if pos is None or pos == n + 1:
+            self[n + 1] = value
+            return
+        hash_ = self._hash
+        moved = sorted(
+            (k for k in hash_ if type(k) is int and k >= pos), reverse=True
+        )
+        for k in moved:
+            hash_[k + 1] = hash_.pop(k)
+        if 1 <= pos <= n:
+            array.insert(pos - 1, value)
+        else:
+            hash_[pos] = value
+
+    def remove(self, pos: int | None = None):
+        """同 table.remove，移除并返回 pos（默认为数组末尾，O(1)）处的值，之后的值前移一位"""
+        array = self._array
+        if pos is None or pos == len(array):
+            return array.pop() if array else None
+        if 1 <= pos < len(array):
+            return array.pop(pos - 1)
+        value = self[pos]
+        LuaTable.__setitem__(self, pos, None)
+        return value
+
+    def max_pos(self) -> int:
+        """从 1 开始连续的整数键的最大值，即数组部分的长度"""
+        return len(self._array)
+
+    def update(self, mapping):
+        for key, value in mapping.items():
+            self[key] = value
+
+    def pairs(self):
+        """(键, 值) 的迭代器，同 Lua 的 pairs"""
+        return chain(enumerate(self._array, 1), self._hash.items())
+
+    def keys(self):
+        return list(chain(range(1, len(self._array) + 1), self._hash))
+
+    def values(self):
+        return [*self._array, *self._hash.values()]
+
+    def items(self):
+        return list(self.pairs())
+
+    def to_dict(self):
+        """浅复制为 dict"""
+        return dict(self.pairs())
+
+    def is_array(self):
+        """表的键是否都是整数，没有哈希部分时不需要逐个检查"""
+        return not self._hash or all(isinstance(k, int) for k in self._hash)
+
+    def to_json(self):
+        # 键都是整数的表转为数组，按键排序
+        if not self._hash:
+            return list(self._array)
+        if self.is_array():
+            return [value for _, value in sorted(self.pairs(), key=lambda kv: kv[0])]
+        return self.to_dict()
@@ -1,4 +1,5 @@
 from mwclient import *
+from mwclient.page import Page
 from mwparserfromhell import parse
 from tqdm import tqdm
 import json
@@ -11,11 +12,19 @@ import shutil
 from pypinyin import lazy_pinyin
 import re
 from hashlib import md5
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from mwclient.errors import APIError, MaximumRetriesExceeded
+from requests import exceptions as http_errors
 
 with open('config.json','r', encoding='utf-8') as f:
     config = json.load(f)
 
-site = Site('dontstarve.huijiwiki.com', custom_headers={
+# host 和 scheme 一般不用设置，check_publish.py 用它们把 site 指向本地模拟的 API
+site = Site(config["huijiwiki"].get("host", 'dontstarve.huijiwiki.com'),
+            scheme=config["huijiwiki"].get("scheme", 'https'), custom_headers={
             'X-authkey': config["huijiwiki"]["X-authkey"]})
 site.login(
     username = config["huijiwiki"]["username"],
@@ -28,21 +37,40 @@ ds_path = Path(config["dontstarve"]["ds_path"])
 steam_username = config["steam"]["username"]
 steam_password = config["steam"]["password"]
 
+# 并发编辑的线程数、两次编辑之间的最小间隔（秒）以及失败重试次数
+EDIT_WORKERS = config["huijiwiki"].get("edit_workers", 4)
+EDIT_INTERVAL = config["huijiwiki"].get("edit_interval", 0.5)
+EDIT_RETRIES = 5
+# 这些错误码说明服务器暂时不可用，等一会儿重试即可
+TRANSIENT_ERRORS = {'ratelimited', 'maxlag', 'readonly', 'internal_api_error_DBQueryError',
+                    'internal_api_error_DBConnectionError'}
+
+CACHE_PATH = Path(__file__).parent / 'cache'
+PAGES_MANIFEST_PATH = CACHE_PATH / 'pages_manifest.json'
+LISTINGS_PATH = CACHE_PATH / 'listings.sqlite'
+# 列表缓存平时通过最近更改增量同步，但模板嵌入、分类这类由其他页面间接引起的变化不会出现在最近更改里，
+# 所以超过这个时间（秒）没有全量获取过的列表会重新全量获取
+LISTING_MAX_AGE = 7 * 24 * 3600
+# 增量同步时需要合并的列表型属性
+LIST_PROPS = ('revisions', 'templates', 'categories', 'imageinfo')
+
 def touch_all():
     for item in tqdm(list(site.search('创建缩略图出错'))):
         site.pages[item['title']].touch()
 
-def get_pages(template=None, category=None):
+def get_pages(template=None, category=None, refresh=False):
+    """获取嵌入了模板、属于分类的页面（都不传时为主命名空间的全部页面），列表来自本地缓存"""
     if template and category:
-        pages_using_template = {
-            p.name for p in site.pages['Template:' + template].embeddedin()}
-        res = list(p for p in site.categories[category] if p.name in pages_using_template)
-        return res
+        pages_using_template = get_listing(listing_key('template', template), refresh)
+        listing = {title: ns for title, ns in get_listing(listing_key('category', category), refresh).items()
+                   if title in pages_using_template}
     elif template:
-        return list(site.pages['Template:' + template].embeddedin())
+        listing = get_listing(listing_key('template', template), refresh)
     elif category:
-        return list(site.categories[category])
-    return list(site.allpages())
+        listing = get_listing(listing_key('category', category), refresh)
+    else:
+        listing = get_listing('ns:0', refresh)
+    return [Page(site, title, info={'title': title, 'ns': ns}) for title, ns in sorted(listing.items())]
 
 def get_param(template, index, default=''):
     try:
@@ -50,5 +78,296 @@ def get_param(template, index, default=''):
     except ValueError:
         return default
 
+def normalize_text(title, text):
+    # MediaWiki 保存时会统一换行并去掉末尾空白，JSON 页面还会被重新排版，所以 JSON 按解析后的结构比较
+    text = text.replace('\r\n', '\n').rstrip()
+    if title.endswith(('.json', '.tabx')):
+        try:
+            return json.dumps(json.loads(text), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        except ValueError:
+            pass
+    return text
+
+def content_hash(title, text):
+    return md5(normalize_text(title, text).encode('utf-8')).hexdigest()
+
+def load_pages_manifest():
+    if not PAGES_MANIFEST_PATH.exists():
+        return {}
+    with open(PAGES_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def dump_pages_manifest(manifest):
+    CACHE_PATH.mkdir(exist_ok=True)
+    with open(PAGES_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+def query_pages(titles, **kwargs):
+    """每 50 个标题一批查询页面，返回 {传入的标题: 页面信息}，会处理标题规范化和查询续页"""
+    res = {}
+    titles = list(dict.fromkeys(titles))
+    for i in range(0, len(titles), 50):
+        batch = titles[i:i + 50]
+        requested = {}
+        for title in batch:
+            requested.setdefault(title, []).append(title)
+        cont = {}
+        while True:
+            result = site.api('query', titles='|'.join(batch), **kwargs, **cont)
+            query = result.get('query', {})
+            for item in query.get('normalized', []):
+                requested.setdefault(item['to'], []).extend(requested.pop(item['from'], []))
+            for item in query.get('pages', {}).values():
+                for title in requested.get(item['title'], []):
+                    page = res.setdefault(title, {})
+                    for k, v in item.items():
+                        if k in LIST_PROPS:
+                            page.setdefault(k, []).extend(v)
+                        else:
+                            page[k] = v
+            if 'continue' not in result:
+                break
+            cont = result['continue']
+    return res
+
+def revision_text(page_info):
+    revisions = page_info.get('revisions')
+    if not revisions:
+        return None
+    revision = revisions[0]
+    return revision.get('slots', {}).get('main', revision).get('*')
+
+def fetch_texts(titles):
+    """批量获取页面内容，返回 {标题: 内容}，不存在的页面为 None"""
+    infos = query_pages(titles, prop='revisions|info', rvprop='content', rvslots='main')
+    return {title: revision_text(infos.get(title, {})) for title in dict.fromkeys(titles)}
+
+def exists_many(titles):
+    """批量检查页面是否存在，返回 {标题: 是否存在}，重定向页面也算存在"""
+    infos = query_pages(titles, prop='info')
+    return {title: title in infos and 'missing' not in infos[title] and 'invalid' not in infos[title]
+            for title in dict.fromkeys(titles)}
+
+def query_list(list_name, **kwargs):
+    """遍历 list 查询的全部结果，会处理查询续页"""
+    cont = {}
+    while True:
+        result = site.api('query', list=list_name, **kwargs, **cont)
+        yield from result['query'][list_name]
+        if 'continue' not in result:
+            break
+        cont = result['continue']
+
+def listing_key(kind, name):
+    # 和维基的标题规范化保持一致：下划线换成空格，首字母大写
+    name = name.replace('_', ' ').strip()
+    return f"{kind}:{name[:1].upper()}{name[1:]}"
+
+def strip_namespace(title):
+    return title.split(':', 1)[1] if ':' in title else title
+
+def open_listings():
+    CACHE_PATH.mkdir(exist_ok=True)
+    db = sqlite3.connect(LISTINGS_PATH)
+    db.execute('CREATE TABLE IF NOT EXISTS listings (key TEXT, title TEXT, ns INTEGER, PRIMARY KEY (key, title))')
+    db.execute('CREATE TABLE IF NOT EXISTS synced (key TEXT PRIMARY KEY, rc_timestamp TEXT, full_synced_at REAL)')
+    return db
+
+def fetch_listing(key):
+    """
+    从维基全量获取一个列表，返回 {标题: 命名空间}
+    key: ns:命名空间编号、images、template:模板名、category:分类名
+    """
+    kind, _, name = key.partition(':')
+    if kind == 'ns':
+        items = query_list('allpages', apnamespace=name, aplimit='max')
+    elif kind == 'images':
+        items = query_list('allimages', ailimit='max', aiprop='')
+    elif kind == 'template':
+        items = query_list('embeddedin', eititle='Template:' + name, eilimit='max')
+    elif kind == 'category':
+        items = query_list('categorymembers', cmtitle='Category:' + name, cmlimit='max', cmprop='title')
+    else:
+        raise ValueError(f"未知的列表 {key}")
+    return {item['title']: item['ns'] for item in items}
+
+def latest_rc_timestamp():
+    rc = site.api('query', list='recentchanges', rcprop='timestamp', rclimit=1)['query']['recentchanges']
+    return rc[0]['timestamp'] if rc else None
+
+def recent_changes(since):
+    """返回 since 之后被编辑、创建、删除、移动、上传过的标题和最新一条更改的时间"""
+    titles = {}
+    latest = since
+    for rc in query_list('recentchanges', rcstart=since, rcdir='newer', rcprop='title|timestamp|loginfo', rclimit='max'):
+        if 'title' in rc:
+            titles[rc['title']] = rc['ns']
+        target = rc.get('logparams', {}).get('target_title')
+        if target:
+            titles[target] = rc['logparams'].get('target_ns', 0)
+        latest = max(latest, rc['timestamp'])
+    return titles, latest
+
+def recheck_listings(keys, titles):
+    """重新查询 titles 是否属于 keys 中的各个列表，返回 {列表: {标题: 命名空间或 None}}"""
+    templates = ['Template:' + key.partition(':')[2] for key in keys if key.startswith('template:')]
+    categories = ['Category:' + key.partition(':')[2] for key in keys if key.startswith('category:')]
+    props = ['info']
+    kwargs = {}
+    if templates:
+        props.append('templates')
+        kwargs.update(tltemplates='|'.join(templates), tllimit='max')
+    if categories:
+        props.append('categories')
+        kwargs.update(clcategories='|'.join(categories), cllimit='max')
+    if 'images' in keys:
+        props.append('imageinfo')
+        kwargs.update(iiprop='size')
+    infos = query_pages(titles, prop='|'.join(props), **kwargs)
+    res = {key: {} for key in keys}
+    for title, info in infos.items():
+        title = info.get('title', title)
+        exists = 'missing' not in info and 'invalid' not in info
+        ns = info.get('ns', 0)
+        used = {strip_namespace(t['title']) for t in info.get('templates', [])}
+        cats = {strip_namespace(c['title']) for c in info.get('categories', [])}
+        for key in keys:
+            kind, _, name = key.partition(':')
+            if kind == 'ns':
+                member = exists and ns == int(name)
+            elif kind == 'images':
+                member = info.get('imagerepository') == 'local'
+            elif kind == 'template':
+                member = exists and name in used
+            else:
+                member = exists and name in cats
+            res[key][title] = ns if member else None
+    return res
+
+def get_listing(key, refresh=False):
+    """
+    读取本地缓存的列表，返回 {标题: 命名空间}
+    缓存存放在 cache/listings.sqlite，每次读取前用最近更改增量同步，
+    太久没有全量获取或 refresh=True 时重新全量获取
+    """
+    db = open_listings()
+    with db:
+        row = db.execute('SELECT rc_timestamp, full_synced_at FROM synced WHERE key = ?', (key,)).fetchone()
+        full = refresh or row is None or row[0] is None or time.time() - row[1] > LISTING_MAX_AGE
+        if not full:
+            changes, latest = recent_changes(row[0])
+            kind, _, name = key.partition(':')
+            # 分类成员变化会以分类页面的 categorize 更改出现在最近更改中
+            full = kind == 'category' and any(ns == 14 and strip_namespace(title) == name
+                                              for title, ns in changes.items())
+        if full:
+            latest = latest_rc_timestamp()
+            listing = fetch_listing(key)
+            db.execute('DELETE FROM listings WHERE key = ?', (key,))
+            db.executemany('INSERT INTO listings VALUES (?, ?, ?)',
+                           [(key, title, ns) for title, ns in listing.items()])
+            db.execute('INSERT OR REPLACE INTO synced VALUES (?, ?, ?)', (key, latest, time.time()))
+        elif changes:
+            for title, ns in recheck_listings([key], list(changes))[key].items():
+                if ns is None:
+                    db.execute('DELETE FROM listings WHERE key = ? AND title = ?', (key, title))
+                else:
+                    db.execute('INSERT OR REPLACE INTO listings VALUES (?, ?, ?)', (key, title, ns))
+            db.execute('UPDATE synced SET rc_timestamp = ? WHERE key = ?', (latest, key))
+        listing = dict(db.execute('SELECT title, ns FROM listings WHERE key = ?', (key,)).fetchall())
+    db.close()
+    return listing
+
+class RateLimiter:
+    """保证多个线程发出的请求之间至少间隔 interval 秒"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_time = 0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+edit_limiter = RateLimiter(EDIT_INTERVAL)
+
+def is_transient(e):
+    if isinstance(e, APIError):
+        return e.code in TRANSIENT_ERRORS
+    if isinstance(e, http_errors.HTTPError):
+        return e.response is not None and e.response.status_code >= 500
+    return isinstance(e, (http_errors.ConnectionError, http_errors.Timeout, MaximumRetriesExceeded))
+
+def with_retry(fn, limiter=edit_limiter, retries=EDIT_RETRIES):
+    """按频率限制执行 fn，遇到临时性错误时指数退避后重试"""
+    for attempt in range(retries):
+        limiter.wait()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries - 1 or not is_transient(e):
+                raise
+            time.sleep(2 ** attempt)
+
+def publish(jobs, workers=EDIT_WORKERS, desc=None):
+    """
+    用线程池并发执行一组编辑操作，进度显示在 tqdm 进度条上
+    jobs: {键: 无参数的函数}，按顺序提交
+    返回 (results, errors)，两者都按 jobs 的顺序排列
+    """
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(with_retry, fn): key for key, fn in jobs.items()}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = e
+    order = {key: i for i, key in enumerate(jobs)}
+    results = dict(sorted(results.items(), key=lambda item: order[item[0]]))
+    errors = dict(sorted(errors.items(), key=lambda item: order[item[0]]))
+    return results, errors
+
+def save_pages(pages, summary=''):
+    """
+    批量保存页面，只提交内容确实有变化的页面，返回实际编辑的标题列表
+    pages: {标题: 页面内容}
+    本地的 cache/pages_manifest.json 记录每个页面上次的内容 hash 和版本号，
+    版本号与维基上最新版本不一致（被其他人编辑过或没有记录）时才拉取页面内容重新计算
+    """
+    manifest = load_pages_manifest()
+    hashes = {title: content_hash(title, text) for title, text in pages.items()}
+    infos = query_pages(pages, prop='info', inprop='protection')
+    stale = [title for title in pages if 'missing' not in infos[title]
+             and manifest.get(title, {}).get('revid') != infos[title].get('lastrevid')]
+    for title, page_info in query_pages(stale, prop='revisions', rvprop='ids|content', rvslots='main').items():
+        text = revision_text(page_info)
+        if text is not None:
+            manifest[title] = {'hash': content_hash(title, text), 'revid': page_info['revisions'][0]['revid']}
+    changed = [title for title in pages
+               if 'missing' in infos[title] or manifest.get(title, {}).get('hash') != hashes[title]]
+    print(f"{len(pages)} 个页面中有 {len(changed)} 个需要更新")
+
+    def edit(title):
+        page = Page(site, title, info=infos[title])
+        return lambda: page.save(pages[title], summary=summary, maxlag=site.max_lag)
+
+    results, errors = publish({title: edit(title) for title in changed})
+    for title, result in results.items():
+        manifest[title] = {'hash': hashes[title], 'revid': result.get('newrevid', infos[title].get('lastrevid'))}
+    dump_pages_manifest(manifest)
+    if errors:
+        for title, e in errors.items():
+            print(f"保存失败 {title}: {e}")
+        raise RuntimeError(f"{len(errors)} 个页面保存失败")
+    return changed
+
 if __name__ == '__main__':
     print('不要直接运行这个文件，要更新哪些数据就去运行对应的脚本。')
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+po 文件目录：一次流式读取 po 文件，按 msgctxt 建立索引，支持前缀查询
+解析结果以 pickle 缓存在 cache/ 中，以 zip 内文件的 CRC（或普通文件的大小和修改时间）为键，
+同一版本的游戏文件只需解析一次
+此模块不依赖 main.py，可以在 Recipes、Skilltree 等子项目中直接导入
+"""
+
+import io
+import re
+import pickle
+from bisect import bisect_left
+from collections import namedtuple
+from hashlib import md5
+from pathlib import Path
+from zipfile import ZipFile
+
+CACHE_PATH = Path(__file__).parent / 'cache'
+CHINESE_S_MEMBER = 'scripts/languages/chinese_s.po'
+
+# 字符串保持 po 文件中的转义形式，需要时用 unescape 还原
+Entry = namedtuple('Entry', ['msgctxt', 'msgid', 'msgstr'])
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'v': '\v', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\'}
+_ESCAPE_RE = re.compile(r'\\(\\|n|t|r|v|b|f|")')
+_loaded = {}
+
+
+def unescape(s):
+    """还原 po 字符串中的转义，与 polib 的处理一致"""
+    if s is None or '\\' not in s:
+        return s
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(1)], s)
+
+
+def parse_po(lines):
+    """逐行解析 po 文件，按文件顺序产生 Entry，处理多行续行，复数形式只保留 msgstr[0]"""
+    entry = {}
+    field = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        if line[0] == '"':
+            if field:
+                entry[field] += line[1:-1]
+            continue
+        key, _, value = line.partition(' ')
+        if key == 'msgstr[0]':
+            key = 'msgstr'
+        if key in ('msgctxt', 'msgid') and 'msgstr' in entry:
+            yield Entry(entry.get('msgctxt'), entry.get('msgid'), entry['msgstr'])
+            entry = {}
+        if key in ('msgctxt', 'msgid', 'msgstr'):
+            entry[key] = value.strip()[1:-1]
+            field = key
+        else:
+            field = None
+    if 'msgstr' in entry:
+        yield Entry(entry.get('msgctxt'), entry.get('msgid'), entry['msgstr'])
+
+
+class PoCatalog:
+    """以 msgctxt 为键的 po 词条集合，迭代时按文件顺序"""
+
+    def __init__(self, entries):
+        self.entries = {}
+        for entry in entries:
+            if entry.msgctxt is not None:
+                self.entries[entry.msgctxt] = entry
+        self.keys = sorted(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __contains__(self, msgctxt):
+        return msgctxt in self.entries
+
+    def __getitem__(self, msgctxt):
+        return self.entries[msgctxt]
+
+    def get(self, msgctxt, default=None):
+        return self.entries.get(msgctxt, default)
+
+    def prefix(self, prefix):
+        """返回 msgctxt 以 prefix 开头的全部词条，形如 {去掉前缀后的 msgctxt: Entry}，按 msgctxt 排序"""
+        res = {}
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key = self.keys[i]
+            if not key.startswith(prefix):
+                break
+            res[key[len(prefix):]] = self.entries[key]
+        return res
+
+
+def _read(source, member):
+    if isinstance(source, ZipFile):
+        with source.open(member) as f:
+            return PoCatalog(parse_po(io.TextIOWrapper(f, encoding='utf-8-sig')))
+    with open(source, 'r', encoding='utf-8-sig') as f:
+        return PoCatalog(parse_po(f))
+
+
+def load_catalog(source, member=CHINESE_S_MEMBER, cache_dir=CACHE_PATH):
+    """
+    读取 po 文件目录，优先使用缓存
+    source: scripts.zip 的路径或已打开的 ZipFile（读取其中的 member），或 po 文件本身的路径
+    """
+    if not isinstance(source, ZipFile) and Path(source).suffix == '.zip':
+        with ZipFile(source, 'r') as z:
+            return load_catalog(z, member, cache_dir)
+    if isinstance(source, ZipFile):
+        info = source.getinfo(member)
+        identity = f"{source.filename}:{member}"
+        key = (identity, info.CRC, info.file_size)
+        name = Path(member).name
+    else:
+        path = Path(source).resolve()
+        stat = path.stat()
+        identity = str(path)
+        key = (identity, stat.st_size, stat.st_mtime_ns)
+        name = path.name
+    if key in _loaded:
+        return _loaded[key]
+    cache_file = Path(cache_dir) / f"{name}.{md5(identity.encode()).hexdigest()[:8]}.pickle"
+    catalog = None
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_key, cached = pickle.load(f)
+            if cached_key == key:
+                catalog = cached
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+    if catalog is None:
+        catalog = _read(source, member)
+        cache_file.parent.mkdir(exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump((key, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+    _loaded[key] = catalog
+    return catalog
+
+
+def _check():
+    # 逐个转义（以及未知转义、连续反斜杠）与 polib.unescape 比较
+    import polib
+
+    cases = [f'a\\{c}b' for c in 'ntrvbf"\\'] + ['a\\xb', 'a\\\\nb', '\\\\\\', 'a\\']
+    different = [case for case in cases if unescape(case) != polib.unescape(case)]
+    for case in different:
+        print(f"{case!r}: po_catalog {unescape(case)!r}，polib {polib.unescape(case)!r}")
+    print(f"{len(cases)} 个字符串，{len(different)} 个与 polib 不同")
+    return not different
+
+
+if __name__ == '__main__':
+    import sys
+
+    sys.exit(0 if _check() else 1)
@@ -0,0 +1,139 @@
+"""
+在一个进程中按依赖顺序运行多个更新脚本
+所有脚本共用同一个已登录的 site（main.py 只导入一次）和 po_catalog、lua_ast 的缓存，
+每个脚本运行前后隔离 sys.path、sys.modules、sys.argv 和工作目录，
+各子项目中同名的 constants、read_po、lua_core 等模块互不影响
+
+python run_all.py                       运行所有默认脚本
+python run_all.py skin_icons strings    只运行指定的脚本（自动加入它们依赖的脚本）
+python run_all.py --list                列出所有脚本
+python run_all.py --force               传给支持增量运行的脚本，忽略变更检测
+"""
+
+import argparse
+import os
+import runpy
+import sys
+import time
+import traceback
+from collections import namedtuple
+from pathlib import Path
+
+ROOT = Path(__file__).parent.resolve()
+
+# name: 脚本名，path: 相对仓库根目录的路径，deps: 需要先运行的脚本，
+# default: 不指定脚本时是否运行，force: 是否支持 --force
+Stage = namedtuple('Stage', ['name', 'path', 'deps', 'default', 'force'])
+
+STAGES = [
+    Stage('strings', 'Strings/update_strings.py', [], True, False),
+    Stage('prefabs', 'Prefab/update_prefabs.py', [], True, False),
+    Stage('skins', 'Skins/update_skins.py', [], True, True),
+    Stage('skin_icons', 'Skins Icons/update_skin_icons.py', ['skins'], True, False),
+    Stage('recipes', 'Recipes/run.py', [], True, True),
+    Stage('skilltree', 'Skilltree/run.py', [], True, True),
+    Stage('prefab_overrides', 'Prefab Overrides/run.py', [], True, True),
+    # 需要先手动下载 SteamDB 的页面，只在指定时运行
+    Stage('prefab_history', 'Prefab History/update_prefabs_history.py', [], False, False),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def resolve(names):
+    """加入依赖的脚本，按依赖关系排序（依赖相同时保持 STAGES 中的顺序）"""
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"脚本依赖有环: {name}")
+        visiting.add(name)
+        for dep in STAGES_BY_NAME[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in sorted(names, key=[stage.name for stage in STAGES].index):
+        visit(name)
+    return [STAGES_BY_NAME[name] for name in order]
+
+
+def run_stage(stage, force=False):
+    """运行一个脚本，脚本用 sys.exit(0) 提前结束（例如没有变化而跳过）也算成功"""
+    path = ROOT / stage.path
+    stage_dir = str(path.parent)
+    saved_path, saved_argv, saved_cwd = list(sys.path), list(sys.argv), os.getcwd()
+    saved_modules = set(sys.modules)
+
+    # 脚本中的相对路径（例如 Prefab History 的 os.chdir）都以仓库根目录为准
+    os.chdir(ROOT)
+    sys.path.insert(0, stage_dir)
+    sys.argv = [str(path)] + (['--force'] if force and stage.force else [])
+    try:
+        runpy.run_path(str(path), run_name='__main__')
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    finally:
+        sys.path[:] = saved_path
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        # 去掉这个子项目自己的模块，根目录的 main、po_catalog 等共用模块保留
+        for name in set(sys.modules) - saved_modules:
+            file = getattr(sys.modules[name], '__file__', None)
+            if file and Path(file).resolve().is_relative_to(stage_dir):
+                del sys.modules[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按依赖顺序运行更新脚本')
+    parser.add_argument('stages', nargs='*', help='要运行的脚本，默认运行所有默认脚本')
+    parser.add_argument('--list', action='store_true', help='列出所有脚本')
+    parser.add_argument('--force', action='store_true', help='传给支持增量运行的脚本，忽略变更检测')
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            deps = f"（依赖 {', '.join(stage.deps)}）" if stage.deps else ''
+            print(f"{stage.name:<18} {stage.path}{deps}{'' if stage.default else '  [需指定]'}")
+        return
+
+    unknown = [name for name in args.stages if name not in STAGES_BY_NAME]
+    if unknown:
+        parser.error(f"未知的脚本: {', '.join(unknown)}")
+    stages = resolve(args.stages or [stage.name for stage in STAGES if stage.default])
+
+    # 只登录一次，之后各脚本的 from main import * 和 importlib.import_module("main") 都直接使用这个模块
+    sys.path.insert(0, str(ROOT))
+    start = time.perf_counter()
+    import main  # noqa: F401
+    print(f"登录: {time.perf_counter() - start:.1f} s")
+
+    timings, failed, skipped = {}, set(), set()
+    for stage in stages:
+        if failed.intersection(stage.deps):
+            print(f"\n===== 跳过 {stage.name}：依赖的脚本失败 =====")
+            failed.add(stage.name)
+            skipped.add(stage.name)
+            continue
+        print(f"\n===== {stage.name} ({stage.path}) =====")
+        start = time.perf_counter()
+        try:
+            run_stage(stage, args.force)
+        except Exception:
+            traceback.print_exc()
+            failed.add(stage.name)
+        timings[stage.name] = time.perf_counter() - start
+
+    print("\n===== 用时 =====")
+    for stage in stages:
+        status = '跳过' if stage.name in skipped else '失败' if stage.name in failed else '完成'
+        elapsed = f"{timings[stage.name]:8.1f} s" if stage.name in timings else '       -'
+        print(f"{stage.name:<18} {elapsed}  {status}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
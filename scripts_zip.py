@@ -0,0 +1,82 @@
+"""
+scripts.zip 变更检测：zip 目录中已经有每个文件的 CRC32，不需要解压就能知道哪些文件变了
+cache/scripts_manifest.json 按任务记录上次成功运行时用到的文件的 CRC 和当时的游戏版本（version.txt），
+游戏只有热更新改了少数文件时，各更新脚本可以整体跳过，或只处理变化的部分
+此模块不依赖 main.py，可以在 Recipes、Skilltree、Prefab Overrides 等子项目中直接导入
+"""
+
+import json
+import os
+from pathlib import Path
+from zipfile import ZipFile
+
+MANIFEST_PATH = Path(__file__).parent / 'cache' / 'scripts_manifest.json'
+
+
+def member_crcs(zip_path):
+    """{zip 内文件名: CRC32}，只读取 zip 目录"""
+    with ZipFile(zip_path) as zip_ref:
+        return {info.filename: info.CRC for info in zip_ref.infolist() if not info.is_dir()}
+
+
+def read_version(version_path):
+    if version_path is None or not Path(version_path).exists():
+        return None
+    return Path(version_path).read_text().strip()
+
+
+def _load_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+class ScriptsTracker:
+    """
+    记录一个任务依赖的 scripts.zip 文件
+    task: 任务名，例如 recipes、skilltree
+    members: 任务依赖的文件，可以是文件名列表，也可以是判断文件名的函数
+    force: 为 True 时视为所有文件都有变化，用于 --force
+    """
+
+    def __init__(self, task, zip_path, members, version_path=None, force=False):
+        self.task = task
+        self.force = force
+        self.version = read_version(version_path)
+        crcs = member_crcs(zip_path)
+        if callable(members):
+            self.crcs = {name: crc for name, crc in crcs.items() if members(name)}
+        else:
+            # 不存在的文件记为 None，之后出现时也算变化
+            self.crcs = {name: crcs.get(name) for name in members}
+        self.previous = _load_manifest().get(task, {})
+
+    def changed(self):
+        """上次成功运行后变化、新增或删除的文件"""
+        previous = self.previous.get('crcs', {})
+        if self.force or not previous:
+            return sorted(self.crcs)
+        return sorted(name for name in self.crcs.keys() | previous.keys()
+                      if self.crcs.get(name) != previous.get(name))
+
+    def unchanged(self):
+        return not self.changed()
+
+    def report(self):
+        changed = self.changed()
+        if not changed:
+            print(f"{self.task}: scripts.zip 中依赖的 {len(self.crcs)} 个文件自版本 {self.previous.get('version')} 以来没有变化")
+        else:
+            print(f"{self.task}: {len(changed)} / {len(self.crcs)} 个文件有变化（上次 {self.previous.get('version')}，当前 {self.version}）")
+        return changed
+
+    def commit(self):
+        """任务成功完成后记录当前的 CRC，下次运行以此为准"""
+        manifest = _load_manifest()
+        manifest[self.task] = {'version': self.version, 'crcs': self.crcs}
+        MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = MANIFEST_PATH.with_suffix(f'.{os.getpid()}.tmp')
+        temp_file.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(temp_file, MANIFEST_PATH)
+        self.previous = manifest[self.task]